@@ -1,8 +1,19 @@
+import os
 import sys
+import json
+import logging
 import argparse
-from specops.io.reader import *
-from specops.io.writer import *
+import time
+import specops.io
+from specops.io import backends
 from specops.util import Configuration
+from specops.segmenter import SentenceSegmenter
+from specops.classifier import RequirementClassifier, parseKeywords
+from specops.cache import RequirementCache
+from specops.requirement import Requirement, RequirementIdentifier
+from specops.stats import ConversionStats, stageTimer
+from specops.pipeline import Pipeline, RequirementExtractor, ParallelRequirementExtractor
+from specops.log import configureLogging
 '''
 Created on Apr 9, 2012
 
@@ -11,6 +22,9 @@ Created on Apr 9, 2012
 @requires: Python 3.1 or later
 '''
 
+# named after the package, the script runs as __main__
+_log=logging.getLogger('specops.converter')
+
 class CreateComplianceMatrix:  
     '''
     Created on Apr 9, 2012
@@ -27,23 +41,87 @@ class CreateComplianceMatrix:
     _outputFile=None
     # extension of the input file.  Was going to be used to verify that it is a Word Document
     _extensionType=None
+    # backend used to read the Word Document and write the Compliance Matrix (specops.io.COM_BACKEND or specops.io.OOXML_BACKEND)
+    _backend=None
+    # splits paragraphs into sentences
+    _segmenter=None
+    # finds the requirement keywords in sentences
+    _classifier=None
+    # cache of the requirements extracted from previous conversions, None when not caching
+    _cache=None
+    # gives each requirement an ID derived from its text
+    _identifier=None
+    # update an existing Compliance Matrix instead of overwriting it
+    _update=False
+    # configuration snapshot (Settings)
+    _settings=None
+    # statistics of the conversion, None when they are not collected
+    _stats=None
         
-    def __init__(self, wordFile, outputFile=None):
+    def __init__(self, wordFile, outputFile=None, backend=None, useCache=True, update=False, settings=None, stats=None):
         '''
         @param wordFile: word file to read in
         @type wordFile: String
+        @param backend: backend used to read the word file and write the compliance matrix.  
+                        Defaults to the 'backend' property, or Word/Excel automation when it is available
+        @type backend: String
+        @param useCache: reuse the requirements extracted from unchanged documents and paragraphs
+        @type useCache: Boolean
+        @param update: update the existing Compliance Matrix, keeping the reviewer columns of 
+                       the requirements that did not change, instead of overwriting it
+        @type update: Boolean
+        @param settings: configuration, defaults to the snapshot of the properties file
+        @type settings: Settings
+        @param stats: statistics the stages of the conversion are recorded in, None to not collect them
+        @type stats: ConversionStats
         __init__: contructor
         '''
         self._inputFile=wordFile
+        self._identifier=RequirementIdentifier()
+        self._update=update
+        self._settings=settings if settings != None else Configuration.INSTANCE.getSettings()
+        # worker processes are handed their settings, their logging is set up by their first conversion
+        configureLogging(self._settings)
+        
+        if backend == None:
+            backend=self._settings.backend
+        if backend == None:
+            backend=backends.defaultBackend()
+        self._backend=backend
+        
+        # abbreviations that end in a period without ending the sentence
+        abbreviations=self._settings.sentenceAbbreviations
+        self._segmenter=SentenceSegmenter(abbreviations)
+        # requirement keywords (comma separated keyword:strength pairs, strongest first)
+        keywords=self._settings.requirementKeywords
+        self._classifier=RequirementClassifier(parseKeywords(keywords))
+        
+        if useCache and self._settings.cacheEnabled:
+            # everything that changes what is extracted is part of the cache keys
+            self._cache=RequirementCache(self._settings.cacheFile, self._settings.cacheMaxSize,
+                                         '\n'.join((backend, ','.join(abbreviations), keywords, str(self._settings.allParts))))
         
         # get the input filename without extension
         extensionIdx=self._inputFile.rfind('.')
         self._extensionType=self._inputFile[extensionIdx:]
         if outputFile == None:
-            self._outputFile=self._inputFile[:extensionIdx]+'.xlsx'
+            # the Compliance Matrix takes the extension of its format (.xlsx, .csv or .tsv)
+            self._outputFile=self._inputFile[:extensionIdx]+'.'+self._settings.outputFormat
         else:
             self._outputFile=outputFile
         
+        self._stats=stats
+        if stats != None:
+            stats.inputFile=self._inputFile
+            stats.outputFile=self._outputFile
+        
+    def getStats(self):
+        '''
+        @return: statistics of the conversion, None when they are not collected
+        @rtype: ConversionStats
+        '''
+        return self._stats
+        
     # simple tokenizer
     def tokenize(self, sentence, sep):
         '''
@@ -53,101 +131,268 @@ class CreateComplianceMatrix:
         @type sep: String
         @return: list of sentence strings
         '''
-        containsPeriodException=False
-        
-        sentences=list()
-        
-        # make sure the we don't count etc. or i.e. as a complete sentence.  (Add more here if we find any)
         if sep == '.':
-            if sentence.find('etc.') != -1:
-                sentence=sentence.replace('etc.','etc!@#$!@#$')
-                containsPeriodException=True
-            if sentence.find('i.e.') != -1:
-                sentence=sentence.replace('i.e.','i!@#$!@#$e!@#$!@#$')
-                containsPeriodException=True
-            if sentence.find('e.g.') != -1:
-                sentence=sentence.replace('e.g.','e!@#$!@#$g!@#$!@#$')
-                containsPeriodException=True
-        start=0
-        end=sentence.find(sep)
-        while end != -1:
-            line=sentence[start:end+1]
-            if containsPeriodException == True:
-                # change back to a period
-                line=line.replace('!@#$!@#$','.')
-            sentences.append(line.strip())
-            start=end+1
-            end=sentence.find(sep,start)
-        # make sure the sentence contains something and it isn't just the end of a valid sentence that was added in the loop
-        if len(sentence[start:]) != 0:
-            sentences.append(sentence[start:])
-        return sentences
+            return self._segmenter.split(sentence)
+        return SentenceSegmenter((), sep).split(sentence)
+    
+    def _createReader(self):
+        '''
+        @return: reader for the input Word Document using the selected backend
+        @rtype: FileReader
+        '''
+        return backends.createReader(self._backend, self._inputFile, self._settings)
+    
+    def _createWriter(self):
+        '''
+        @return: writer for the output Compliance Matrix using the selected format and backend
+        @rtype: FileWriter
+        '''
+        return backends.createWriter(self._backend, self._outputFile, self._settings)
+    
+    def _openCache(self):
+        '''
+        @return: the key of the input document in the cache, or None if the cache can not be used
+        @rtype: String
+        '''
+        if self._cache == None:
+            return None
+        try:
+            self._cache.open()
+            return self._cache.documentKey(self._inputFile)
+        except Exception:
+            _log.warning('Requirement Cache unavailable: %s', sys.exc_info()[1])
+            self._cache.close()
+            return None
+    
+    def _createPipeline(self):
+        '''
+        @return: pipeline running the stages of the conversion.  Word and Excel automation 
+                 objects can only be used on the thread that created them, so the stages run 
+                 on threads of their own with the ooxml backend only
+        @rtype: Pipeline
+        '''
+        threaded=self._settings.pipelineThreads and self._backend == specops.io.OOXML_BACKEND
+        return Pipeline(self._settings.pipelineQueueSize, self._settings.pipelineBatchSize, threaded)
+    
+    def _createExtractor(self, debug, stats):
+        '''
+        @param debug: log every paragraph and requirement at the DEBUG level
+        @type debug: Boolean
+        @param stats: statistics of the conversion, None when they are not collected
+        @type stats: ConversionStats
+        @return: extractor tokenizing and classifying the paragraphs, on a pool of processes
+                 when extractProcesses is more than 1
+        @rtype: RequirementExtractor
+        '''
+        if self._settings.extractProcesses > 1:
+            return ParallelRequirementExtractor(self._segmenter, self._classifier, self._settings.extractProcesses, debug, stats)
+        return RequirementExtractor(self._segmenter, self._classifier, debug, stats)
+    
+    def _writeRequirement(self, complianceMatrixWriter, updatedRequirements, requirement):
+        '''
+        @param complianceMatrixWriter: writer of the Compliance Matrix
+        @type complianceMatrixWriter: FileWriter
+        @param updatedRequirements: requirements collected to update an existing Compliance Matrix, 
+                                    None when the requirement is written straight away
+        @type updatedRequirements: list<tuple<String,String,Classification>>
+        @param requirement: requirement found in the document
+        @type requirement: Requirement
+        _writeRequirement: gives the requirement its ID and writes it to the Compliance Matrix
+        '''
+        # the text is cut out of the paragraph only now that it is written
+        text=requirement.getText()
+        requirement.requirementId=self._identifier.nextId(text, requirement.section if self._settings.sectionIds else None)
+        classification=self._classifier.getClassification(requirement.keyword)
+        if updatedRequirements != None:
+            # kept until the whole document has been read, without holding on to the paragraph
+            updatedRequirements.append((requirement.requirementId, text, classification))
+        else:
+            complianceMatrixWriter.write(text, classification, requirement.requirementId)
     
     def generateComplianceMatrix(self):
         '''
+        @return: true if the Compliance Matrix was written, false otherwise
+        @rtype: Boolean
         generateComplianceMatrix: Generate the Compliance matrix
         '''
+        success=self._generateComplianceMatrix()
+        if self._stats != None:
+            self._stats.finish(success)
+        return success
+    
+    def _generateComplianceMatrix(self):
+        '''
+        @return: true if the Compliance Matrix was written, false otherwise
+        @rtype: Boolean
+        _generateComplianceMatrix: reads the requirements and writes the Compliance matrix
+        '''
         wordFileReader=None
         complianceMatrixWriter=None
+        success=True
+        debug=_log.isEnabledFor(logging.DEBUG)
+        stats=self._stats
+        # (requirement ID, requirement, classification) of every requirement when updating an 
+        # existing Compliance Matrix, None when writing a new one
+        updatedRequirements=None
+        if self._update and os.path.exists(self._outputFile):
+            updatedRequirements=list()
+        self._identifier.reset()
+        
+        # an unchanged document is converted straight from the cache, without being read
+        with stageTimer(stats, 'cacheLookup'):
+            documentKey=self._openCache()
+            cachedRequirements=None
+            if documentKey != None:
+                cachedRequirements=self._cache.getRequirements(documentKey)
         
         # open the word document
-        try:
-            wordFileReader=WordDocumentFileReader(self._inputFile)
-            wordFileReader.open()
-        except IOError:
-            return
-        except Exception:
-            return
+        if cachedRequirements == None:
+            try:
+                wordFileReader=self._createReader()
+                wordFileReader.setStats(stats)
+                with stageTimer(stats, 'readerOpen'):
+                    wordFileReader.open()
+            except IOError:
+                return False
+            except Exception:
+                return False
+            if wordFileReader.isOpen() == False:
+                return False
         
         try:
             # open the complianceWriter
-            complianceMatrixWriter=ComplianceMatrixWriter(self._outputFile)
-            complianceMatrixWriter.open()
+            complianceMatrixWriter=self._createWriter()
+            complianceMatrixWriter.setStats(stats)
+            if updatedRequirements == None:
+                with stageTimer(stats, 'writerOpen'):
+                    complianceMatrixWriter.open()
         except IOError:
-            return
+            if wordFileReader != None:
+                wordFileReader.close()
+            return False
         except Exception:
-            return
+            if wordFileReader != None:
+                wordFileReader.close()
+            return False
+        
+        # requirement spans of the paragraphs of the previous and of this revision of the document
+        previousParagraphs=dict()
+        currentParagraphs=dict()
+        # [requirement, keyword, section, source] of this revision, stored in the cache once the matrix is written
+        requirements=list()
+        # the write step is timed by a variant chosen once here, so the pipeline runs the same 
+        # code whether statistics are collected or not
+        writeRequirement=self._writeRequirement
+        if stats != None:
+            writeRequirement=stats.timed('write', self._writeRequirement)
+        
+        def writeRequirements(items):
+            # last stage of the pipeline: write each requirement to the complianceMatrixWriter
+            for requirement in items:
+                writeRequirement(complianceMatrixWriter, updatedRequirements, requirement)
+                if documentKey != None:
+                    requirements.append([requirement.getText(), requirement.keyword, requirement.section, requirement.source])
         
         try:
-            # get all the lines in the word document
-            for line in wordFileReader.readlines():          
-                if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                    sys.stderr.write('line: '+line+'\n')
-        
-                # tokenize the line using '.' as a separator
-                for sentence in self.tokenize(line,"."):
-                    # check if this line is a SHALL statement
-                    if sentence.lower().find("shall") != -1:
-                        # It is a SHALL statement.  Write it to the complianceMatrixWriter
-                        if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                            sys.stderr.write('found a SHALL statement\n')
-                        complianceMatrixWriter.write(sentence.strip())
+            pipeline=self._createPipeline()
+            if cachedRequirements != None:
+                _log.debug('Document unchanged, using cached requirements')
+                pipeline.run((Requirement.fromText(requirement, keyword, section, source) for requirement, keyword, section, source in cachedRequirements), writeRequirements)
+                if stats != None:
+                    stats.set('requirements', len(cachedRequirements))
+                    stats.set('requirementsCached', len(cachedRequirements))
+            else:
+                if documentKey != None:
+                    previousParagraphs=self._cache.getParagraphs(self._inputFile)
+                else:
+                    currentParagraphs=None
+                
+                # get all the lines in the word document, with the section each one is in
+                lines=wordFileReader.readSections()
+                if stats != None:
+                    lines=stats.iterate('read', lines, 'paragraphsRead')
+                # read, tokenize and write concurrently
+                extractor=self._createExtractor(debug, stats)
+                pipeline.addStage('extract', lambda paragraphs: extractor.extract(paragraphs, previousParagraphs, currentParagraphs))
+                pipeline.run(lines, writeRequirements)
         except IOError:
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Read Word Document Failed\n')            
+            success=False
+            _log.exception('Read Word Document Failed: \'%s\'', self._inputFile)
         except Exception:
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Exception: '+str(sys.exc_info()[0])+'\n')  
+            success=False
+            _log.exception('General Exception converting \'%s\'', self._inputFile)
             
         
         try:
-            wordFileReader.close()
-        except IOError:  
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Input File Failed to close')            
+            if wordFileReader != None:
+                with stageTimer(stats, 'readerClose'):
+                    wordFileReader.close()
         except Exception:
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Input File Failed to close')   
+            _log.warning('Input File Failed to close: %s', sys.exc_info()[1])
         
         try:
-            complianceMatrixWriter.close()
-        except IOError:
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Output File Failed to close')   
+            with stageTimer(stats, 'writerClose'):
+                if updatedRequirements != None:
+                    if success:
+                        complianceMatrixWriter.update(updatedRequirements)
+                else:
+                    complianceMatrixWriter.close()
         except Exception:
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Output File Failed to close')   
+            success=False
+            _log.exception('Output File Failed to close: \'%s\'', self._outputFile)
+        
+        if documentKey != None:
+            try:
+                if success and cachedRequirements == None:
+                    with stageTimer(stats, 'cacheStore'):
+                        self._cache.putRequirements(documentKey, requirements)
+                        self._cache.putParagraphs(self._inputFile, currentParagraphs)
+            except Exception:
+                _log.warning('Requirement Cache update failed: %s', sys.exc_info()[1])
+            self._cache.close()
+        
+        return success
     
+def convertDocument(inputFile, backend=None, useCache=True, update=False, settings=None, collectStats=False):
+    '''
+    @param inputFile: word file to convert, the Compliance Matrix is written next to it
+    @type inputFile: String
+    @param backend: backend used to read the word file and write the compliance matrix
+    @type backend: String
+    @param useCache: reuse the requirements extracted from unchanged documents and paragraphs
+    @type useCache: Boolean
+    @param update: update the existing Compliance Matrix instead of overwriting it
+    @type update: Boolean
+    @param settings: configuration of the process that started the batch
+    @type settings: Settings
+    @param collectStats: collect the statistics of the conversion
+    @type collectStats: Boolean
+    @return: true if the Compliance Matrix was written, false otherwise.  When collecting
+             statistics, the statistics (see ConversionStats.toDict) whose 'success' entry
+             tells whether the Compliance Matrix was written
+    @rtype: Boolean
+    convertDocument: converts a single document.  Used by the worker processes of --batch
+    '''
+    stats=ConversionStats() if collectStats else None
+    success=CreateComplianceMatrix(inputFile, None, backend, useCache, update, settings, stats).generateComplianceMatrix()
+    if stats != None:
+        return stats.toDict()
+    return success
+
+def writeStats(statistics, statsFile):
+    '''
+    @param statistics: statistics of one conversion, or a list of them for a batch
+    @type statistics: dict
+    @param statsFile: file the statistics are written to as JSON, '-' for standard output
+    @type statsFile: String
+    '''
+    text=json.dumps(statistics, indent=2)
+    if statsFile == '-':
+        print (text)
+    else:
+        with open(statsFile, specops.io.WRITE_ONLY) as output:
+            output.write(text+'\n')
+
 
 if __name__ == '__main__':    
     ###
@@ -159,19 +404,71 @@ if __name__ == '__main__':
         parser=argparse.ArgumentParser(description='Convert a System Specification Word Document into a Excel Compliance Matrix')
         parser.add_argument('--input_file', help='Full Path and Filename of the System Specification Word Document', required=False)
         parser.add_argument('--output_file', help='Full Path and Filename to write the Excel Compliance Matrix', required=False, default=None)
+        parser.add_argument('--backend', help='com uses Word/Excel automation, ooxml reads the *.docx and writes the *.xlsx file directly', choices=[specops.io.COM_BACKEND, specops.io.OOXML_BACKEND], required=False, default=None)
+        parser.add_argument('--format', help='xlsx writes an Excel Workbook, csv and tsv stream delimited text (tsv uses complianceMatrixDelimiter, a tab by default)', choices=[specops.io.XLSX_FORMAT, specops.io.CSV_FORMAT, specops.io.TSV_FORMAT], required=False, default=None)
+        parser.add_argument('--batch', help='Directories, files or glob patterns ("specs/**/*.docx") of Word Documents to convert.  Each Compliance Matrix is written next to its document', nargs='+', required=False, default=None)
+        parser.add_argument('--watch', help='Directories to watch: every new or modified Word Document in them is converted once it stops changing, until interrupted', metavar='DIR', nargs='+', required=False, default=None)
+        parser.add_argument('--jobs', help='Number of documents converted in parallel by --batch (default: number of processors)', type=int, required=False, default=None)
+        parser.add_argument('--extract-processes', help='Number of processes tokenizing and classifying the paragraphs of a single document (default: extractProcesses, 1 for none)', type=int, required=False, default=None)
+        parser.add_argument('--serve', help='Run a conversion service with warm worker processes, taking documents over HTTP on serverHost:serverPort (see ReadMe)', action='store_true', required=False)
+        parser.add_argument('--socket', help='Unix socket --serve listens on instead of serverHost:serverPort', metavar='PATH', required=False, default=None)
+        parser.add_argument('--no-cache', help='Read and tokenize every document even if it has not changed since the last conversion', dest='use_cache', action='store_false', required=False)
+        parser.add_argument('--update', help='Update the existing Compliance Matrix, keeping the reviewer columns of unchanged requirements, instead of overwriting it', action='store_true', required=False)
+        parser.add_argument('--config', help='Properties File to read the configuration from (default: ./config/ComplianceMatrixConverter.properties)', required=False, default=None)
+        parser.add_argument('--set', help='Override a property of the Properties File, for example --set DEBUG=False.  SPECOPS_<key> environment variables override the file too', metavar='KEY=VALUE', action='append', required=False, default=[])
+        parser.add_argument('--stats', help='Write the time spent in each stage and the number of paragraphs, sentences, requirements, rows and bytes as JSON, to standard output or to the given file', metavar='FILE', nargs='?', const='-', required=False, default=None)
         #parser.add_argument('--help', help='show this help message and exit', nargs=0, required=False, action='store_const')
         
         args=parser.parse_args()
-        if args.input_file != None:
-            complianceMatrix=CreateComplianceMatrix(args.input_file, args.output_file)
+        Configuration.INSTANCE.setPropertiesFile(args.config)
+        for override in args.set:
+            key, separator, value=override.partition('=')
+            if separator == '':
+                parser.error('--set expects KEY=VALUE, got \''+override+'\'')
+            Configuration.INSTANCE.setProperty(key.strip(), value.strip())
+        if args.format != None:
+            Configuration.INSTANCE.setProperty('complianceMatrixFormat', args.format)
+        if args.extract_processes != None:
+            Configuration.INSTANCE.setProperty('extractProcesses', str(args.extract_processes))
+        settings=Configuration.INSTANCE.getSettings()
+        # the modules of the batch, watch and server modes are imported when the mode is selected,
+        # so a single conversion (and every batch worker) starts without asyncio or process pools
+        if args.serve or args.socket != None:
+            from specops.server import runServer
+            runServer(convertDocument, args.backend, args.use_cache, settings, socketPath=args.socket)
+        elif args.watch != None:
+            from specops.batch import DOCUMENT_EXTENSIONS
+            from specops.watch import DocumentWatcher
+            extensions=DOCUMENT_EXTENSIONS+('.doc',) if args.backend == specops.io.COM_BACKEND else DOCUMENT_EXTENSIONS
+            watcher=DocumentWatcher(convertDocument, (args.backend, args.use_cache, args.update, settings), args.watch,
+                                    settings.outputFormat, settings.watchInterval, settings.watchDebounce, extensions)
+            print ('Watching '+', '.join(args.watch)+' (Ctrl+C to stop)')
+            watcher.run()
+        elif args.batch != None:
+            from specops.batch import BatchConverter, DOCUMENT_EXTENSIONS, findDocuments, printSummary
+            extensions=DOCUMENT_EXTENSIONS+('.doc',) if args.backend == specops.io.COM_BACKEND else DOCUMENT_EXTENSIONS
+            documents=findDocuments(args.batch, extensions)
+            start=time.time()
+            results=BatchConverter(convertDocument, (args.backend, args.use_cache, args.update, settings, args.stats != None), args.jobs).run(documents)
+            printSummary(results)
+            print ('Wall time: %.2fs' % (time.time()-start))
+            if args.stats != None:
+                writeStats([result.stats for result in results], args.stats)
+            if len([result for result in results if result.success == False]) != 0:
+                sys.exit(1)
+        elif args.input_file != None:
+            stats=ConversionStats() if args.stats != None else None
+            complianceMatrix=CreateComplianceMatrix(args.input_file, args.output_file, args.backend, args.use_cache, args.update, settings, stats)
             complianceMatrix.generateComplianceMatrix()
+            if stats != None:
+                writeStats(stats.toDict(), args.stats)
         else:
-            print ('--input_file <Word Document> is required')
+            print ('--input_file <Word Document>, --batch <Directory>, --watch <Directory> or --serve is required')
             parser.print_help()
     except IOError:
         ignore=True
     except KeyboardInterrupt:
         ignore=True
     except Exception:
-        print ('Exception: ', sys.exc_info()[0])    
+        _log.error('General Exception: %s', sys.exc_info()[1])
         raise
\ No newline at end of file
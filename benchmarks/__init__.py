@@ -0,0 +1,4 @@
+'''
+Benchmarks for the Requirement to Compliance Matrix Converter.  Each module can be run
+with "python -m benchmarks.<module>" from the top level directory.
+'''
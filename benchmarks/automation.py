@@ -0,0 +1,260 @@
+'''
+Runs conversions through the Word reader and Excel writer of the com backend against a fake
+COM dispatcher, so it runs without Microsoft Office.  Checks that the automation pool starts
+Word and Excel once per automationMaxUses conversions, never hands one application to two
+conversions, replaces an application after a failed conversion, and quits every application
+it started.  Starting an application is simulated with a delay, and the conversions are timed
+with the pool and with an application started for every conversion.  Exits with 1 when a
+check fails.
+
+usage: python -m benchmarks.automation [--conversions N] [--max-uses N] [--paragraphs N]
+                                       [--start-seconds SECONDS] [--fail N]
+'''
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from specops.util import Configuration
+from specops.automation import AutomationPool, WORD_APPLICATION, EXCEL_APPLICATION
+from specops.io.com import WordDocumentFileReader, ComplianceMatrixWriter
+
+class FakeObject:
+    '''
+    @summary: COM object accepting any property and returning itself from any call, for the
+              parts of the object model the checks do not look at
+    '''
+
+    def __call__(self, *arguments):
+        return self
+
+    def __getattr__(self, name):
+        return self
+
+class FakeParagraph:
+    def __init__(self, text):
+        self._text=text
+        self.OutlineLevel=10
+
+    def __str__(self):
+        return self._text
+
+class FakeParagraphs(list):
+    @property
+    def Count(self):
+        return len(self)
+
+class FakeFind(FakeObject):
+    '''
+    @summary: search of the headings, the fake document has none
+    '''
+
+    def Execute(self):
+        return False
+
+class FakeContent:
+    def __init__(self, paragraphs):
+        self.Paragraphs=FakeParagraphs(FakeParagraph(paragraph+'\r') for paragraph in paragraphs)
+        self.Text=''.join(paragraph+'\r' for paragraph in paragraphs)
+        self.Find=FakeFind()
+
+class FakeDocument:
+    def __init__(self, application, paragraphs):
+        self._application=application
+        self.Content=FakeContent(paragraphs)
+        self.StoryRanges=()
+
+    def Close(self, saveChanges=None):
+        self._application.closeDocument(self)
+
+class FakeWorkbook:
+    def __init__(self, application):
+        self._application=application
+        self.ActiveSheet=FakeObject()
+
+    def SaveAs(self, outputFile):
+        self._application.check(self)
+        if self._application.failSave:
+            raise Exception('fake Excel failed to save '+outputFile)
+        open(outputFile, 'w').close()
+
+    def Close(self, saveChanges=None):
+        self._application.closeDocument(self)
+
+class FakeApplication:
+    '''
+    @summary: Word or Excel application, recording what is open in it and whether it was quit
+    '''
+
+    def __init__(self, dispatcher, progId):
+        self._dispatcher=dispatcher
+        self.progId=progId
+        self.open=list()
+        self.quit=False
+        self.failSave=False
+        self.Documents=FakeObject()
+        self.Documents.Open=self.openDocument
+        self.Workbooks=FakeObject()
+        self.Workbooks.Add=self.addWorkbook
+
+    def check(self, document=None):
+        if self.quit:
+            self._dispatcher.errors.append(self.progId+' used after it was quit')
+        if document != None and document not in self.open:
+            self._dispatcher.errors.append(self.progId+' used a closed document')
+
+    def openDocument(self, inputFile, *arguments):
+        self.check()
+        if len(self.open) != 0:
+            self._dispatcher.errors.append(self.progId+' handed to two conversions at once')
+        document=FakeDocument(self, self._dispatcher.paragraphs)
+        self.open.append(document)
+        return document
+
+    def addWorkbook(self, *arguments):
+        self.check()
+        if len(self.open) != 0:
+            self._dispatcher.errors.append(self.progId+' handed to two conversions at once')
+        workbook=FakeWorkbook(self)
+        self.open.append(workbook)
+        self.failSave=self._dispatcher.takeFailure()
+        return workbook
+
+    def closeDocument(self, document):
+        if document in self.open:
+            self.open.remove(document)
+
+    def Quit(self, *arguments):
+        if self.quit:
+            self._dispatcher.errors.append(self.progId+' quit twice')
+        self.quit=True
+
+class FakeDispatcher:
+    '''
+    @summary: stands in for win32com.client.Dispatch, recording every application it starts
+    '''
+
+    def __init__(self, paragraphs, startSeconds=0.0, failures=()):
+        self.paragraphs=paragraphs
+        self.applications=list()
+        self.errors=list()
+        self._startSeconds=startSeconds
+        self._failures=set(failures)
+        self._workbooks=0
+
+    def __call__(self, progId):
+        time.sleep(self._startSeconds)
+        application=FakeApplication(self, progId)
+        self.applications.append(application)
+        return application
+
+    def takeFailure(self):
+        '''
+        @return: true if the workbook being added is one whose save fails
+        '''
+        self._workbooks=self._workbooks+1
+        return self._workbooks in self._failures
+
+def convert(pool, outputFile, settings):
+    '''
+    @summary: reads the paragraphs of a document in Word and writes them to a Compliance
+              Matrix in Excel, the way a com conversion does
+    @return: true if the Compliance Matrix was saved
+    '''
+    reader=WordDocumentFileReader('specification.docx', pool=pool)
+    reader.open()
+    paragraphs=reader.readSections()
+    reader.close()
+    writer=ComplianceMatrixWriter(outputFile, settings=settings, pool=pool)
+    writer.open()
+    for section, paragraph, source in paragraphs:
+        writer.write(paragraph)
+    try:
+        writer.close()
+        return True
+    except Exception:
+        return False
+
+def run(conversions, maxUses, paragraphs, startSeconds, failures, directory, settings):
+    '''
+    @return: the fake dispatcher, the pool and the seconds taken by the conversions
+    '''
+    dispatcher=FakeDispatcher(paragraphs, startSeconds, failures)
+    pool=AutomationPool(dispatcher, maxUses)
+    start=time.perf_counter()
+    for index in range(conversions):
+        convert(pool, os.path.join(directory, 'matrix%d.xlsx' % index), settings)
+    pool.close()
+    return dispatcher, pool, time.perf_counter()-start
+
+def expectedStarts(conversions, maxUses, failures):
+    '''
+    @return: number of times an application used by every conversion should be started, when
+             it is replaced after maxUses conversions and after the failed conversions
+    @rtype: Int
+    '''
+    starts=0
+    uses=None
+    for conversion in range(1, conversions+1):
+        if uses == None:
+            starts=starts+1
+            uses=0
+        uses=uses+1
+        if uses >= maxUses or conversion in failures:
+            uses=None
+    return starts
+
+def check(dispatcher, pool, conversions, maxUses, failures):
+    '''
+    @return: the checks that failed
+    @rtype: list<String>
+    '''
+    errors=list(dispatcher.errors)
+    for progId, failed in ((WORD_APPLICATION, ()), (EXCEL_APPLICATION, failures)):
+        started=len([application for application in dispatcher.applications if application.progId == progId])
+        expected=expectedStarts(conversions, maxUses, failed)
+        if started != expected:
+            errors.append('%s started %d times, expected %d' % (progId, started, expected))
+    for application in dispatcher.applications:
+        if application.quit == False:
+            errors.append(application.progId+' left running')
+        if len(application.open) != 0:
+            errors.append(application.progId+' left a document open')
+    if pool.getStarted() != len(dispatcher.applications) or pool.getQuit() != len(dispatcher.applications):
+        errors.append('pool started %d and quit %d of %d applications' % (pool.getStarted(), pool.getQuit(), len(dispatcher.applications)))
+    return errors
+
+def main():
+    parser=argparse.ArgumentParser(description='Automation pool reuse and cleanup against a fake COM dispatcher')
+    parser.add_argument('--conversions', help='number of conversions', type=int, default=20)
+    parser.add_argument('--max-uses', help='conversions an application is used for (automationMaxUses)', type=int, default=8)
+    parser.add_argument('--paragraphs', help='paragraphs of the fake document', type=int, default=100)
+    parser.add_argument('--start-seconds', help='simulated time to start Word or Excel', type=float, default=0.05)
+    parser.add_argument('--fail', help='conversions (1 based) whose Compliance Matrix fails to save', type=int, nargs='*', default=[5])
+    args=parser.parse_args()
+
+    Configuration.INSTANCE.setProperty('DEBUG', 'False')
+    settings=Configuration.INSTANCE.getSettings()
+    paragraphs=['Paragraph %d shall be read.' % index for index in range(args.paragraphs)]
+    errors=list()
+
+    directory=tempfile.mkdtemp(prefix='specops-benchmark-')
+    try:
+        dispatcher, pool, seconds=run(args.conversions, args.max_uses, paragraphs, args.start_seconds, args.fail, directory, settings)
+        errors.extend(check(dispatcher, pool, args.conversions, args.max_uses, args.fail))
+        print('pooled      %3d conversions %8.3f s  %s' % (args.conversions, seconds, pool.toString()))
+        dispatcher, pool, seconds=run(args.conversions, 1, paragraphs, args.start_seconds, (), directory, settings)
+        errors.extend(check(dispatcher, pool, args.conversions, 1, ()))
+        print('per use     %3d conversions %8.3f s  %s' % (args.conversions, seconds, pool.toString()))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    for error in errors:
+        print('FAILED: '+error)
+    if len(errors) != 0:
+        sys.exit(1)
+    print('every application was reused up to its limit, replaced after a failure and quit')
+
+if __name__ == '__main__':
+    main()
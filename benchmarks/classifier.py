@@ -0,0 +1,38 @@
+'''
+Throughput of the RequirementClassifier as the keyword list grows, against the original
+sentence.lower().find("shall") check.
+
+usage: python -m benchmarks.classifier [--size MEGABYTES] [--repeat N]
+'''
+import argparse
+from specops.classifier import RequirementClassifier, DEFAULT_KEYWORDS
+from specops.segmenter import SentenceSegmenter
+from benchmarks.segmenter import generateParagraph, measure
+
+# extra keywords used to grow the keyword list, none of them appear in the generated text
+_EXTRA_KEYWORDS=('is required to', 'is responsible for', 'has to', 'needs to', 'is expected to',
+                 'may', 'can', 'ought to', 'is to', 'are to', 'required', 'mandatory', 'prohibited',
+                 'recommended', 'optional', 'desirable', 'expected', 'necessary', 'obligated')
+
+def main():
+    parser=argparse.ArgumentParser(description='RequirementClassifier throughput by number of keywords')
+    parser.add_argument('--size', help='text size in megabytes', type=float, default=1.0)
+    parser.add_argument('--repeat', help='number of timed runs, the best is reported', type=int, default=5)
+    args=parser.parse_args()
+
+    paragraph=generateParagraph(int(args.size*1024*1024))
+    megabytes=len(paragraph)/(1024.0*1024.0)
+    spans=list(SentenceSegmenter().spans(paragraph))
+
+    legacyTime, count=measure(lambda: sum(1 for start, end in spans if paragraph[start:end].lower().find('shall') != -1), args.repeat)
+    print('text: %.2f MB, %d sentences' % (megabytes, len(spans)))
+    print('legacy lower().find:      %8.4f s  %8.1f MB/s  %d requirements' % (legacyTime, megabytes/legacyTime, count))
+
+    keywords=list(DEFAULT_KEYWORDS)
+    for extra in (0, 5, 10, len(_EXTRA_KEYWORDS)):
+        classifier=RequirementClassifier(keywords+[(keyword, 'Extra') for keyword in _EXTRA_KEYWORDS[:extra]])
+        elapsed, count=measure(lambda: sum(1 for start, end in spans if classifier.classify(paragraph, start, end) != None), args.repeat)
+        print('classifier %2d keywords:   %8.4f s  %8.1f MB/s  %d requirements' % (len(keywords)+extra, elapsed, megabytes/elapsed, count))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+'''
+Per line cost of reading the configuration in the conversion loop: the Configuration lookups
+CreateComplianceMatrix made for every paragraph and every requirement, against the attribute
+of the Settings snapshot it reads now.
+
+usage: python -m benchmarks.configuration [--lines N] [--repeat N]
+'''
+import argparse
+from specops.util import Configuration
+from specops.segmenter import SentenceSegmenter
+from specops.classifier import RequirementClassifier
+from benchmarks.segmenter import generateParagraph, measure
+
+def main():
+    parser=argparse.ArgumentParser(description='Configuration lookups against the Settings snapshot')
+    parser.add_argument('--lines', help='number of paragraphs converted', type=int, default=100000)
+    parser.add_argument('--repeat', help='number of timed runs, the best is reported', type=int, default=5)
+    args=parser.parse_args()
+
+    # DEBUG off, the lookups are pure overhead
+    Configuration.INSTANCE.setProperty('DEBUG', 'False')
+    settings=Configuration.INSTANCE.getSettings()
+    segmenter=SentenceSegmenter(settings.sentenceAbbreviations)
+    classifier=RequirementClassifier()
+    lines=[generateParagraph(200, seed) for seed in range(min(args.lines, 1000))]
+    lines=(lines*(args.lines//len(lines)+1))[:args.lines]
+
+    def legacyLookups():
+        count=0
+        for line in lines:
+            if Configuration.INSTANCE.getBoolean('DEBUG', False):
+                count=count+1
+            # the sentences of a 200 character paragraph that are requirements
+            for requirement in range(2):
+                if Configuration.INSTANCE.getBoolean('DEBUG', False):
+                    count=count+1
+        return count
+
+    def settingsLookups():
+        count=0
+        debug=settings.debug
+        for line in lines:
+            if debug:
+                count=count+1
+            for requirement in range(2):
+                if debug:
+                    count=count+1
+        return count
+
+    def convert():
+        return sum(1 for line in lines for start, end in segmenter.spans(line) if classifier.classify(line, start, end) != None)
+
+    legacyTime, count=measure(legacyLookups, args.repeat)
+    settingsTime, count=measure(settingsLookups, args.repeat)
+    convertTime, count=measure(convert, args.repeat)
+    print('%d paragraphs, %d requirements' % (len(lines), count))
+    print('segment + classify:     %8.4f s  %8.3f us/line' % (convertTime, convertTime*1e6/len(lines)))
+    print('Configuration lookups:  %8.4f s  %8.3f us/line  %5.1f%% of the conversion' % (legacyTime, legacyTime*1e6/len(lines), 100.0*legacyTime/convertTime))
+    print('Settings attribute:     %8.4f s  %8.3f us/line  %5.1f%% of the conversion' % (settingsTime, settingsTime*1e6/len(lines), 100.0*settingsTime/convertTime))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+'''
+Counts the calls the Excel writer of the com backend makes into Excel, against a fake Excel
+sheet that records every Range, Cells and Columns call and every property it is given.
+Compliance Matrices of growing length are written with the same chunk size: the Range and
+Value calls must be one per chunk of rows and the WrapText calls one per wrapped column,
+whatever the number of rows, and the values written must be the rows of the matrix.  Updating
+a matrix with requirements inserted must wrap the text of every data row of the wrapped
+columns, the inserted rows included.  Exits with 1 when a check fails.
+
+usage: python -m benchmarks.excelwriter [--sizes N [N ...]] [--chunk-size N]
+'''
+import sys
+import argparse
+from specops.util import Configuration
+from specops.automation import AutomationPool
+from specops.io.com import ComplianceMatrixWriter
+from specops.io.writer import COMPLIANCE_MATRIX_COLUMNS, columnLetter
+
+class FakeRange:
+    '''
+    @summary: Range, Cells cell or Columns column of the fake sheet, recording the properties set
+    '''
+
+    def __init__(self, sheet, kind, address):
+        object.__setattr__(self, '_sheet', sheet)
+        object.__setattr__(self, '_kind', kind)
+        object.__setattr__(self, '_address', address)
+
+    def __setattr__(self, name, value):
+        self._sheet.calls[self._kind+'.'+name]=self._sheet.calls.get(self._kind+'.'+name, 0)+1
+        if self._kind == 'Range' and name == 'Value':
+            self._sheet.values.extend(value)
+        if self._kind == 'Range' and name == 'WrapText':
+            self._sheet.wrapped.append(self._address)
+
+    def Delete(self):
+        self._sheet.calls[self._kind+'.Delete']=self._sheet.calls.get(self._kind+'.Delete', 0)+1
+
+    def Insert(self):
+        self._sheet.calls[self._kind+'.Insert']=self._sheet.calls.get(self._kind+'.Insert', 0)+1
+
+class FakeUsedRange:
+    def __init__(self, value):
+        self.Value=value
+
+class FakeSheet:
+    '''
+    @summary: active sheet of the fake workbook, counting the calls made into it
+    '''
+
+    def __init__(self, used=None):
+        self.calls=dict()
+        self.values=list()
+        self.wrapped=list()
+        self.UsedRange=FakeUsedRange(used)
+
+    def _call(self, kind, address):
+        self.calls[kind]=self.calls.get(kind, 0)+1
+        return FakeRange(self, kind, address)
+
+    def Range(self, address):
+        return self._call('Range', address)
+
+    def Cells(self, row, column):
+        return self._call('Cells', (row, column))
+
+    def Columns(self, address):
+        return self._call('Columns', address)
+
+    def Rows(self, address):
+        return self._call('Rows', address)
+
+class FakeWorkbook:
+    def __init__(self, used=None):
+        self.ActiveSheet=FakeSheet(used)
+
+    def Worksheets(self, index):
+        return self.ActiveSheet
+
+    def SaveAs(self, outputFile):
+        pass
+
+    def Save(self):
+        pass
+
+    def Close(self, saveChanges=None):
+        pass
+
+class FakeWorkbooks:
+    def __init__(self, application):
+        self._application=application
+
+    def Add(self, *arguments):
+        self._application.workbook=FakeWorkbook()
+        return self._application.workbook
+
+    def Open(self, inputFile):
+        self._application.workbook=FakeWorkbook(self._application.used)
+        return self._application.workbook
+
+class FakeExcel:
+    def __init__(self, used=None):
+        self.workbook=None
+        # values of the used range of the workbooks opened
+        self.used=used
+        self.Workbooks=FakeWorkbooks(self)
+
+    def Quit(self, *arguments):
+        pass
+
+def write(rows, settings):
+    '''
+    @return: the calls made into the sheet by writing the rows, and the values written
+    @rtype: tuple<dict,list>
+    '''
+    excel=FakeExcel()
+    pool=AutomationPool(lambda progId: excel)
+    writer=ComplianceMatrixWriter('matrix.xlsx', settings=settings, pool=pool)
+    writer.open()
+    for index in range(rows):
+        writer.write('The system shall log requirement %d.' % index, None, 'id%d' % index)
+    writer.close()
+    pool.close()
+    return excel.workbook.ActiveSheet.calls, excel.workbook.ActiveSheet.values
+
+def update(rows, inserted, settings):
+    '''
+    @return: the ranges wrapped by updating a matrix of the rows with requirements inserted at
+             its top, in its middle and at its end, and the number of rows of the updated matrix
+    @rtype: tuple<list<String>,Int>
+    '''
+    header=tuple(header for header, width, wrapText in COMPLIANCE_MATRIX_COLUMNS)
+    existing=[('id%d' % index, 'The system shall log requirement %d.' % index, 'shall', 'Yes', 'reviewed') for index in range(rows)]
+    excel=FakeExcel((header,)+tuple(existing))
+    requirements=[(requirementId, requirement, None) for requirementId, requirement, keyword, meets, comment in existing]
+    for position in (rows, rows//2, 0):
+        for index in range(inserted):
+            requirements.insert(position, ('new%d.%d' % (position, index), 'The system shall report change %d at %d.' % (index, position), None))
+    pool=AutomationPool(lambda progId: excel)
+    ComplianceMatrixWriter('matrix.xlsx', settings=settings, pool=pool).update(requirements)
+    pool.close()
+    return excel.workbook.ActiveSheet.wrapped, len(requirements)
+
+def main():
+    parser=argparse.ArgumentParser(description='Calls into Excel of the chunked Compliance Matrix writes')
+    parser.add_argument('--sizes', help='number of rows of each Compliance Matrix', type=int, nargs='+', default=[10, 999, 10000])
+    parser.add_argument('--chunk-size', help='rows written by every Range call (complianceMatrixChunkSize)', type=int, default=1000)
+    args=parser.parse_args()
+
+    Configuration.INSTANCE.setProperty('DEBUG', 'False')
+    Configuration.INSTANCE.setProperty('complianceMatrixChunkSize', str(args.chunk_size))
+    settings=Configuration.INSTANCE.getSettings()
+    wrapped=len([column for column in COMPLIANCE_MATRIX_COLUMNS if column[2]])
+    errors=list()
+
+    for size in args.sizes:
+        calls, values=write(size, settings)
+        chunks=-(-size//args.chunk_size)
+        ranges=calls.get('Range', 0)
+        print('%8d rows  %4d chunks  Range %4d  Value %4d  WrapText %2d  Cells %2d  Columns %2d' %
+              (size, chunks, ranges, calls.get('Range.Value', 0), calls.get('Range.WrapText', 0),
+               calls.get('Cells', 0), calls.get('Columns', 0)))
+        if ranges != chunks+wrapped or calls.get('Range.Value', 0) != chunks or calls.get('Range.WrapText', 0) != wrapped:
+            errors.append('%d rows made %d Range, %d Value and %d WrapText calls, expected %d, %d and %d' %
+                          (size, ranges, calls.get('Range.Value', 0), calls.get('Range.WrapText', 0), chunks+wrapped, chunks, wrapped))
+        if calls.get('Cells', 0) != len(COMPLIANCE_MATRIX_COLUMNS) or calls.get('Columns', 0) != len(COMPLIANCE_MATRIX_COLUMNS):
+            errors.append('%d rows made %d Cells and %d Columns calls, expected one per column for the header' %
+                          (size, calls.get('Cells', 0), calls.get('Columns', 0)))
+        if [row[0] for row in values] != ['id%d' % index for index in range(size)] or \
+           any(row[1] != 'The system shall log requirement %d.' % index for index, row in enumerate(values)):
+            errors.append('the values written for %d rows are not the rows of the matrix' % size)
+
+    wrappedRanges, rows=update(100, 3, settings)
+    expected=[columnLetter(column)+'2:'+columnLetter(column)+str(rows+1)
+              for column, (header, width, wrapText) in enumerate(COMPLIANCE_MATRIX_COLUMNS, 1) if wrapText]
+    print('update inserting 9 rows wraps %s' % ', '.join(wrappedRanges))
+    if wrappedRanges != expected:
+        errors.append('updating with inserted rows wrapped %s, expected %s' % (wrappedRanges, expected))
+
+    for error in errors:
+        print('FAILED: '+error)
+    if len(errors) != 0:
+        sys.exit(1)
+    print('one Range call per chunk of rows, calls independent of the rows in a chunk')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+'''
+Converts generated specifications with the paragraphs tokenized and classified on one process
+and on pools of processes, checks that every Compliance Matrix is byte-identical to the one of
+the single process, and reports the time of each conversion.  The requirements extracted with
+chunks of different sizes are compared too, down to one paragraph per chunk, so the results
+are proven to come back in document order across chunk boundaries.  Exits with 1 when any
+output differs.
+
+usage: python -m benchmarks.extract [--sizes N [N ...]] [--processes N [N ...]]
+                                    [--chunk-characters N [N ...]] [generator options]
+'''
+import os
+import sys
+import time
+import shutil
+import filecmp
+import argparse
+import tempfile
+import specops.io
+from specops.util import Configuration
+from specops.segmenter import SentenceSegmenter
+from specops.classifier import RequirementClassifier, parseKeywords
+from specops.pipeline import RequirementExtractor, ParallelRequirementExtractor
+from specops.io.ooxml import DocxFileReader
+from benchmarks.generator import addArguments, fromArguments
+from CreateComplianceMatrix import CreateComplianceMatrix
+
+def convert(inputFile, outputFile, processes):
+    '''
+    @param processes: number of extraction processes, 1 for the serial extractor
+    @type processes: Int
+    @return: seconds spent converting the Word Document to a tsv Compliance Matrix, cache off
+    @rtype: Float
+    '''
+    Configuration.INSTANCE.setProperty('extractProcesses', str(processes))
+    settings=Configuration.INSTANCE.getSettings()
+    start=time.perf_counter()
+    if CreateComplianceMatrix(inputFile, outputFile, specops.io.OOXML_BACKEND, False, False, settings).generateComplianceMatrix() == False:
+        raise Exception('conversion of '+inputFile+' failed')
+    return time.perf_counter()-start
+
+def requirements(extractor, inputFile):
+    '''
+    @return: every requirement the extractor finds in the Word Document, as comparable tuples
+    @rtype: list<tuple>
+    '''
+    reader=DocxFileReader(inputFile)
+    reader.open()
+    try:
+        return [(requirement.paragraphIndex, requirement.start, requirement.end, requirement.keyword,
+                 requirement.section, requirement.source, requirement.getText())
+                for requirement in extractor.extract(reader.readSections())]
+    finally:
+        reader.close()
+
+def main():
+    parser=argparse.ArgumentParser(description='Serial against parallel extraction of the requirements of a single document')
+    parser.add_argument('--sizes', help='number of paragraphs of each generated document', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--processes', help='numbers of extraction processes compared with one', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--chunk-characters', help='chunk sizes whose requirements are compared with the serial extractor', type=int, nargs='+', default=[1, 4096, 256*1024])
+    addArguments(parser)
+    args=parser.parse_args()
+
+    Configuration.INSTANCE.setProperty('DEBUG', 'False')
+    settings=Configuration.INSTANCE.getSettings()
+    segmenter=SentenceSegmenter(settings.sentenceAbbreviations)
+    classifier=RequirementClassifier(parseKeywords(settings.requirementKeywords))
+    identical=True
+
+    directory=tempfile.mkdtemp(prefix='specops-benchmark-')
+    try:
+        for size in args.sizes:
+            inputFile=os.path.join(directory, 'specification%d.docx' % size)
+            fromArguments(args, size).write(inputFile)
+
+            serialFile=os.path.join(directory, 'serial%d' % size)
+            Configuration.INSTANCE.setProperty('complianceMatrixFormat', specops.io.TSV_FORMAT)
+            seconds=convert(inputFile, serialFile, 1)
+            print('%10d paragraphs  1 process   %8.2f s' % (size, seconds))
+            for processes in args.processes:
+                parallelFile=os.path.join(directory, 'parallel%d-%d' % (size, processes))
+                parallelSeconds=convert(inputFile, parallelFile, processes)
+                same=filecmp.cmp(serialFile+'.tsv', parallelFile+'.tsv', shallow=False)
+                identical=identical and same
+                print('%10d paragraphs %2d processes %8.2f s  x%.2f  %s' % (size, processes, parallelSeconds, seconds/parallelSeconds,
+                                                                          'identical' if same else 'DIFFERENT'))
+
+            expected=requirements(RequirementExtractor(segmenter, classifier), inputFile)
+            for chunkCharacters in args.chunk_characters:
+                extractor=ParallelRequirementExtractor(segmenter, classifier, max(args.processes), chunkCharacters=chunkCharacters)
+                same=requirements(extractor, inputFile) == expected
+                identical=identical and same
+                print('%10d paragraphs  chunks of %d characters: %d requirements %s' % (size, chunkCharacters, len(expected),
+                                                                                       'identical' if same else 'DIFFERENT'))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if identical == False:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+'''
+Writes synthetic System Specification Word Documents (*.docx) for the benchmarks.  The
+document is streamed into the package, so specifications of a million paragraphs are
+generated without holding them in memory.  The same parameters and seed always produce the
+same document.
+
+usage: python -m benchmarks.generator <output.docx> [--paragraphs N] [--sentence-words N]
+                                      [--abbreviations RATIO] [--tables RATIO]
+                                      [--requirements RATIO] [--seed N]
+'''
+import argparse
+import random
+import zipfile
+from xml.sax.saxutils import escape
+import specops.io
+
+_WORDS=('the', 'system', 'provide', 'a', 'status', 'report', 'within', 'seconds', 'of', 'receipt',
+        'operator', 'display', 'interface', 'data', 'message', 'sensor', 'controller', 'power',
+        'mode', 'each', 'all', 'valid', 'command', 'response', 'time', 'error', 'log', 'user')
+_NUMBERS=('3.5', '10', '0.25', '3.2.1', '42', '100')
+_ABBREVIATIONS=('i.e.', 'e.g.', 'etc.', 'vs.', 'cf.', 'approx.')
+_KEYWORDS=('shall', 'shall not', 'must', 'should', 'will', 'must not')
+# paragraphs between two headings
+_SECTION_LENGTH=25
+
+_CONTENT_TYPES=('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                '<Default Extension="xml" ContentType="application/xml"/>'
+                '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+                '</Types>')
+_RELATIONSHIPS=('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+                '</Relationships>')
+
+class SpecificationGenerator:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Generates the paragraphs of a synthetic specification and writes them to a
+              Word Document
+    '''
+
+    # number of paragraphs of the document, headings and table cells included
+    _paragraphs=1000
+    # average number of words in a sentence
+    _sentenceWords=18
+    # fraction of the sentences containing an abbreviation (i.e., e.g., ...)
+    _abbreviations=0.1
+    # fraction of the paragraphs written in table cells
+    _tables=0.1
+    # fraction of the sentences containing a requirement keyword
+    _requirements=0.3
+    # seed of the random number generator
+    _seed=0
+
+    def __init__(self, paragraphs=1000, sentenceWords=18, abbreviations=0.1, tables=0.1, requirements=0.3, seed=0):
+        '''
+        @param paragraphs: number of paragraphs of the document
+        @type paragraphs: Int
+        @param sentenceWords: average number of words in a sentence
+        @type sentenceWords: Int
+        @param abbreviations: fraction of the sentences containing an abbreviation
+        @type abbreviations: Float
+        @param tables: fraction of the paragraphs written in table cells
+        @type tables: Float
+        @param requirements: fraction of the sentences containing a requirement keyword
+        @type requirements: Float
+        @param seed: seed of the random number generator
+        @type seed: Int
+        __init__: constructor
+        '''
+        self._paragraphs=paragraphs
+        self._sentenceWords=max(2, sentenceWords)
+        self._abbreviations=abbreviations
+        self._tables=tables
+        self._requirements=requirements
+        self._seed=seed
+
+    def sentence(self, generator):
+        '''
+        @param generator: random number generator
+        @type generator: random.Random
+        @return: a single sentence ending in a period
+        @rtype: String
+        '''
+        count=generator.randint(max(2, self._sentenceWords//2), self._sentenceWords+self._sentenceWords//2)
+        words=[generator.choice(_NUMBERS) if generator.random() < 0.05 else generator.choice(_WORDS) for index in range(count)]
+        if generator.random() < self._requirements:
+            words.insert(min(2, len(words)), generator.choice(_KEYWORDS))
+        if generator.random() < self._abbreviations:
+            words.insert(generator.randint(1, len(words)), generator.choice(_ABBREVIATIONS))
+        text=' '.join(words)
+        return text[0].upper()+text[1:]+'.'
+
+    def paragraphs(self):
+        '''
+        @return: (kind, text) of every paragraph of the document.  kind is 'heading',
+                 'paragraph' or 'cell'
+        @rtype: generator<tuple<String,String>>
+        '''
+        generator=random.Random(self._seed)
+        section=0
+        for index in range(self._paragraphs):
+            if index % _SECTION_LENGTH == 0:
+                section=section+1
+                yield 'heading', str(section)+' '+' '.join(generator.choice(_WORDS) for word in range(3)).title()
+                continue
+            text=' '.join(self.sentence(generator) for sentence in range(generator.randint(1, 4)))
+            yield 'cell' if generator.random() < self._tables else 'paragraph', text
+
+    def write(self, outputFile):
+        '''
+        @param outputFile: Word Document to write
+        @type outputFile: String
+        @return: number of paragraphs written
+        @rtype: Int
+        '''
+        count=0
+        with zipfile.ZipFile(outputFile, specops.io.WRITE_ONLY, zipfile.ZIP_DEFLATED) as package:
+            package.writestr('[Content_Types].xml', _CONTENT_TYPES)
+            package.writestr('_rels/.rels', _RELATIONSHIPS)
+            with package.open(specops.io.DOCX_DOCUMENT_PART, specops.io.WRITE_ONLY, force_zip64=True) as document:
+                document.write(('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                                '<w:document xmlns:w="'+specops.io.WORDPROCESSINGML_NAMESPACE+'"><w:body>').encode('utf-8'))
+                fragments=list()
+                for kind, text in self.paragraphs():
+                    paragraph='<w:r><w:t xml:space="preserve">'+escape(text)+'</w:t></w:r></w:p>'
+                    if kind == 'heading':
+                        fragments.append('<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr>'+paragraph)
+                    elif kind == 'cell':
+                        fragments.append('<w:tbl><w:tr><w:tc><w:p>'+paragraph+'</w:tc></w:tr></w:tbl>')
+                    else:
+                        fragments.append('<w:p>'+paragraph)
+                    count=count+1
+                    if len(fragments) == 1000:
+                        document.write(''.join(fragments).encode('utf-8'))
+                        fragments=list()
+                document.write((''.join(fragments)+'<w:sectPr/></w:body></w:document>').encode('utf-8'))
+        return count
+
+    def toString(self):
+        return ('SpecificationGenerator(paragraphs='+str(self._paragraphs)+',sentenceWords='+str(self._sentenceWords)+
+                ',abbreviations='+str(self._abbreviations)+',tables='+str(self._tables)+
+                ',requirements='+str(self._requirements)+',seed='+str(self._seed)+')')
+
+def addArguments(parser):
+    '''
+    @param parser: argument parser to add the generator options to
+    @type parser: argparse.ArgumentParser
+    '''
+    parser.add_argument('--sentence-words', help='average number of words in a sentence', type=int, default=18)
+    parser.add_argument('--abbreviations', help='fraction of the sentences containing an abbreviation', type=float, default=0.1)
+    parser.add_argument('--tables', help='fraction of the paragraphs written in table cells', type=float, default=0.1)
+    parser.add_argument('--requirements', help='fraction of the sentences containing a requirement keyword', type=float, default=0.3)
+    parser.add_argument('--seed', help='seed of the random number generator', type=int, default=0)
+
+def fromArguments(args, paragraphs):
+    '''
+    @return: generator configured from the options added by addArguments
+    @rtype: SpecificationGenerator
+    '''
+    return SpecificationGenerator(paragraphs, args.sentence_words, args.abbreviations, args.tables, args.requirements, args.seed)
+
+def main():
+    parser=argparse.ArgumentParser(description='Write a synthetic System Specification Word Document')
+    parser.add_argument('output', help='Word Document to write')
+    parser.add_argument('--paragraphs', help='number of paragraphs', type=int, default=1000)
+    addArguments(parser)
+    args=parser.parse_args()
+
+    count=fromArguments(args, args.paragraphs).write(args.output)
+    print('wrote %d paragraphs to %s' % (count, args.output))
+
+if __name__ == '__main__':
+    main()
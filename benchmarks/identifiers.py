@@ -0,0 +1,148 @@
+'''
+Checks that requirement IDs are stable across revisions of a document.  Distinct generated
+requirement sentences must never share a key: two of them colliding would number one of them
+by its position in the document.  The collisions 4 byte keys would have had are reported for
+comparison.  A revision with sentences inserted and deleted must leave the IDs of every other
+sentence unchanged.  An existing matrix written with the old 8 hex digit IDs must have every
+row matched, and its reviewer column kept, when it is updated, and so must a matrix whose
+requirements were numbered by row.  Requirements edited by the revision, next to others
+deleted and inserted, must keep their review, with the type of its cells, and be counted as
+changed.  Exits with 1 when a check fails.
+
+usage: python -m benchmarks.identifiers [--requirements N] [--edits RATIO] [--seed N]
+'''
+import sys
+import random
+import hashlib
+import argparse
+from specops.requirement import RequirementIdentifier, normalizeRequirement, OCCURRENCE_SEPARATOR
+from specops.update import MatrixUpdate, ID_HEADER, REQUIREMENT_HEADER, KEYWORD_HEADER
+from benchmarks.generator import SpecificationGenerator
+
+def sentences(count, seed):
+    '''
+    @return: distinct requirement sentences (distinct once normalized)
+    @rtype: list<String>
+    '''
+    generator=random.Random(seed)
+    specification=SpecificationGenerator(requirements=1.0, seed=seed)
+    seen=set()
+    result=list()
+    while len(result) < count:
+        sentence=specification.sentence(generator)
+        if normalizeRequirement(sentence) not in seen:
+            seen.add(normalizeRequirement(sentence))
+            result.append(sentence)
+    return result
+
+def collisions(texts, digestSize):
+    '''
+    @return: number of distinct normalized texts whose key of digestSize bytes an earlier text has
+    @rtype: Int
+    '''
+    keys=set()
+    count=0
+    for text in texts:
+        key=hashlib.blake2b(normalizeRequirement(text).encode('utf-8'), digest_size=digestSize).digest()
+        if key in keys:
+            count=count+1
+        keys.add(key)
+    return count
+
+def legacyIds(texts):
+    '''
+    @return: the IDs the converter wrote before the keys were widened: 4 byte hash and occurrence number
+    @rtype: list<String>
+    '''
+    occurrences=dict()
+    ids=list()
+    for text in texts:
+        key=hashlib.blake2b(normalizeRequirement(text).encode('utf-8'), digest_size=4).hexdigest()
+        occurrences[key]=occurrences.get(key, 0)+1
+        ids.append(key if occurrences[key] == 1 else key+OCCURRENCE_SEPARATOR+str(occurrences[key]))
+    return ids
+
+def main():
+    parser=argparse.ArgumentParser(description='Collisions and stability of the requirement IDs')
+    parser.add_argument('--requirements', help='number of distinct requirement sentences', type=int, default=200000)
+    parser.add_argument('--edits', help='fraction of the sentences deleted, and of new ones inserted, by the revision', type=float, default=0.01)
+    parser.add_argument('--seed', help='seed of the sentences and of the revision', type=int, default=0)
+    args=parser.parse_args()
+    errors=list()
+
+    texts=sentences(args.requirements, args.seed)
+    identifier=RequirementIdentifier()
+    ids=[identifier.nextId(text) for text in texts]
+    repeated=len([requirementId for requirementId in ids if OCCURRENCE_SEPARATOR in requirementId])
+    print('%d distinct requirements: %d keys collide (4 byte keys: %d, expected %.1f)' %
+          (len(texts), repeated, collisions(texts, 4), len(texts)*(len(texts)-1)/2/2**32))
+    if repeated != 0 or len(set(ids)) != len(ids):
+        errors.append('%d distinct requirements share their key with another one' % repeated)
+
+    # revision: some sentences deleted, new ones inserted anywhere
+    generator=random.Random(args.seed+1)
+    edits=max(1, int(len(texts)*args.edits))
+    revision=[(text, requirementId) for text, requirementId in zip(texts, ids)]
+    for index in sorted(generator.sample(range(len(revision)), edits), reverse=True):
+        del revision[index]
+    for text in sentences(len(texts)+edits, args.seed)[len(texts):]:
+        revision.insert(generator.randint(0, len(revision)), (text, None))
+    identifier.reset()
+    moved=[text for text, requirementId in revision if requirementId != None and identifier.nextId(text) != requirementId]
+    print('revision with %d deleted and %d inserted: %d IDs changed' % (edits, edits, len(moved)))
+    if len(moved) != 0:
+        errors.append('%d requirements changed ID in the revision' % len(moved))
+
+    # matrix written with the 8 hex digit IDs, updated with the new ones
+    header=[ID_HEADER, REQUIREMENT_HEADER, KEYWORD_HEADER, 'Comment']
+    rows=[[requirementId, text, 'shall', 'reviewed '+str(index)] for index, (requirementId, text) in enumerate(zip(legacyIds(texts), texts))]
+    update=MatrixUpdate(header, rows, [(requirementId, text, 'shall') for requirementId, text in zip(ids, texts)])
+    added, removed, changed, unchanged=update.getCounts()
+    kept=len([row for index, row in enumerate(update.mergedRows(header)) if row[3] == 'reviewed '+str(index)])
+    print('matrix with 8 hex digit IDs: %d added, %d removed, %d rewritten, %d reviews kept' % (added, removed, changed, kept))
+    if added != 0 or removed != 0 or kept != len(texts):
+        errors.append('updating a matrix with 8 hex digit IDs lost %d reviews' % (len(texts)-kept))
+
+    # matrix written when the requirements were numbered by row, as Excel reads the numbers back
+    rows=[[float(index+1), text, 'shall', 'reviewed '+str(index)] for index, text in enumerate(texts)]
+    update=MatrixUpdate(header, rows, [(requirementId, text, 'shall') for requirementId, text in zip(ids, texts)])
+    added, removed, changed, unchanged=update.getCounts()
+    kept=len([row for index, row in enumerate(update.mergedRows(header)) if row[3] == 'reviewed '+str(index)])
+    print('matrix with row numbers:     %d added, %d removed, %d rewritten, %d reviews kept' % (added, removed, changed, kept))
+    if added != 0 or removed != 0 or kept != len(texts):
+        errors.append('updating a matrix with row numbers lost %d reviews' % (len(texts)-kept))
+    try:
+        MatrixUpdate([ID_HEADER, 'Comment'], [[1, 'reviewed']], [(ids[0], texts[0], 'shall')])
+        errors.append('a matrix with row numbers and no requirement column was updated')
+    except ValueError:
+        pass
+
+    # revision editing some requirements, next to requirements deleted and inserted
+    header=[ID_HEADER, REQUIREMENT_HEADER, KEYWORD_HEADER, 'Comment', 'Score']
+    rows=[[requirementId, text, 'shall', 'reviewed '+str(index), index] for index, (requirementId, text) in enumerate(zip(ids, texts))]
+    revision=[(text, 'reviewed '+str(index), index) for index, text in enumerate(texts)]
+    edited=generator.sample(range(len(revision)), edits)
+    for index in edited:
+        revision[index]=(revision[index][0].rstrip('.')+' at all times.',)+revision[index][1:]
+    for index in sorted(generator.sample(range(len(revision)), edits), reverse=True):
+        if index not in edited:
+            del revision[index]
+    for text in sentences(len(texts)+edits, args.seed+2)[len(texts):]:
+        revision.insert(generator.randint(0, len(revision)), (text, None, None))
+    identifier.reset()
+    update=MatrixUpdate(header, rows, [(identifier.nextId(text), text, 'shall') for text, comment, score in revision])
+    added, removed, changed, unchanged=update.getCounts()
+    merged=list(update.mergedRows(header))
+    lost=[comment for (text, comment, score), row in zip(revision, merged) if row[3] != comment or row[4] != score or type(row[4]) != type(score)]
+    print('revision with %d edited: %d added, %d removed, %d changed, %d reviews lost' % (len(edited), added, removed, changed, len(lost)))
+    if len(lost) != 0 or changed != len(edited):
+        errors.append('%d reviews lost and %d requirements counted as changed of the %d edited' % (len(lost), changed, len(edited)))
+
+    for error in errors:
+        print('FAILED: '+error)
+    if len(errors) != 0:
+        sys.exit(1)
+    print('no key shared, every unchanged requirement kept its ID, every edited one its review')
+
+if __name__ == '__main__':
+    main()
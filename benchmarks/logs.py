@@ -0,0 +1,128 @@
+'''
+Checks the logging of the converter.  Records below the level must be dropped without their
+arguments being formatted.  The records logged go through the queue: with a log file slowed down
+to several milliseconds a record, the time the logging thread spends per record must stay far
+below the time of a write, and every record must be in the file once the listener is stopped,
+as it is when the process exits.  The JSON records must parse and carry the extra= fields.
+Exits with 1 when a check fails.
+
+usage: python -m benchmarks.logs [--records N] [--write-delay MILLISECONDS]
+'''
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import specops.log
+from specops.util import Configuration
+
+class Counted:
+    '''
+    @summary: log argument counting the times it is formatted
+    '''
+
+    def __init__(self):
+        self.formatted=0
+
+    def __str__(self):
+        self.formatted=self.formatted+1
+        return 'counted'
+
+def configure(logFile, logFormat, debug):
+    '''
+    @return: the logger of the converter, set up for the log file
+    @rtype: Logger
+    '''
+    Configuration.INSTANCE.setProperty('DEBUG', str(debug))
+    Configuration.INSTANCE.setProperty('debugLevel', '0')
+    Configuration.INSTANCE.setProperty('logFile', logFile)
+    Configuration.INSTANCE.setProperty('logFormat', logFormat)
+    Configuration.INSTANCE.getSettings()
+    return logging.getLogger('specops.benchmark')
+
+def slowDown(delay):
+    '''
+    @summary: makes every write of the handlers of the listener take the delay, like a slow or
+              remote disk
+    '''
+    for handler in specops.log._listener.handlers:
+        emit=handler.emit
+        def slowEmit(record, emit=emit):
+            time.sleep(delay)
+            emit(record)
+        handler.emit=slowEmit
+
+def main():
+    parser=argparse.ArgumentParser(description='Level filtering, queueing and JSON records of the logging')
+    parser.add_argument('--records', help='number of records logged', type=int, default=500)
+    parser.add_argument('--write-delay', help='milliseconds every write of the log file takes', type=float, default=5.0)
+    args=parser.parse_args()
+    errors=list()
+
+    directory=tempfile.mkdtemp(prefix='specops-benchmark-')
+    try:
+        logFile=os.path.join(directory, 'converter.log')
+
+        # DEBUG off: debug records are dropped before their arguments are formatted
+        logger=configure(logFile, specops.log.TEXT_FORMAT, False)
+        argument=Counted()
+        start=time.perf_counter()
+        for index in range(args.records*100):
+            logger.debug('line: %s', argument)
+        dropped=(time.perf_counter()-start)/(args.records*100)
+        print('debug record dropped      %8.3f us' % (dropped*1000000))
+        if argument.formatted != 0:
+            errors.append('dropped records formatted their arguments %d times' % argument.formatted)
+        if os.path.exists(logFile):
+            errors.append('the log file was created without any record written')
+
+        # DEBUG on, slow log file: the thread logging only queues the records
+        logger=configure(logFile, specops.log.TEXT_FORMAT, True)
+        slowDown(args.write_delay/1000)
+        start=time.perf_counter()
+        for index in range(args.records):
+            logger.debug('record %d of %s', index, argument)
+        queued=(time.perf_counter()-start)/args.records
+        print('debug record logged       %8.3f us  (write takes %.1f ms)' % (queued*1000000, args.write_delay))
+        if queued*1000 > args.write_delay/10:
+            errors.append('logging a record took %.3f ms with writes of %.1f ms, the writes are not queued' % (queued*1000, args.write_delay))
+        start=time.perf_counter()
+        specops.log._stopListener()
+        print('listener stopped after    %8.3f s' % (time.perf_counter()-start))
+        with open(logFile, encoding='utf-8') as log:
+            written=[line for line in log if ' record ' in line]
+        if len(written) != args.records:
+            errors.append('%d of the %d records were written to the log file' % (len(written), args.records))
+
+        # JSON records
+        os.remove(logFile)
+        logger=configure(logFile, specops.log.JSON_FORMAT, True)
+        logger.info('Job %s %s', 'job1', 'done', extra={'job': 'job1', 'state': 'done'})
+        try:
+            raise ValueError('broken')
+        except ValueError:
+            logger.exception('conversion failed')
+        specops.log._stopListener()
+        with open(logFile, encoding='utf-8') as log:
+            records=[json.loads(line) for line in log if line.strip()]
+        records=[record for record in records if record['logger'] == 'specops.benchmark']
+        print('json records              %8d' % len(records))
+        if len(records) != 2 or records[0].get('job') != 'job1' or records[0]['message'] != 'Job job1 done':
+            errors.append('JSON records without their message or extra fields: %s' % records)
+        elif 'ValueError: broken' not in records[1].get('exception', ''):
+            errors.append('JSON record of the exception without its traceback: %s' % records[1])
+    finally:
+        specops.log._stopListener()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    for error in errors:
+        print('FAILED: '+error)
+    if len(errors) != 0:
+        sys.exit(1)
+    print('dropped records were not formatted, slow writes did not stall the logging thread')
+
+if __name__ == '__main__':
+    main()
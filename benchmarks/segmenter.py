@@ -0,0 +1,95 @@
+'''
+Throughput of the SentenceSegmenter against the original mask/find/replace tokenizer on
+megabyte sized paragraphs.
+
+usage: python -m benchmarks.segmenter [--size MEGABYTES] [--repeat N]
+'''
+import argparse
+import random
+import time
+from specops.segmenter import SentenceSegmenter
+
+_WORDS=('the', 'system', 'shall', 'provide', 'a', 'status', 'report', 'within', '3.5', 'seconds',
+        'of', 'receipt', 'i.e.', 'e.g.', 'etc.', 'section', '3.2.1', 'operator', 'must', 'display')
+
+def legacyTokenize(sentence, sep):
+    '''
+    @summary: the tokenizer CreateComplianceMatrix used before the SentenceSegmenter, kept
+              here as the baseline
+    '''
+    containsPeriodException=False
+    sentences=list()
+    if sep == '.':
+        if sentence.find('etc.') != -1:
+            sentence=sentence.replace('etc.','etc!@#$!@#$')
+            containsPeriodException=True
+        if sentence.find('i.e.') != -1:
+            sentence=sentence.replace('i.e.','i!@#$!@#$e!@#$!@#$')
+            containsPeriodException=True
+        if sentence.find('e.g.') != -1:
+            sentence=sentence.replace('e.g.','e!@#$!@#$g!@#$!@#$')
+            containsPeriodException=True
+    start=0
+    end=sentence.find(sep)
+    while end != -1:
+        line=sentence[start:end+1]
+        if containsPeriodException == True:
+            line=line.replace('!@#$!@#$','.')
+        sentences.append(line.strip())
+        start=end+1
+        end=sentence.find(sep,start)
+    if len(sentence[start:]) != 0:
+        sentences.append(sentence[start:])
+    return sentences
+
+def generateParagraph(size, seed=0):
+    '''
+    @param size: approximate length of the paragraph in characters
+    @type size: Int
+    @return: a single paragraph of random sentences
+    @rtype: String
+    '''
+    generator=random.Random(seed)
+    sentences=list()
+    length=0
+    while length < size:
+        sentence=' '.join(generator.choice(_WORDS) for index in range(generator.randint(8, 30)))+'. '
+        sentences.append(sentence[0].upper()+sentence[1:])
+        length=length+len(sentence)
+    return ''.join(sentences)
+
+def measure(function, repeat):
+    '''
+    @return: the best wall time of the repeated calls and the result of the last call
+    '''
+    best=None
+    result=None
+    for index in range(repeat):
+        start=time.perf_counter()
+        result=function()
+        elapsed=time.perf_counter()-start
+        if best == None or elapsed < best:
+            best=elapsed
+    return best, result
+
+def main():
+    parser=argparse.ArgumentParser(description='SentenceSegmenter throughput against the legacy tokenizer')
+    parser.add_argument('--size', help='paragraph size in megabytes', type=float, default=1.0)
+    parser.add_argument('--repeat', help='number of timed runs, the best is reported', type=int, default=5)
+    args=parser.parse_args()
+
+    paragraph=generateParagraph(int(args.size*1024*1024))
+    megabytes=len(paragraph)/(1024.0*1024.0)
+    segmenter=SentenceSegmenter()
+
+    legacyTime, legacySentences=measure(lambda: legacyTokenize(paragraph, '.'), args.repeat)
+    spansTime, spanCount=measure(lambda: sum(1 for span in segmenter.spans(paragraph)), args.repeat)
+    splitTime, sentences=measure(lambda: segmenter.split(paragraph), args.repeat)
+
+    print('paragraph: %.2f MB' % megabytes)
+    print('legacy tokenize:   %8.4f s  %8.1f MB/s  %d sentences' % (legacyTime, megabytes/legacyTime, len(legacySentences)))
+    print('segmenter.spans:   %8.4f s  %8.1f MB/s  %d sentences' % (spansTime, megabytes/spansTime, spanCount))
+    print('segmenter.split:   %8.4f s  %8.1f MB/s  %d sentences' % (splitTime, megabytes/splitTime, len(sentences)))
+
+if __name__ == '__main__':
+    main()
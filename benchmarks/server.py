@@ -0,0 +1,239 @@
+'''
+Starts the conversion server on a free local port and submits generated specifications to it,
+uploaded and by path, following every job through its event stream and downloading its
+Compliance Matrix.  Each download must be byte-identical to the Compliance Matrix of the same
+document converted by a fresh converter process, whose time (imports and properties included)
+is reported against the latency of a job on the warm workers.  Malformed submissions must be
+refused with 400, paths outside serverRoots (symbolic links included) with 403, and nothing
+queued.  A job made slower than the server timeout must time out, the process it started must
+be stopped with its worker and the worker must convert the next job.  Exits with 1 when a
+check fails.
+
+usage: python -m benchmarks.server [--paragraphs N] [--jobs N] [--workers N]
+                                   [--timeout SECONDS] [generator options]
+'''
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import multiprocessing
+import subprocess
+import http.client
+import specops.io
+from specops.util import Configuration
+from specops.server import ConversionServer, DONE, TIMEOUT
+from benchmarks.generator import addArguments, fromArguments
+from CreateComplianceMatrix import convertDocument
+
+# submissions the server must refuse with 400 without queueing a job: (path, body, content type)
+_INVALID_SUBMISSIONS=(('/jobs', b'{"path": ', 'application/json'),
+                      ('/jobs', b'\xff\xfe', 'application/json'),
+                      ('/jobs', b'[]', 'application/json'),
+                      ('/jobs', b'"specification.docx"', 'application/json'),
+                      ('/jobs', b'{"path": 42}', 'application/json'),
+                      ('/jobs?name=..', b'PK', 'application/octet-stream'),
+                      ('/jobs?name=.', b'PK', 'application/octet-stream'),
+                      ('/jobs?name=a/b.docx', b'PK', 'application/octet-stream'),
+                      ('/jobs?name=a%00.docx', b'PK', 'application/octet-stream'))
+
+def slowConvert(inputFile, backend=None, useCache=True, update=False, settings=None, collectStats=False):
+    '''
+    @summary: convertDocument, taking an hour for the documents whose name starts with slow.
+              Like a conversion with extractProcesses, the slow one starts a process of its own,
+              whose ID it writes to <document>.pid
+    '''
+    if os.path.basename(inputFile).startswith('slow'):
+        child=multiprocessing.Process(target=time.sleep, args=(3600,))
+        child.start()
+        with open(inputFile+'.pid', 'w') as pid:
+            pid.write(str(child.pid))
+        time.sleep(3600)
+    return convertDocument(inputFile, backend, useCache, update, settings, collectStats)
+
+def isRunning(pid):
+    '''
+    @return: true if the process is running (exited processes not yet reaped are not)
+    @rtype: Boolean
+    '''
+    try:
+        with open('/proc/%d/stat' % pid) as stat:
+            return stat.read().rpartition(')')[2].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+    except OSError:
+        pass
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+def request(port, method, path, body=None, headers=None):
+    '''
+    @return: status and body of the response of the server
+    @rtype: tuple<Int,bytes>
+    '''
+    connection=http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+    try:
+        connection.request(method, path, body, headers or dict())
+        response=connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+def follow(port, jobId):
+    '''
+    @return: the states streamed by the events of the job, up to the finished one
+    @rtype: list<dict>
+    '''
+    connection=http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+    try:
+        connection.request('GET', '/jobs/'+jobId+'/events')
+        response=connection.getresponse()
+        return [json.loads(line) for line in response if line.strip()]
+    finally:
+        connection.close()
+
+def runJob(port, inputFile, upload):
+    '''
+    @return: the events of the job, its Compliance Matrix and the seconds from the submission
+             to the end of the download
+    @rtype: tuple<list,bytes,Float>
+    '''
+    start=time.perf_counter()
+    if upload:
+        with open(inputFile, 'rb') as document:
+            status, body=request(port, 'POST', '/jobs?name='+os.path.basename(inputFile), document.read(),
+                                 {'Content-Type': 'application/octet-stream'})
+    else:
+        status, body=request(port, 'POST', '/jobs', json.dumps({'path': inputFile}), {'Content-Type': 'application/json'})
+    if status != 202:
+        raise Exception('submission refused with %d: %s' % (status, body))
+    jobId=json.loads(body)['id']
+    events=follow(port, jobId)
+    status, matrix=request(port, 'GET', '/jobs/'+jobId+'/matrix')
+    return events, matrix if status == 200 else None, time.perf_counter()-start
+
+def convertCold(inputFile, outputFile):
+    '''
+    @return: seconds taken by a new converter process for the document, cache off
+    @rtype: Float
+    '''
+    start=time.perf_counter()
+    subprocess.run([sys.executable, 'CreateComplianceMatrix.py', '--input_file', inputFile, '--output_file', outputFile,
+                    '--backend', specops.io.OOXML_BACKEND, '--format', specops.io.TSV_FORMAT, '--no-cache',
+                    '--set', 'DEBUG=False'], check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter()-start
+
+async def serve(convert, settings, work):
+    '''
+    @summary: runs work(port) on a thread while the server serves on a free port
+    '''
+    server=ConversionServer(convert, specops.io.OOXML_BACKEND, False, settings)
+    await server.start('127.0.0.1', 0)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, work, server.getAddresses()[0][1])
+    finally:
+        await server.stop()
+
+def main():
+    parser=argparse.ArgumentParser(description='Job latency of the warm conversion server against a fresh converter process')
+    parser.add_argument('--paragraphs', help='number of paragraphs of the generated document', type=int, default=2000)
+    parser.add_argument('--jobs', help='number of jobs submitted', type=int, default=6)
+    parser.add_argument('--workers', help='worker processes of the server (serverJobs)', type=int, default=2)
+    parser.add_argument('--timeout', help='server timeout of the slow job (serverTimeout)', type=float, default=2.0)
+    addArguments(parser)
+    args=parser.parse_args()
+
+    Configuration.INSTANCE.setProperty('DEBUG', 'False')
+    Configuration.INSTANCE.setProperty('complianceMatrixFormat', specops.io.TSV_FORMAT)
+    Configuration.INSTANCE.setProperty('serverJobs', str(args.workers))
+    errors=list()
+
+    directory=tempfile.mkdtemp(prefix='specops-benchmark-')
+    try:
+        Configuration.INSTANCE.setProperty('serverDirectory', os.path.join(directory, 'server'))
+        Configuration.INSTANCE.setProperty('serverTimeout', '600')
+        Configuration.INSTANCE.setProperty('serverRoots', os.path.join(directory, 'documents'))
+        settings=Configuration.INSTANCE.getSettings()
+        os.makedirs(os.path.join(directory, 'documents'))
+        inputFile=os.path.join(directory, 'documents', 'specification.docx')
+        fromArguments(args, args.paragraphs).write(inputFile)
+        # outside serverRoots, directly and through a symbolic link in it
+        outsideFile=os.path.join(directory, 'outside.docx')
+        shutil.copyfile(inputFile, outsideFile)
+        linkFile=os.path.join(directory, 'documents', 'link.docx')
+        os.symlink(outsideFile, linkFile)
+        coldSeconds=convertCold(inputFile, os.path.join(directory, 'cold'))
+        with open(os.path.join(directory, 'cold.tsv'), 'rb') as matrix:
+            expected=matrix.read()
+        print('fresh process       %8.3f s' % coldSeconds)
+
+        def work(port):
+            for path, body, contentType in _INVALID_SUBMISSIONS:
+                status, response=request(port, 'POST', path, body, {'Content-Type': contentType})
+                if status != 400:
+                    errors.append('submission %s %r answered %d, expected 400' % (path, body, status))
+            for path in (outsideFile, linkFile, os.path.join(directory, 'documents', '..', 'outside.docx')):
+                status, response=request(port, 'POST', '/jobs', json.dumps({'path': path}), {'Content-Type': 'application/json'})
+                if status != 403:
+                    errors.append('submission of %s outside serverRoots answered %d, expected 403' % (path, status))
+            status, response=request(port, 'GET', '/jobs')
+            if status != 200 or len(json.loads(response)['jobs']) != 0:
+                errors.append('invalid submissions were queued: %s' % response)
+            latencies=list()
+            for index in range(args.jobs):
+                upload=index%2 == 0
+                events, matrix, seconds=runJob(port, inputFile, upload)
+                latencies.append(seconds)
+                states=[event['state'] for event in events]
+                print('job %2d %-8s      %8.3f s  %s' % (index, 'upload' if upload else 'path', seconds, ' > '.join(states)))
+                if states[-1] != DONE:
+                    errors.append('job %d finished %s: %s' % (index, states[-1], events[-1]['error']))
+                elif matrix != expected:
+                    errors.append('Compliance Matrix of job %d differs from the fresh process' % index)
+            return latencies
+        latencies=asyncio.run(serve(convertDocument, settings, work))
+        warm=sorted(latencies)[len(latencies)//2]
+        print('warm job (median)   %8.3f s  x%.2f' % (warm, coldSeconds/warm))
+
+        Configuration.INSTANCE.setProperty('serverJobs', '1')
+        Configuration.INSTANCE.setProperty('serverTimeout', str(args.timeout))
+        settings=Configuration.INSTANCE.getSettings()
+        slowFile=os.path.join(directory, 'documents', 'slow.docx')
+        shutil.copyfile(inputFile, slowFile)
+
+        def timeout(port):
+            start=time.perf_counter()
+            events, matrix, seconds=runJob(port, slowFile, False)
+            print('slow job            %8.3f s  %s' % (seconds, events[-1]['state']))
+            if events[-1]['state'] != TIMEOUT or seconds > args.timeout+30:
+                errors.append('slow job finished %s after %.1f s, expected %s after %.1f s' % (events[-1]['state'], seconds, TIMEOUT, args.timeout))
+            with open(slowFile+'.pid') as pid:
+                childPid=int(pid.read())
+            deadline=time.monotonic()+10
+            while isRunning(childPid) and time.monotonic() < deadline:
+                time.sleep(0.1)
+            if isRunning(childPid):
+                errors.append('the process started by the slow job is still running')
+                os.kill(childPid, 9)
+            events, matrix, seconds=runJob(port, inputFile, True)
+            print('job after timeout   %8.3f s  %s' % (seconds, events[-1]['state']))
+            if events[-1]['state'] != DONE or matrix != expected:
+                errors.append('job after the timeout was not converted by the replaced worker')
+        asyncio.run(serve(slowConvert, settings, timeout))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    for error in errors:
+        print('FAILED: '+error)
+    if len(errors) != 0:
+        sys.exit(1)
+    print('every job was converted like a fresh process, the slow job timed out and its worker was replaced')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+'''
+Times every stage of a conversion (read, tokenize, classify, write) and the conversion end
+to end on synthetic specifications of growing size, using the ooxml backend so it runs
+without Microsoft Office.  Each stage is run again under tracemalloc to record its peak
+memory.  The results are saved as JSON so runs on different commits can be compared.
+
+usage: python -m benchmarks.stages [--sizes N [N ...]] [--repeat N] [--output results.json]
+                                   [--compare baseline.json] [--no-memory] [generator options]
+'''
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from specops.util import Configuration
+from specops.segmenter import SentenceSegmenter
+from specops.classifier import RequirementClassifier, parseKeywords
+from specops.requirement import RequirementIdentifier
+from specops.io.ooxml import DocxFileReader
+from specops.io.ooxml import XlsxComplianceMatrixWriter
+from benchmarks.generator import addArguments, fromArguments
+from CreateComplianceMatrix import CreateComplianceMatrix
+
+# format of the JSON results, changed when the results can no longer be compared
+RESULTS_VERSION=1
+STAGES=('read', 'tokenize', 'classify', 'write', 'endToEnd')
+
+def _commit():
+    '''
+    @return: the commit the benchmark runs on, or None outside a git work tree
+    '''
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+class StageBenchmark:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Runs the stages of a conversion of a single document one after the other, each
+              stage consuming the output of the previous one, so every stage is timed on its
+              own
+    '''
+
+    # Word Document converted
+    _inputFile=None
+    # Compliance Matrix written
+    _outputFile=None
+    # configuration of the conversion, DEBUG off
+    _settings=None
+
+    def __init__(self, inputFile, outputFile, settings):
+        '''
+        @param inputFile: Word Document to convert
+        @type inputFile: String
+        @param outputFile: Compliance Matrix to write
+        @type outputFile: String
+        @param settings: configuration of the conversion
+        @type settings: Settings
+        __init__: constructor
+        '''
+        self._inputFile=inputFile
+        self._outputFile=outputFile
+        self._settings=settings
+
+    def read(self, ignored=None):
+        '''
+        @return: the paragraphs of the Word Document
+        '''
+        reader=DocxFileReader(self._inputFile)
+        reader.open()
+        paragraphs=list(reader.readlines())
+        reader.close()
+        return paragraphs
+
+    def tokenize(self, paragraphs):
+        '''
+        @return: (paragraph, sentence spans) of every paragraph
+        '''
+        segmenter=SentenceSegmenter(self._settings.sentenceAbbreviations)
+        return [(paragraph, list(segmenter.spans(paragraph))) for paragraph in paragraphs]
+
+    def classify(self, sentences):
+        '''
+        @return: (sentence, classification) of every requirement
+        '''
+        classifier=RequirementClassifier(parseKeywords(self._settings.requirementKeywords))
+        requirements=list()
+        for paragraph, spans in sentences:
+            for start, end in spans:
+                classification=classifier.classify(paragraph, start, end)
+                if classification != None:
+                    requirements.append((paragraph[start:end], classification))
+        return requirements
+
+    def write(self, requirements):
+        '''
+        @summary: writes the requirements to the Compliance Matrix, IDs included
+        '''
+        identifier=RequirementIdentifier()
+        writer=XlsxComplianceMatrixWriter(self._outputFile, self._settings)
+        writer.open()
+        for requirement, classification in requirements:
+            writer.write(requirement, classification, identifier.nextId(requirement))
+        writer.close()
+        return requirements
+
+    def endToEnd(self, ignored=None):
+        '''
+        @summary: converts the Word Document the way the command line does, cache off
+        '''
+        return CreateComplianceMatrix(self._inputFile, self._outputFile, 'ooxml', False, False, self._settings).generateComplianceMatrix()
+
+    def run(self, repeat, memory):
+        '''
+        @param repeat: number of timed runs of each stage, the best is reported
+        @type repeat: Int
+        @param memory: run each stage once more under tracemalloc to record its peak memory
+        @type memory: Boolean
+        @return: seconds and peak bytes of every stage, and the number of paragraphs,
+                 sentences and requirements
+        @rtype: dict
+        '''
+        results=dict()
+        value=None
+        outputs=dict()
+        for stage in STAGES:
+            function=getattr(self, stage)
+            argument=value
+            best=None
+            for index in range(repeat):
+                start=time.perf_counter()
+                result=function(argument)
+                elapsed=time.perf_counter()-start
+                if best == None or elapsed < best:
+                    best=elapsed
+            peak=None
+            if memory:
+                tracemalloc.start()
+                function(argument)
+                peak=tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            results[stage]={'seconds': best, 'peakBytes': peak}
+            outputs[stage]=result
+            if stage != 'write':
+                value=result
+
+        counts={'paragraphs': len(outputs['read']),
+                'sentences': sum(len(spans) for paragraph, spans in outputs['tokenize']),
+                'requirements': len(outputs['classify'])}
+        return {'stages': results, 'counts': counts}
+
+def _compare(results, baseline):
+    '''
+    @summary: prints the time and peak memory of every stage against a previous run
+    '''
+    sys.stdout.write('\nagainst %s (%s)\n' % (baseline.get('commit'), baseline.get('time')))
+    for size, run in results['runs'].items():
+        previous=baseline.get('runs', dict()).get(size)
+        if previous == None:
+            continue
+        for stage in STAGES:
+            now=run['stages'][stage]
+            before=previous['stages'].get(stage)
+            if before == None:
+                continue
+            line='%10s %-9s time x%.2f' % (size, stage, now['seconds']/before['seconds'] if before['seconds'] else 0.0)
+            if now['peakBytes'] != None and before.get('peakBytes'):
+                line=line+'  memory x%.2f' % (float(now['peakBytes'])/before['peakBytes'])
+            sys.stdout.write(line+'\n')
+
+def main():
+    parser=argparse.ArgumentParser(description='Time each stage of a conversion on synthetic specifications')
+    parser.add_argument('--sizes', help='number of paragraphs of each generated document', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', help='number of timed runs of each stage, the best is reported', type=int, default=3)
+    parser.add_argument('--output', help='JSON file the results are saved to', default=None)
+    parser.add_argument('--compare', help='JSON results of a previous run to compare against', default=None)
+    parser.add_argument('--no-memory', help='do not record the peak memory of each stage', dest='memory', action='store_false')
+    addArguments(parser)
+    args=parser.parse_args()
+
+    Configuration.INSTANCE.setProperty('DEBUG', 'False')
+    settings=Configuration.INSTANCE.getSettings()
+    results={'version': RESULTS_VERSION,
+             'commit': _commit(),
+             'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+             'python': platform.python_version(),
+             'platform': platform.platform(),
+             'generator': {'sentenceWords': args.sentence_words, 'abbreviations': args.abbreviations,
+                           'tables': args.tables, 'requirements': args.requirements, 'seed': args.seed},
+             'runs': dict()}
+
+    directory=tempfile.mkdtemp(prefix='specops-benchmark-')
+    try:
+        for size in args.sizes:
+            inputFile=os.path.join(directory, 'specification%d.docx' % size)
+            fromArguments(args, size).write(inputFile)
+            run=StageBenchmark(inputFile, os.path.join(directory, 'complianceMatrix%d.xlsx' % size), settings).run(args.repeat, args.memory)
+            run['documentBytes']=os.path.getsize(inputFile)
+            results['runs'][str(size)]=run
+
+            counts=run['counts']
+            sys.stdout.write('%d paragraphs, %d sentences, %d requirements, %.1f MB\n' %
+                             (counts['paragraphs'], counts['sentences'], counts['requirements'], run['documentBytes']/(1024.0*1024.0)))
+            for stage in STAGES:
+                timing=run['stages'][stage]
+                memory='' if timing['peakBytes'] == None else '  peak %8.1f MB' % (timing['peakBytes']/(1024.0*1024.0))
+                sys.stdout.write('  %-9s %9.3f s%s\n' % (stage, timing['seconds'], memory))
+            os.remove(inputFile)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if args.output != None:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    if args.compare != None:
+        with open(args.compare) as baseline:
+            _compare(results, json.load(baseline))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+'''
+Guards the startup time of the converter.  Fresh interpreters import the converter, and each
+backend once selected, and their median time over an empty interpreter is checked against a
+budget.  The modules loaded are checked too: importing the converter must load no backend, no
+PyWin32 and none of the modules only the batch, watch and server modes need, and selecting a
+backend must load that backend alone.  Exits with 1 when a check fails.
+
+usage: python -m benchmarks.startup [--repeat N] [--budget MILLISECONDS]
+                                    [--backend-budget MILLISECONDS]
+'''
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import time
+
+# modules importing the converter must not load
+_HEAVY_MODULES=('specops.io.com', 'specops.io.ooxml', 'specops.io.text', 'win32com', 'pythoncom', 'asyncio',
+                'concurrent.futures.process', 'zipfile', 'xml.etree.ElementTree', 'xml.sax', 'urllib.request',
+                'specops.server', 'specops.batch', 'specops.watch')
+# backend module of every backend
+_BACKEND_MODULES={'com': 'specops.io.com', 'ooxml': 'specops.io.ooxml', 'text': 'specops.io.text'}
+# code run by every interpreter timed, after the code whose import is measured
+_REPORT='import sys, json; print(json.dumps(sorted(sys.modules)))'
+# selects a backend the way a conversion does: creates its reader and writer
+_SELECT=('import CreateComplianceMatrix, specops.io\n'
+         'from specops.io import backends\n'
+         'from specops.util import Configuration\n'
+         'Configuration.INSTANCE.setProperty("complianceMatrixFormat", "%s")\n'
+         'settings=Configuration.INSTANCE.getSettings()\n'
+         'backends.createWriter("%s", "matrix", settings)\n')
+
+def interpreter(code, repeat):
+    '''
+    @return: median seconds a fresh interpreter takes to run the code, and the modules it loaded
+    @rtype: tuple<Float,list<String>>
+    '''
+    times=list()
+    modules=None
+    for index in range(repeat):
+        start=time.perf_counter()
+        output=subprocess.run([sys.executable, '-c', code+'\n'+_REPORT], check=True, capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+        times.append(time.perf_counter()-start)
+        modules=json.loads(output.strip().splitlines()[-1])
+    return statistics.median(times), modules
+
+def main():
+    parser=argparse.ArgumentParser(description='Startup time and modules loaded by the converter and its backends')
+    parser.add_argument('--repeat', help='interpreters started for every measure', type=int, default=9)
+    parser.add_argument('--budget', help='milliseconds importing the converter may take over an empty interpreter', type=float, default=120.0)
+    parser.add_argument('--backend-budget', help='milliseconds selecting a backend may add to the converter', type=float, default=120.0)
+    args=parser.parse_args()
+    errors=list()
+
+    empty, baseModules=interpreter('', args.repeat)
+    converter, modules=interpreter('import CreateComplianceMatrix', args.repeat)
+    importSeconds=converter-empty
+    print('empty interpreter          %7.1f ms' % (empty*1000))
+    print('import CreateComplianceMatrix %5.1f ms  (budget %.0f ms)' % (importSeconds*1000, args.budget))
+    if importSeconds*1000 > args.budget:
+        errors.append('importing the converter takes %.1f ms, over the budget of %.0f ms' % (importSeconds*1000, args.budget))
+    loaded=[module for module in _HEAVY_MODULES if module in modules and module not in baseModules]
+    if len(loaded) != 0:
+        errors.append('importing the converter loads '+', '.join(loaded))
+
+    for backend, outputFormat in (('ooxml', 'xlsx'), ('com', 'xlsx'), ('ooxml', 'tsv')):
+        selected, modules=interpreter(_SELECT % (outputFormat, backend), args.repeat)
+        expected=_BACKEND_MODULES['text' if outputFormat != 'xlsx' else backend]
+        print('%-5s backend, %-4s format  +%6.1f ms  (budget %.0f ms)' % (backend, outputFormat, (selected-converter)*1000, args.backend_budget))
+        if (selected-converter)*1000 > args.backend_budget:
+            errors.append('selecting the %s backend with the %s format takes %.1f ms' % (backend, outputFormat, (selected-converter)*1000))
+        others=[module for module in _BACKEND_MODULES.values() if module in modules and module != expected]
+        if expected not in modules or len(others) != 0:
+            errors.append('the %s backend with the %s format loaded %s' % (backend, outputFormat,
+                          ', '.join(module for module in _BACKEND_MODULES.values() if module in modules)))
+        if 'win32com' in modules:
+            errors.append('the %s backend loaded PyWin32 before Word or Excel was started' % backend)
+
+    for error in errors:
+        print('FAILED: '+error)
+    if len(errors) != 0:
+        sys.exit(1)
+    print('within budget, every backend loaded only when selected')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+'''
+Watches a directory of generated Word Documents and checks that the watcher converts the
+documents without a Compliance Matrix when it starts, converts a document saved several times
+in a row once, after it stopped changing, and leaves every other document alone.  The CPU time
+of a poll of the directory is measured for thousands of documents.  Exits with 1 when a check
+fails.
+
+usage: python -m benchmarks.watch [--documents N] [--paragraphs N] [--polls N]
+                                  [--debounce SECONDS] [generator options]
+'''
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import specops.io
+from specops.util import Configuration
+from specops.watch import DocumentWatcher
+from benchmarks.generator import addArguments, fromArguments
+from CreateComplianceMatrix import convertDocument
+
+class RecordingConvert:
+    '''
+    @summary: convertDocument, recording the documents converted
+    '''
+
+    def __init__(self):
+        self.converted=list()
+
+    def __call__(self, inputFile, *arguments):
+        self.converted.append(os.path.basename(inputFile))
+        return convertDocument(inputFile, *arguments)
+
+def touch(document, content):
+    '''
+    @summary: rewrites the document the way a save does, with a new modification time
+    '''
+    with open(document, 'wb') as output:
+        output.write(content)
+    status=os.stat(document)
+    os.utime(document, ns=(status.st_atime_ns, status.st_mtime_ns+1000000))
+
+def main():
+    parser=argparse.ArgumentParser(description='Polling cost and debouncing of the watch mode')
+    parser.add_argument('--documents', help='number of documents in the watched directory', type=int, default=5000)
+    parser.add_argument('--paragraphs', help='number of paragraphs of every document', type=int, default=50)
+    parser.add_argument('--polls', help='number of polls timed', type=int, default=20)
+    parser.add_argument('--debounce', help='seconds a document must stay unchanged (watchDebounce)', type=float, default=0.5)
+    addArguments(parser)
+    args=parser.parse_args()
+
+    Configuration.INSTANCE.setProperty('DEBUG', 'False')
+    Configuration.INSTANCE.setProperty('complianceMatrixFormat', specops.io.TSV_FORMAT)
+    settings=Configuration.INSTANCE.getSettings()
+    errors=list()
+
+    directory=tempfile.mkdtemp(prefix='specops-benchmark-')
+    try:
+        template=os.path.join(directory, 'template.docx')
+        fromArguments(args, args.paragraphs).write(template)
+        with open(template, 'rb') as document:
+            content=document.read()
+        os.remove(template)
+        for index in range(args.documents):
+            with open(os.path.join(directory, 'spec%05d.docx' % index), 'wb') as document:
+                document.write(content)
+        # every document but the first two already has an up to date Compliance Matrix
+        for index in range(2, args.documents):
+            open(os.path.join(directory, 'spec%05d.tsv' % index), 'w').close()
+        open(os.path.join(directory, '~$spec00000.docx'), 'w').close()
+
+        convert=RecordingConvert()
+        watcher=DocumentWatcher(convert, (specops.io.OOXML_BACKEND, False, False, settings), [directory],
+                                settings.outputFormat, 0.01, args.debounce)
+        watcher.start()
+        changed, due=watcher.poll()
+        watcher.convertDue(due)
+        if sorted(convert.converted) != ['spec00000.docx', 'spec00001.docx']:
+            errors.append('documents converted at start: %s, expected spec00000.docx and spec00001.docx' % convert.converted)
+
+        cpu=time.process_time()
+        wall=time.perf_counter()
+        for index in range(args.polls):
+            watcher.poll()
+        cpu=(time.process_time()-cpu)/args.polls
+        wall=(time.perf_counter()-wall)/args.polls
+        print('%d documents: %.2f ms CPU, %.2f ms wall per poll (%.2f us CPU per document)' %
+              (args.documents, cpu*1000, wall*1000, cpu*1000000/args.documents))
+
+        # a burst of saves of one document
+        del convert.converted[:]
+        saved=os.path.join(directory, 'spec00042.docx')
+        start=time.monotonic()
+        for index in range(5):
+            touch(saved, content)
+            changed, due=watcher.poll()
+            watcher.convertDue(due)
+            time.sleep(args.debounce/5)
+        while time.monotonic()-start < args.debounce*4:
+            changed, due=watcher.poll()
+            watcher.convertDue(due)
+            time.sleep(args.debounce/10)
+        print('burst of 5 saves: converted %s' % convert.converted)
+        if convert.converted != ['spec00042.docx']:
+            errors.append('burst of saves converted %s, expected spec00042.docx once' % convert.converted)
+        if os.path.getsize(os.path.join(directory, 'spec00042.tsv')) == 0:
+            errors.append('Compliance Matrix of spec00042.docx was not written')
+        if watcher.getCounts() != (3, 0):
+            errors.append('watcher counted %d conversions and %d failures, expected 3 and 0' % watcher.getCounts())
+        if len(watcher.getPending()) != 0:
+            errors.append('documents still pending: %s' % watcher.getPending())
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    for error in errors:
+        print('FAILED: '+error)
+    if len(errors) != 0:
+        sys.exit(1)
+    print('only the changed documents were converted, each save burst once')
+
+if __name__ == '__main__':
+    main()
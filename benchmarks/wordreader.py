@@ -0,0 +1,247 @@
+'''
+Counts the calls the Word reader of the com backend makes into Word, against a fake Word
+document that counts every property read, property write, method call and collection item as
+one COM round trip.  Documents of growing length but with the same headings are read with the
+bulk text fetch and with the paragraph by paragraph reads it replaced.  Both must give the same
+paragraphs and section numbers, and the calls of the bulk fetch must not grow with the length
+of the document.  Exits with 1 when a check fails.
+
+usage: python -m benchmarks.wordreader [--sizes N [N ...]] [--headings N] [--table-every N]
+'''
+import sys
+import time
+import argparse
+import specops.io
+from specops.io.com import WordDocumentFileReader
+from specops.outline import OutlineNumbering
+
+class CallCounter:
+    '''
+    @summary: number of round trips made into the fake Word
+    '''
+
+    def __init__(self):
+        self.calls=0
+
+class Counted:
+    '''
+    @summary: wraps an object of the fake Word so that everything asked of it is counted.  Plain
+              values (strings, numbers) are handed back as they are, like COM does
+    '''
+
+    def __init__(self, target, counter):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_counter', counter)
+
+    def _wrap(self, value):
+        if value == None or isinstance(value, (str, int, float, bool)):
+            return value
+        return Counted(value, self._counter)
+
+    def __getattr__(self, name):
+        self._counter.calls=self._counter.calls+1
+        return self._wrap(getattr(self._target, name))
+
+    def __setattr__(self, name, value):
+        self._counter.calls=self._counter.calls+1
+        setattr(self._target, name, value)
+
+    def __call__(self, *arguments):
+        self._counter.calls=self._counter.calls+1
+        return self._wrap(self._target(*arguments))
+
+    def __iter__(self):
+        for item in self._target:
+            self._counter.calls=self._counter.calls+1
+            yield self._wrap(item)
+
+    def __str__(self):
+        self._counter.calls=self._counter.calls+1
+        return str(self._target)
+
+class FakeListFormat:
+    def __init__(self, listString):
+        self.ListString=listString
+
+class FakeRange:
+    def __init__(self, paragraph):
+        self.Text=paragraph.text
+        self.Start=paragraph.start
+        self.ListFormat=FakeListFormat(paragraph.listString)
+
+class FakeParagraph:
+    def __init__(self, text, start, level, listString):
+        self.text=text
+        self.start=start
+        self.OutlineLevel=level
+        self.listString=listString
+
+    @property
+    def Range(self):
+        return FakeRange(self)
+
+    def __str__(self):
+        return self.text
+
+class FakeParagraphs(list):
+    @property
+    def Count(self):
+        return len(self)
+
+class FakeParagraphFormat:
+    def __init__(self):
+        self.OutlineLevel=None
+
+class FakeFind:
+    '''
+    @summary: finds the runs of consecutive paragraphs of ParagraphFormat.OutlineLevel
+    '''
+
+    def __init__(self, search):
+        self._search=search
+        self.ParagraphFormat=FakeParagraphFormat()
+        self.Text=''
+        self.Format=False
+        self.Forward=True
+        self.Wrap=0
+
+    def ClearFormatting(self):
+        self.ParagraphFormat=FakeParagraphFormat()
+
+    def Execute(self):
+        paragraphs=self._search.document.paragraphs
+        index=self._search.first
+        while index < len(paragraphs) and paragraphs[index].OutlineLevel != self.ParagraphFormat.OutlineLevel:
+            index=index+1
+        if index == len(paragraphs):
+            return False
+        last=index
+        while last+1 < len(paragraphs) and paragraphs[last+1].OutlineLevel == self.ParagraphFormat.OutlineLevel:
+            last=last+1
+        self._search.first=index
+        self._search.last=last
+        return True
+
+class FakeContent:
+    '''
+    @summary: range over the paragraphs first to last of the document
+    '''
+
+    def __init__(self, document, first, last):
+        self.document=document
+        self.first=first
+        self.last=last
+        self.Find=FakeFind(self)
+
+    @property
+    def Text(self):
+        return ''.join(paragraph.text for paragraph in self.document.paragraphs[self.first:self.last+1])
+
+    @property
+    def Paragraphs(self):
+        return FakeParagraphs(self.document.paragraphs[self.first:self.last+1])
+
+    @property
+    def End(self):
+        paragraph=self.document.paragraphs[self.last]
+        return paragraph.start+len(paragraph.text)
+
+    def Collapse(self, direction):
+        self.first=self.last+1
+        self.last=len(self.document.paragraphs)-1
+
+class FakeDocument:
+    def __init__(self, paragraphs):
+        self.paragraphs=paragraphs
+        self.StoryRanges=()
+
+    @property
+    def Content(self):
+        return FakeContent(self, 0, len(self.paragraphs)-1)
+
+def fakeDocument(size, headings, tableEvery):
+    '''
+    @return: document of size paragraphs, headings of them Heading 1 or 2, every tableEvery-th
+             paragraph a table cell (its text ends with the end of cell mark)
+    @rtype: FakeDocument
+    '''
+    paragraphs=list()
+    start=0
+    headingEvery=max(1, size//max(1, headings))
+    for index in range(size):
+        level=10
+        if index%headingEvery == 0 and index//headingEvery < headings:
+            level=1 if (index//headingEvery)%3 == 0 else 2
+            text='Heading %d\r' % index
+        elif tableEvery and index%tableEvery == 0:
+            text='Cell %d shall be read.\r\x07' % index
+        else:
+            text='Paragraph %d shall be read. It has a second sentence.\r' % index
+        paragraphs.append(FakeParagraph(text, start, level, ''))
+        start=start+len(text)
+    return FakeDocument(paragraphs)
+
+class LegacyWordDocumentFileReader(WordDocumentFileReader):
+    '''
+    @summary: the Word reader before the bulk text fetch, kept here as the baseline.  It asks
+              Word for every paragraph and its outline level
+    '''
+
+    def readlines(self):
+        return [str(paragraph) for paragraph in self._document.Content.Paragraphs]
+
+    def readSections(self):
+        rows=list()
+        numbering=OutlineNumbering()
+        section=None
+        for paragraph in self._document.Content.Paragraphs:
+            line=str(paragraph)
+            level=paragraph.OutlineLevel
+            if level < 10:
+                section=numbering.heading(level-1, line, paragraph.Range.ListFormat.ListString)
+            rows.append((section, line, specops.io.BODY_SOURCE))
+        return rows
+
+def read(readerClass, document, method):
+    '''
+    @return: what the method of a reader of the document returns, the number of calls made into
+             Word and the seconds taken
+    '''
+    counter=CallCounter()
+    reader=readerClass('specification.docx')
+    reader._document=Counted(document, counter)
+    start=time.perf_counter()
+    result=getattr(reader, method)()
+    return result, counter.calls, time.perf_counter()-start
+
+def main():
+    parser=argparse.ArgumentParser(description='Calls into Word of the bulk text fetch against paragraph by paragraph reads')
+    parser.add_argument('--sizes', help='number of paragraphs of each fake document', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--headings', help='number of headings of every document', type=int, default=20)
+    parser.add_argument('--table-every', help='every N-th paragraph is a table cell, 0 for none', type=int, default=7)
+    args=parser.parse_args()
+
+    errors=list()
+    bulkCalls=dict()
+    for size in args.sizes:
+        document=fakeDocument(size, args.headings, args.table_every)
+        for method in ('readlines', 'readSections'):
+            expected, legacyCalls, legacySeconds=read(LegacyWordDocumentFileReader, document, method)
+            result, calls, seconds=read(WordDocumentFileReader, document, method)
+            print('%10d paragraphs %-12s  per paragraph %9d calls %7.3f s   bulk %5d calls %7.3f s' %
+                  (size, method, legacyCalls, legacySeconds, calls, seconds))
+            if result != expected:
+                errors.append('%s of %d paragraphs differs from the paragraph by paragraph reads' % (method, size))
+            bulkCalls.setdefault(method, set()).add(calls)
+
+    for method, calls in bulkCalls.items():
+        if len(calls) != 1:
+            errors.append('%s calls grow with the length of the document: %s' % (method, sorted(calls)))
+    for error in errors:
+        print('FAILED: '+error)
+    if len(errors) != 0:
+        sys.exit(1)
+    print('same paragraphs and sections, calls independent of the document length')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+'''
+Time and peak memory of the BufferedFileWriter writing outputs of growing size, against the
+string concatenation buffer it used before.  The time per megabyte stays flat as the output
+grows and the peak memory stays at the high-water mark of the buffer.  The bytes the writer
+counts must be the size of the file, non-ASCII text included.  Exits with 1 when they are not.
+
+usage: python -m benchmarks.writer [--sizes MEGABYTES [MEGABYTES ...]] [--buffer-size BYTES]
+                                   [--line-length N] [--legacy-limit MEGABYTES] [--no-memory]
+'''
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import time
+import tracemalloc
+from specops.util import Configuration
+from specops.io.writer import BufferedFileWriter
+
+class LegacyBufferedFileWriter(BufferedFileWriter):
+    '''
+    @summary: the BufferedFileWriter before the chunked buffer, kept here as the baseline.
+              Every write copies the whole buffer and nothing reaches the file before close
+    '''
+
+    def open(self, outputFile=None):
+        super().open(outputFile)
+        self._buffer=''
+
+    def write(self, theString):
+        self._buffer=self._buffer+theString
+
+    def flush(self):
+        if self.isOpen():
+            self._file.write(self._buffer.encode('utf-8'))
+            self._buffer=''
+
+def writeOutput(writer, outputFile, megabytes, line):
+    '''
+    @param writer: writer to write the output with
+    @type writer: BufferedFileWriter
+    @param megabytes: size of the output
+    @type megabytes: Float
+    @param line: line written over and over
+    @type line: String
+    @return: seconds spent writing and closing the file
+    @rtype: Float
+    '''
+    lines=int(megabytes*1024*1024)//len(line)
+    start=time.perf_counter()
+    writer.open(outputFile)
+    for index in range(lines):
+        writer.write(line)
+    writer.close()
+    return time.perf_counter()-start
+
+def measure(writer, outputFile, megabytes, line, memory):
+    '''
+    @return: seconds and peak bytes (None when memory is not recorded) of writing the output
+    '''
+    if memory:
+        tracemalloc.start()
+    seconds=writeOutput(writer, outputFile, megabytes, line)
+    peak=None
+    if memory:
+        peak=tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    os.remove(outputFile)
+    return seconds, peak
+
+def _report(name, megabytes, seconds, peak):
+    memory='' if peak == None else '  peak %8.1f MB' % (peak/(1024.0*1024.0))
+    print('%-8s %8.0f MB %9.3f s %8.4f s/MB%s' % (name, megabytes, seconds, seconds/megabytes, memory))
+
+def main():
+    parser=argparse.ArgumentParser(description='BufferedFileWriter scaling against the string concatenation buffer')
+    parser.add_argument('--sizes', help='output sizes in megabytes', type=float, nargs='+', default=[16, 64, 256, 1024])
+    parser.add_argument('--buffer-size', help='high-water mark of the buffer in bytes (default: fileWriterBufferSize)', type=int, default=None)
+    parser.add_argument('--line-length', help='length of each string written', type=int, default=120)
+    parser.add_argument('--legacy-limit', help='largest output written with the concatenation buffer, which is quadratic', type=float, default=4)
+    parser.add_argument('--no-memory', help='do not record the peak memory', dest='memory', action='store_false')
+    args=parser.parse_args()
+
+    Configuration.INSTANCE.setProperty('DEBUG', 'False')
+    settings=Configuration.INSTANCE.getSettings()
+    line=('The system shall write this requirement to the Compliance Matrix. '*(args.line_length//66+1))[:args.line_length-1]+'\n'
+
+    directory=tempfile.mkdtemp(prefix='specops-benchmark-')
+    try:
+        outputFile=os.path.join(directory, 'output.txt')
+        writer=BufferedFileWriter(settings=settings, bufferSize=1000)
+        writeOutput(writer, outputFile, 1, 'Le système doit journaliser l\'exigence « 3.2 ».\n')
+        if writer.getBytesWritten() != os.path.getsize(outputFile):
+            print('FAILED: %d bytes counted, the file has %d' % (writer.getBytesWritten(), os.path.getsize(outputFile)))
+            sys.exit(1)
+        os.remove(outputFile)
+        for megabytes in args.sizes:
+            writer=BufferedFileWriter(settings=settings, bufferSize=args.buffer_size)
+            seconds, peak=measure(writer, outputFile, megabytes, line, args.memory)
+            _report('chunked', megabytes, seconds, peak)
+            if megabytes <= args.legacy_limit:
+                seconds, peak=measure(LegacyBufferedFileWriter(settings=settings), outputFile, megabytes, line, args.memory)
+                _report('legacy', megabytes, seconds, peak)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+import sys
+import logging
+import threading
+import multiprocessing.util
+
+_log=logging.getLogger(__name__)
+
+# ProgIDs of the applications automated
+WORD_APPLICATION='Word.Application'
+EXCEL_APPLICATION='Excel.Application'
+
+# wdAlertsNone, wdDoNotSaveChanges
+_WORD_ALERTS_NONE=0
+_WORD_DO_NOT_SAVE_CHANGES=0
+# properties set on every application started: nothing is drawn and no dialog waits for a
+# click.  Excel's manual calculation needs an open workbook, the writer sets it (see
+# ComplianceMatrixWriter.open)
+_APPLICATION_SETTINGS={
+    WORD_APPLICATION: (('Visible', False), ('ScreenUpdating', False), ('DisplayAlerts', _WORD_ALERTS_NONE)),
+    EXCEL_APPLICATION: (('Visible', False), ('ScreenUpdating', False), ('DisplayAlerts', False), ('EnableEvents', False)),
+}
+# arguments of Quit, Word is told not to save anything left open
+_QUIT_ARGUMENTS={WORD_APPLICATION: (_WORD_DO_NOT_SAVE_CHANGES,), EXCEL_APPLICATION: ()}
+
+# pool of the process, created by the first call to automationPool
+_pool=None
+_poolLock=threading.Lock()
+
+def _win32Dispatch():
+    '''
+    @return: win32com.client.Dispatch, None when PyWin32 is not installed.  Imported the first
+             time an application is started, loading PyWin32 takes longer than the rest of the
+             converter
+    @rtype: function
+    '''
+    try:
+        import win32com.client
+    except ImportError:
+        # Word/Excel automation is only available on Windows hosts with PyWin32 installed
+        return None
+    return win32com.client.Dispatch
+
+def automationPool(settings=None):
+    '''
+    @param settings: configuration the pool is created with the first time, defaults to the
+                     snapshot of the properties file
+    @type settings: Settings
+    @return: the automation pool shared by every conversion of this process.  Its applications
+             are quit when the process exits
+    @rtype: AutomationPool
+    '''
+    global _pool
+    with _poolLock:
+        if _pool == None:
+            if settings == None:
+                # imported here, the configuration reads its files with the readers that use the pool
+                from specops.util import Configuration
+                settings=Configuration.INSTANCE.getSettings()
+            _pool=AutomationPool(maxUses=settings.automationMaxUses)
+            # run when the process exits, worker processes of a batch included (which skip atexit)
+            multiprocessing.util.Finalize(_pool, _pool.close, exitpriority=10)
+        return _pool
+
+class AutomationPool:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Starts Word and Excel once and hands the same application out to conversion
+              after conversion, instead of starting one per document and never quitting it.
+              Every application started is made invisible, without screen updates or alert
+              dialogs.  An application is quit and replaced once it has been used maxUses
+              times, or as soon as a conversion using it fails, so a long batch neither leaks
+              Office processes nor keeps using one left in a bad state.  Applications are
+              created through a dispatch function (win32com.client.Dispatch), which a fake
+              COM dispatcher can stand in for.
+    '''
+
+    # creates a COM object from its ProgID
+    _dispatch=None
+    # number of conversions an application is used for before it is quit
+    _maxUses=50
+    # idle applications by ProgID, as [application, uses]
+    _idle=None
+    # [ProgID, uses, application] of the applications handed out, by id of the application
+    _busy=None
+    # number of applications started and quit
+    _started=0
+    _quit=0
+    _lock=None
+
+    def __init__(self, dispatch=None, maxUses=50):
+        '''
+        @param dispatch: function that creates a COM object from its ProgID.  Defaults to
+                         win32com.client.Dispatch, imported when the first application is started
+        @type dispatch: function
+        @param maxUses: number of conversions an application is used for before it is quit
+        @type maxUses: Int
+        __init__: constructor
+        '''
+        self._dispatch=dispatch
+        self._maxUses=max(1, maxUses)
+        self._idle=dict()
+        self._busy=dict()
+        self._started=0
+        self._quit=0
+        self._lock=threading.Lock()
+
+    def acquire(self, progId):
+        '''
+        @param progId: ProgID of the application (WORD_APPLICATION or EXCEL_APPLICATION)
+        @type progId: String
+        @return: an idle application of the pool, or one started now.  It must be given back
+                 with release once the conversion is done with it
+        @rtype: COM object
+        @raise Exception: the application could not be started
+        '''
+        with self._lock:
+            idle=self._idle.get(progId)
+            if idle:
+                application, uses=idle.pop()
+                self._busy[id(application)]=[progId, uses, application]
+                return application
+
+        if self._dispatch == None:
+            self._dispatch=_win32Dispatch()
+        if self._dispatch == None:
+            raise Exception('Word/Excel automation is not available (PyWin32 is not installed)')
+        application=self._dispatch(progId)
+        for name, value in _APPLICATION_SETTINGS.get(progId, ()):
+            try:
+                setattr(application, name, value)
+            except Exception:
+                # some versions refuse some settings, the conversion works without them
+                _log.debug('Could not set %s.%s: %s', progId, name, sys.exc_info()[1])
+        with self._lock:
+            self._started=self._started+1
+            self._busy[id(application)]=[progId, 0, application]
+        _log.debug('Started %s', progId)
+        return application
+
+    def release(self, application, failed=False):
+        '''
+        @param application: application handed out by acquire
+        @type application: COM object
+        @param failed: the conversion using the application failed, the application is quit
+                       instead of being handed out again
+        @type failed: Boolean
+        '''
+        with self._lock:
+            progId, uses, application=self._busy.pop(id(application))
+            uses=uses+1
+            recycle=failed or uses >= self._maxUses
+            if recycle == False:
+                self._idle.setdefault(progId, list()).append([application, uses])
+        if recycle:
+            self._quitApplication(progId, application)
+
+    def _quitApplication(self, progId, application):
+        '''
+        @summary: quits the application, which may already be gone after a failure
+        '''
+        try:
+            application.Quit(*_QUIT_ARGUMENTS.get(progId, ()))
+        except Exception:
+            _log.debug('Could not quit %s: %s', progId, sys.exc_info()[1])
+        with self._lock:
+            self._quit=self._quit+1
+        _log.debug('Quit %s', progId)
+
+    def close(self):
+        '''
+        @summary: quits every idle application.  The pool can still be used afterwards, it
+                  starts the applications again when they are needed
+        '''
+        with self._lock:
+            idle=[(progId, application) for progId, applications in self._idle.items() for application, uses in applications]
+            self._idle=dict()
+        for progId, application in idle:
+            self._quitApplication(progId, application)
+
+    def getStarted(self):
+        '''
+        @return: number of applications started by the pool
+        @rtype: Int
+        '''
+        return self._started
+
+    def getQuit(self):
+        '''
+        @return: number of applications quit by the pool
+        @rtype: Int
+        '''
+        return self._quit
+
+    def getIdle(self):
+        '''
+        @return: number of applications waiting to be handed out
+        @rtype: Int
+        '''
+        with self._lock:
+            return sum(len(applications) for applications in self._idle.values())
+
+    def __str__(self):
+        return self.toString()
+
+    def toString(self):
+        return ('AutomationPool(maxUses='+str(self._maxUses)+',started='+str(self._started)+',quit='+str(self._quit)+
+                ',idle='+str(self.getIdle())+',busy='+str(len(self._busy))+')')
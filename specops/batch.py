@@ -0,0 +1,167 @@
+import os
+import sys
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Word Document extensions picked up when a directory is converted
+DOCUMENT_EXTENSIONS=('.docx',)
+
+def findDocuments(patterns, extensions=DOCUMENT_EXTENSIONS):
+    '''
+    @param patterns: files, directories or glob patterns ("specs/**/*.docx") to convert.  A
+                     directory stands for every Word Document directly inside it
+    @type patterns: list<String>
+    @param extensions: extensions of the files picked up from directories
+    @type extensions: list<String>
+    @return: the Word Documents, sorted, without duplicates or Word lock files (~$name.docx)
+    @rtype: list<String>
+    '''
+    documents=set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for name in os.listdir(pattern):
+                if os.path.splitext(name)[1].lower() in extensions:
+                    documents.add(os.path.join(pattern, name))
+        else:
+            documents.update(glob.glob(pattern, recursive=True))
+    return sorted(document for document in documents
+                  if os.path.isfile(document) and not os.path.basename(document).startswith('~$'))
+
+class BatchResult:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Outcome of converting a single document in a batch
+    '''
+    __slots__=('inputFile', 'success', 'elapsed', 'error', 'stats')
+
+    def __init__(self, inputFile, success, elapsed, error=None, stats=None):
+        '''
+        @param inputFile: the Word Document that was converted
+        @type inputFile: String
+        @param success: true if the Compliance Matrix was written
+        @type success: Boolean
+        @param elapsed: wall time of the conversion in seconds
+        @type elapsed: Float
+        @param error: description of the failure, if any
+        @type error: String
+        @param stats: statistics of the conversion (see ConversionStats.toDict), if collected
+        @type stats: dict
+        __init__: constructor
+        '''
+        self.inputFile=inputFile
+        self.success=success
+        self.elapsed=elapsed
+        self.error=error
+        self.stats=stats
+
+    def __str__(self):
+        return self.toString()
+
+    def toString(self):
+        return 'BatchResult(inputFile='+self.inputFile+',success='+str(self.success)+',elapsed='+str(self.elapsed)+')'
+
+def convertOne(convert, inputFile, arguments=()):
+    '''
+    @param convert: function converting a single document: convert(inputFile, *arguments) ->
+                    Boolean, or the statistics of the conversion with a 'success' entry
+    @type convert: function
+    @param inputFile: Word Document to convert
+    @type inputFile: String
+    @param arguments: extra arguments passed to the convert function after the document
+    @type arguments: tuple
+    @return: the result of the conversion
+    @rtype: BatchResult
+    @summary: runs a single conversion, in a worker process of a batch or in the watching
+              process, timing it and turning any exception into a failed BatchResult so one
+              bad document does not stop the others
+    '''
+    start=time.time()
+    try:
+        result=convert(inputFile, *arguments)
+        stats=None
+        if isinstance(result, dict):
+            # the convert function collected statistics
+            stats=result
+            result=stats.get('success')
+        success=result != False
+        return BatchResult(inputFile, success, time.time()-start, None if success else 'conversion failed', stats)
+    except Exception:
+        return BatchResult(inputFile, False, time.time()-start, str(sys.exc_info()[1]))
+
+class BatchConverter:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Converts many documents on a pool of worker processes, so the interpreter and
+              automation start up once per worker instead of once per document
+    '''
+
+    # function converting a single document: convert(inputFile, *arguments) -> Boolean, or the
+    # statistics of the conversion with a 'success' entry.  It must be importable from the 
+    # worker processes (a module level function)
+    _convert=None
+    # extra arguments passed to the convert function
+    _arguments=None
+    # number of worker processes
+    _jobs=1
+
+    def __init__(self, convert, arguments=(), jobs=None):
+        '''
+        @param convert: module level function converting a single document and returning
+                        false on failure
+        @type convert: function
+        @param arguments: extra arguments passed to the convert function after the document
+        @type arguments: tuple
+        @param jobs: number of worker processes, defaults to the number of processors
+        @type jobs: Int
+        __init__: constructor
+        '''
+        self._convert=convert
+        self._arguments=tuple(arguments)
+        self._jobs=max(1, jobs if jobs != None else (os.cpu_count() or 1))
+
+    def run(self, documents):
+        '''
+        @param documents: Word Documents to convert
+        @type documents: list<String>
+        @return: the result of every conversion, in the order of the documents
+        @rtype: list<BatchResult>
+        '''
+        if len(documents) == 0:
+            return list()
+
+        results=dict()
+        with ProcessPoolExecutor(max_workers=min(self._jobs, len(documents))) as executor:
+            futures=[executor.submit(convertOne, self._convert, document, self._arguments) for document in documents]
+            for future in as_completed(futures):
+                try:
+                    result=future.result()
+                except Exception:
+                    # the worker process itself died
+                    result=BatchResult(documents[futures.index(future)], False, 0.0, str(sys.exc_info()[1]))
+                results[result.inputFile]=result
+        return [results[document] for document in documents]
+
+    def toString(self):
+        return 'BatchConverter(jobs='+str(self._jobs)+')'
+
+def printSummary(results, stream=sys.stdout):
+    '''
+    @param results: results of a batch conversion
+    @type results: list<BatchResult>
+    @param stream: where the summary is written
+    @type stream: file
+    @summary: writes the per-document timings followed by the number of successes and failures
+    '''
+    for result in results:
+        status='OK    ' if result.success else 'FAILED'
+        line='%s %8.2fs  %s' % (status, result.elapsed, result.inputFile)
+        if result.error != None:
+            line=line+'  ('+result.error+')'
+        stream.write(line+'\n')
+
+    succeeded=len([result for result in results if result.success])
+    stream.write('%d documents: %d succeeded, %d failed, %.2fs total conversion time\n' %
+                 (len(results), succeeded, len(results)-succeeded, sum(result.elapsed for result in results)))
@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+# version of the cached data.  Changing it invalidates every existing entry
+CACHE_VERSION='3'
+# bytes read at a time when hashing a document
+_HASH_BLOCK_SIZE=1024*1024
+# documents: requirements of a document keyed by content hash
+# paragraphs: requirement spans of each paragraph of the last revision of a document
+_TABLES=('documents', 'paragraphs')
+
+def paragraphKey(paragraph):
+    '''
+    @param paragraph: text of a paragraph
+    @type paragraph: String
+    @return: hash of the paragraph text
+    @rtype: String
+    '''
+    return hashlib.blake2b(paragraph.encode('utf-8'), digest_size=16).hexdigest()
+
+class RequirementCache:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Persistent, size bounded cache of the requirements extracted from documents,
+              kept in a SQLite database.  Documents are keyed by the hash of their content so
+              an unchanged document is converted without being parsed.  The requirement
+              offsets of every paragraph are kept per document too, keyed by the hash of the
+              paragraph, so only the paragraphs of an edited document that changed are
+              tokenized again.  The least recently used entries are evicted once the cache
+              grows past its maximum size.
+    '''
+
+    # path and filename of the cache database
+    _cacheFile=None
+    # maximum size in bytes of the cached entries
+    _maxSize=0
+    # settings that change what is extracted (abbreviations, keywords, ...).  Part of every key
+    _fingerprint=''
+    # database connection
+    _connection=None
+
+    def __init__(self, cacheFile, maxSize=256*1024*1024, fingerprint=''):
+        '''
+        @param cacheFile: path and filename of the cache database
+        @type cacheFile: String
+        @param maxSize: maximum size in bytes of the cached entries
+        @type maxSize: Int
+        @param fingerprint: settings that change what is extracted from a document
+        @type fingerprint: String
+        __init__: constructor
+        '''
+        self._cacheFile=cacheFile
+        self._maxSize=maxSize
+        self._fingerprint=CACHE_VERSION+'\n'+fingerprint
+        self._connection=None
+
+    def isOpen(self):
+        '''
+        @return: true if the cache database is open
+        @rtype: Boolean
+        '''
+        return self._connection != None
+
+    def open(self):
+        '''
+        @raise Exception: the cache database could not be opened or created
+        @summary: opens the cache database, creating it if it does not exist
+        '''
+        if self.isOpen():
+            return
+
+        directory=os.path.dirname(self._cacheFile)
+        if directory != '' and not os.path.isdir(directory):
+            os.makedirs(directory)
+        # several batch workers can share the cache, so wait for each other's writes
+        self._connection=sqlite3.connect(self._cacheFile, timeout=60)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        for table in _TABLES:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS '+table+' (key TEXT PRIMARY KEY, data TEXT, size INTEGER, used REAL)')
+        self._connection.commit()
+
+    def close(self):
+        '''
+        @summary: closes the cache database
+        '''
+        if self._connection != None:
+            self._connection.close()
+            self._connection=None
+
+    def documentKey(self, inputFile):
+        '''
+        @param inputFile: document to hash
+        @type inputFile: String
+        @return: key of the document, the hash of its content and of the fingerprint
+        @rtype: String
+        '''
+        digest=hashlib.blake2b(self._fingerprint.encode('utf-8'), digest_size=32)
+        with open(inputFile, 'rb') as document:
+            block=document.read(_HASH_BLOCK_SIZE)
+            while len(block) != 0:
+                digest.update(block)
+                block=document.read(_HASH_BLOCK_SIZE)
+        return digest.hexdigest()
+
+    def getRequirements(self, documentKey):
+        '''
+        @param documentKey: key of the document (see documentKey)
+        @type documentKey: String
+        @return: the requirements extracted from the document, or None if it is not cached
+        @rtype: list
+        '''
+        return self._get('documents', documentKey, None)
+
+    def putRequirements(self, documentKey, requirements):
+        '''
+        @param documentKey: key of the document (see documentKey)
+        @type documentKey: String
+        @param requirements: the requirements extracted from the document (JSON serializable)
+        @type requirements: list
+        '''
+        self._put('documents', documentKey, requirements)
+
+    def getParagraphs(self, inputFile):
+        '''
+        @param inputFile: document the paragraphs were read from
+        @type inputFile: String
+        @return: requirement spans of the last revision of the document that was converted,
+                 keyed by paragraphKey.  Empty if the document has not been seen before
+        @rtype: dict
+        '''
+        return self._get('paragraphs', self._pathKey(inputFile), dict())
+
+    def putParagraphs(self, inputFile, paragraphs):
+        '''
+        @param inputFile: document the paragraphs were read from
+        @type inputFile: String
+        @param paragraphs: requirement spans of every paragraph, keyed by paragraphKey
+        @type paragraphs: dict
+        '''
+        self._put('paragraphs', self._pathKey(inputFile), paragraphs)
+
+    def clear(self):
+        '''
+        @summary: removes every entry from the cache
+        '''
+        for table in _TABLES:
+            self._connection.execute('DELETE FROM '+table)
+        self._connection.commit()
+
+    def _pathKey(self, inputFile):
+        '''
+        @return: key of the paragraphs of a document, its absolute path and the fingerprint
+        '''
+        return hashlib.blake2b((self._fingerprint+'\n'+os.path.abspath(inputFile)).encode('utf-8'), digest_size=32).hexdigest()
+
+    def _get(self, table, key, default):
+        '''
+        @return: the entry stored under the key, marking it as used so it is evicted last, or
+                 the default if there is no such entry
+        '''
+        row=self._connection.execute('SELECT data FROM '+table+' WHERE key=?', (key,)).fetchone()
+        if row == None:
+            return default
+        self._connection.execute('UPDATE '+table+' SET used=? WHERE key=?', (time.time(), key))
+        self._connection.commit()
+        return json.loads(row[0])
+
+    def _put(self, table, key, value):
+        '''
+        @summary: stores an entry and evicts the least recently used entries if the cache is
+                  now larger than its maximum size
+        '''
+        data=json.dumps(value, separators=(',', ':'))
+        self._connection.execute('INSERT OR REPLACE INTO '+table+' (key, data, size, used) VALUES (?, ?, ?, ?)',
+                                 (key, data, len(data), time.time()))
+        self._connection.commit()
+        self._evict()
+
+    def _evict(self):
+        '''
+        @summary: deletes the least recently used entries until the cache fits in its maximum size
+        '''
+        total=0
+        for table in _TABLES:
+            total=total+self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM '+table).fetchone()[0]
+        if total <= self._maxSize:
+            return
+
+        entries=self._connection.execute(' UNION ALL '.join("SELECT '"+table+"', key, size, used FROM "+table for table in _TABLES)+' ORDER BY 4').fetchall()
+        for table, key, size, used in entries:
+            if total <= self._maxSize:
+                break
+            self._connection.execute('DELETE FROM '+table+' WHERE key=?', (key,))
+            total=total-size
+        self._connection.commit()
+
+    def __str__(self):
+        return self.toString()
+
+    def toString(self):
+        return 'RequirementCache(cacheFile='+self._cacheFile+',maxSize='+str(self._maxSize)+',isOpen='+str(self.isOpen())+')'
@@ -0,0 +1,205 @@
+import re
+
+# requirement keywords and their strength, strongest first.  When a sentence contains more
+# than one keyword the strongest one classifies it
+DEFAULT_KEYWORDS=(
+    ('shall not', 'Prohibited'),
+    ('must not', 'Prohibited'),
+    ('shall', 'Mandatory'),
+    ('must', 'Mandatory'),
+    ('should', 'Recommended'),
+    ('will', 'Declarative'),
+)
+
+def parseKeywords(keywords):
+    '''
+    @param keywords: comma separated keyword:strength pairs, strongest first.  For example
+                     "shall not:Prohibited,shall:Mandatory"
+    @type keywords: String
+    @return: list of (keyword, strength) pairs
+    @rtype: list<tuple<String,String>>
+    '''
+    pairs=list()
+    for entry in keywords.split(','):
+        keyword, separator, strength=entry.partition(':')
+        if keyword.strip() != '':
+            pairs.append((keyword.strip(), strength.strip()))
+    return pairs
+
+def _keywordExpression(trie):
+    '''
+    @param trie: trie of keyword characters.  The '' key marks the end of a keyword
+    @type trie: dict
+    @return: whole word, case insensitive regular expression matching every keyword in the
+             trie.  Each branch starts with a plain upper or lower case first character so the
+             regular expression engine rejects a branch with a single comparison; the rest of
+             the keyword is matched case insensitively
+    @rtype: String
+    '''
+    branches=list()
+    for character in sorted(key for key in trie if key != ''):
+        remainder='(?i:'+_trieExpression(trie[character])+')'
+        for variant in sorted(set((character.lower(), character.upper()))):
+            branches.append(re.escape(variant)+remainder)
+    return r'(?<!\w)(?:'+'|'.join(branches)+r')\b'
+
+def _trieExpression(node):
+    '''
+    @param node: trie of keyword characters.  The '' key marks the end of a keyword
+    @type node: dict
+    @return: regular expression matching every keyword in the trie.  Keywords sharing a
+             prefix share the branch that matches it, so the cost of a match attempt depends
+             on the length of the text rather than the number of keywords
+    @rtype: String
+    '''
+    branches=list()
+    for character in sorted(key for key in node if key != ''):
+        # any run of whitespace separates the words of a multi-word keyword
+        expression=r'\s+' if character == ' ' else re.escape(character)
+        branches.append(expression+_trieExpression(node[character]))
+
+    if len(branches) == 0:
+        return ''
+    if len(branches) == 1 and '' not in node:
+        return branches[0]
+    expression='(?:'+'|'.join(branches)+')'
+    if '' in node:
+        # a longer keyword (shall not) is tried before the shorter one it starts with (shall)
+        expression=expression+'?'
+    return expression
+
+class Classification:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: The requirement keyword found in a sentence and the strength it carries
+    '''
+    __slots__=('keyword', 'strength')
+
+    def __init__(self, keyword, strength):
+        '''
+        @param keyword: requirement keyword, lower case with single spaces
+        @type keyword: String
+        @param strength: strength of the keyword (Mandatory, Prohibited, ...)
+        @type strength: String
+        __init__: constructor
+        '''
+        self.keyword=keyword
+        self.strength=strength
+
+    def __str__(self):
+        return self.toString()
+
+    def __eq__(self, other):
+        return isinstance(other, Classification) and self.keyword == other.keyword and self.strength == other.strength
+
+    def __hash__(self):
+        return hash((self.keyword, self.strength))
+
+    def toString(self):
+        if self.strength == '':
+            return self.keyword
+        return self.keyword+' ('+self.strength+')'
+
+class RequirementClassifier:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Finds requirement keywords (shall, must, should, ...) in sentences.  All the
+              keywords are compiled into one case insensitive, whole word regular expression
+              so each sentence is scanned once without making a lower case copy of it.
+              "marshall" is not a "shall" statement and "shall not" is told apart from "shall".
+    '''
+
+    # (keyword, strength) pairs, strongest first
+    _keywords=None
+    # Classification for each keyword, keyed by the lower case keyword
+    _classifications=None
+    # priority of each keyword, 0 being the strongest
+    _priorities=None
+    # compiled pattern matching any of the keywords
+    _pattern=None
+
+    def __init__(self, keywords=DEFAULT_KEYWORDS):
+        '''
+        @param keywords: (keyword, strength) pairs, strongest first
+        @type keywords: list<tuple<String,String>>
+        __init__: constructor
+        '''
+        self._keywords=list()
+        self._classifications=dict()
+        self._priorities=dict()
+        trie=dict()
+        for keyword, strength in keywords:
+            keyword=' '.join(keyword.lower().split())
+            if keyword == '' or keyword in self._classifications:
+                continue
+            self._keywords.append((keyword, strength))
+            self._classifications[keyword]=Classification(keyword, strength)
+            self._priorities[keyword]=len(self._priorities)
+            node=trie
+            for character in keyword:
+                node=node.setdefault(character, dict())
+            node['']=True
+
+        if len(self._keywords) == 0:
+            # nothing is a requirement
+            self._pattern=re.compile(r'(?!)')
+        else:
+            self._pattern=re.compile(_keywordExpression(trie))
+
+    def classify(self, text, start=0, end=None):
+        '''
+        @param text: sentence, or the paragraph containing the sentence
+        @type text: String
+        @param start: offset of the sentence in the text
+        @type start: Int
+        @param end: offset of the end of the sentence in the text, None for the end of the text
+        @type end: Int
+        @return: the classification of the strongest keyword in the sentence, or None if the
+                 sentence is not a requirement
+        @rtype: Classification
+        '''
+        if end == None:
+            end=len(text)
+
+        best=None
+        bestPriority=len(self._priorities)
+        match=self._pattern.search(text, start, end)
+        while match != None:
+            keyword=match.group()
+            if keyword not in self._priorities:
+                keyword=' '.join(keyword.lower().split())
+            priority=self._priorities[keyword]
+            if priority < bestPriority:
+                best=keyword
+                bestPriority=priority
+                if priority == 0:
+                    break
+            match=self._pattern.search(text, match.end(), end)
+
+        if best == None:
+            return None
+        return self._classifications[best]
+
+    def getClassification(self, keyword):
+        '''
+        @param keyword: requirement keyword, lower case with single spaces
+        @type keyword: String
+        @return: the classification of the keyword, or None if it is not one of the keywords
+        @rtype: Classification
+        '''
+        return self._classifications.get(keyword)
+
+    def getKeywords(self):
+        '''
+        @return: (keyword, strength) pairs, strongest first
+        @rtype: list<tuple<String,String>>
+        '''
+        return list(self._keywords)
+
+    def __str__(self):
+        return self.toString()
+
+    def toString(self):
+        return 'RequirementClassifier(keywords='+str(self._keywords)+')'
@@ -1,4 +1,31 @@
 READ_ONLY='r'
 WRITE_ONLY='w'
 APPEND='a'
-BINARY='b'
\ No newline at end of file
+BINARY='b'
+
+# Office Open XML
+WORDPROCESSINGML_NAMESPACE='http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+MARKUP_COMPATIBILITY_NAMESPACE='http://schemas.openxmlformats.org/markup-compatibility/2006'
+DOCX_DOCUMENT_PART='word/document.xml'
+
+# backends used to read Word Documents and write Excel Compliance Matrices
+COM_BACKEND='com'      # Word/Excel automation through PyWin32 (Windows only)
+OOXML_BACKEND='ooxml'  # native Office Open XML, no Office installation required
+TEXT_BACKEND='text'    # delimited text Compliance Matrices (csv and tsv formats), whatever backend reads the document
+SPREADSHEETML_NAMESPACE='http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+RELATIONSHIPS_NAMESPACE='http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_RELATIONSHIPS_NAMESPACE='http://schemas.openxmlformats.org/package/2006/relationships'
+
+# formats of the Compliance Matrix
+XLSX_FORMAT='xlsx'  # Excel Workbook
+CSV_FORMAT='csv'    # comma separated values
+TSV_FORMAT='tsv'    # values separated by complianceMatrixDelimiter (a tab by default)
+
+# parts of a Word Document a paragraph can come from
+BODY_SOURCE='body'          # main text of the document
+TABLE_SOURCE='table'        # table cell in the main text
+TEXT_BOX_SOURCE='textbox'   # text box anchored in the main text
+FOOTNOTE_SOURCE='footnote'
+ENDNOTE_SOURCE='endnote'
+HEADER_SOURCE='header'
+FOOTER_SOURCE='footer'
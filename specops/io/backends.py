@@ -0,0 +1,117 @@
+import sys
+import importlib
+import importlib.util
+import specops.io
+
+# module of every backend, imported the first time its backend is selected.  A backend module
+# provides createWriter(outputFile, settings) for the Compliance Matrix and, if it reads Word
+# Documents, createReader(inputFile, settings)
+_BACKENDS={specops.io.COM_BACKEND: 'specops.io.com',
+           specops.io.OOXML_BACKEND: 'specops.io.ooxml',
+           specops.io.TEXT_BACKEND: 'specops.io.text'}
+# backend writing each format of the Compliance Matrix whatever backend reads the document.
+# The other formats (xlsx) are written by the backend that reads the document
+_FORMAT_BACKENDS={specops.io.CSV_FORMAT: specops.io.TEXT_BACKEND,
+                  specops.io.TSV_FORMAT: specops.io.TEXT_BACKEND}
+# package a backend needs that is not part of Python, looked up without being imported
+_REQUIRED_PACKAGES={specops.io.COM_BACKEND: 'win32com'}
+
+def registerBackend(name, module, requiredPackage=None):
+    '''
+    @param name: name of the backend, as given to --backend
+    @type name: String
+    @param module: module implementing the backend (see _BACKENDS), imported when the backend
+                   is first selected
+    @type module: String
+    @param requiredPackage: package the backend needs that may not be installed
+    @type requiredPackage: String
+    '''
+    _BACKENDS[name]=module
+    if requiredPackage != None:
+        _REQUIRED_PACKAGES[name]=requiredPackage
+
+def getBackends():
+    '''
+    @return: the names of the backends registered
+    @rtype: list<String>
+    '''
+    return list(_BACKENDS)
+
+def isAvailable(name):
+    '''
+    @param name: name of the backend
+    @type name: String
+    @return: true if the backend is registered and the packages it needs are installed.  The
+             packages are looked up, not imported
+    @rtype: Boolean
+    '''
+    if name not in _BACKENDS:
+        return False
+    package=_REQUIRED_PACKAGES.get(name)
+    try:
+        return package == None or importlib.util.find_spec(package) != None
+    except (ImportError, ValueError):
+        return False
+
+def defaultBackend():
+    '''
+    @return: Word/Excel automation when PyWin32 is installed, the native Office Open XML
+             backend otherwise
+    @rtype: String
+    '''
+    if isAvailable(specops.io.COM_BACKEND):
+        return specops.io.COM_BACKEND
+    return specops.io.OOXML_BACKEND
+
+def isLoaded(name):
+    '''
+    @param name: name of the backend
+    @type name: String
+    @return: true if the module of the backend has been imported
+    @rtype: Boolean
+    '''
+    return _BACKENDS.get(name) in sys.modules
+
+def loadBackend(name):
+    '''
+    @param name: name of the backend
+    @type name: String
+    @return: the module of the backend, imported on first use
+    @rtype: module
+    @raise Exception: the backend is not registered
+    '''
+    module=_BACKENDS.get(name)
+    if module == None:
+        raise Exception('Unknown backend \''+str(name)+'\', expected one of '+', '.join(_BACKENDS))
+    return importlib.import_module(module)
+
+def createReader(backend, inputFile, settings):
+    '''
+    @param backend: backend reading the Word Document
+    @type backend: String
+    @param inputFile: Word Document to read
+    @type inputFile: String
+    @param settings: configuration of the conversion
+    @type settings: Settings
+    @return: reader of the Word Document
+    @rtype: FileReader
+    @raise Exception: the backend does not read Word Documents
+    '''
+    module=loadBackend(backend)
+    if hasattr(module, 'createReader') == False:
+        raise Exception('The '+backend+' backend does not read Word Documents')
+    return module.createReader(inputFile, settings)
+
+def createWriter(backend, outputFile, settings):
+    '''
+    @param backend: backend reading the Word Document
+    @type backend: String
+    @param outputFile: Compliance Matrix to write
+    @type outputFile: String
+    @param settings: configuration of the conversion, its outputFormat selects the writer
+    @type settings: Settings
+    @return: writer of the Compliance Matrix in the format of the settings: by the text
+             backend for the delimited formats, by the backend reading the document otherwise
+    @rtype: FileWriter
+    '''
+    return loadBackend(_FORMAT_BACKENDS.get(settings.outputFormat, backend)).createWriter(outputFile, settings)
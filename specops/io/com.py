@@ -0,0 +1,615 @@
+import specops.io
+import os
+import re
+import logging
+from specops.io.reader import FileReader
+from specops.io.writer import FileWriter, COMPLIANCE_MATRIX_COLUMNS, columnLetter, _keywordCell
+from specops.update import MatrixUpdate, CONVERTER_HEADERS
+from specops.stats import stageTimer
+from specops.outline import OutlineNumbering
+from specops.automation import AutomationPool, automationPool, WORD_APPLICATION, EXCEL_APPLICATION
+
+_log=logging.getLogger(__name__)
+
+# outline level Word reports for paragraphs that are not headings (wdOutlineLevelBodyText)
+_BODY_TEXT_LEVEL=10
+# wdDoNotSaveChanges
+_WORD_DO_NOT_SAVE_CHANGES=0
+# wdFindStop, wdCollapseEnd
+_WORD_FIND_STOP=0
+_WORD_COLLAPSE_END=0
+# a paragraph of the text of a Word story as the Range.Text of the paragraph reports it: its
+# text up to the paragraph mark, followed by the end of cell mark in tables, or the text after
+# the last paragraph mark
+_WORD_PARAGRAPH=re.compile('[^\r]*\r\x07?|[^\r]+')
+# stories of Word automation read along with the main text (WdStoryType)
+_WORD_STORY_SOURCES={2: specops.io.FOOTNOTE_SOURCE, 3: specops.io.ENDNOTE_SOURCE, 5: specops.io.TEXT_BOX_SOURCE,
+                     6: specops.io.HEADER_SOURCE, 7: specops.io.HEADER_SOURCE, 10: specops.io.HEADER_SOURCE,
+                     8: specops.io.FOOTER_SOURCE, 9: specops.io.FOOTER_SOURCE, 11: specops.io.FOOTER_SOURCE}
+# Excel calculation modes (xlCalculationManual, xlCalculationAutomatic)
+_EXCEL_CALCULATION_MANUAL=-4135
+_EXCEL_CALCULATION_AUTOMATIC=-4105
+
+def _storyParagraphs(text):
+    '''
+    @param text: text of a story of a Word Document (Range.Text)
+    @type text: String
+    @return: the text of every paragraph of the story, the paragraph mark included, the way
+             str(paragraph) gives it
+    @rtype: list<String>
+    '''
+    return _WORD_PARAGRAPH.findall(text)
+
+class WordDocumentFileReader(FileReader):
+    '''
+    Created on Apr 9, 2012
+    
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Reads in a Word Document file and reads the body of the file.  Word is taken
+              from an automation pool, so one Word application serves many conversions.
+              Every call into Word is a round trip to another process, so the text of the
+              document is fetched in one call and split into paragraphs here, and only the
+              headings are asked for one at a time.
+    '''
+
+    # Word application the document is opened in
+    _word=None
+    # word document to read from
+    _document=None
+    # pool the Word application is taken from and given back to
+    _pool=None
+    # true once reading the document failed, Word is then quit instead of being reused
+    _failed=False
+    # text of every paragraph of the main text, fetched from Word on first use
+    _lines=None
+    # current line number
+    _lineNumber=0
+    # read the text boxes, footnotes, endnotes, headers and footers too
+    _allParts=False
+    
+    # c'tor
+    def __init__(self, inputFile=None, allParts=False, pool=None):
+        '''
+        @param inputFile: File where data will be read
+        @type inputFile: String
+        @param allParts: read the text boxes, footnotes, endnotes, headers and footers too
+        @type allParts: Boolean
+        @param pool: automation pool Word is taken from, defaults to the pool of the process
+        @type pool: AutomationPool
+        __init__: constructor
+        '''
+        super().__init__(inputFile)
+        self._word=None
+        self._document=None
+        self._pool=pool
+        self._failed=False
+        self._lines=None
+        self._lineNumber=0
+        self._allParts=allParts
+        
+    def isOpen(self):
+        '''
+        @return: true if file is open, false otherwise
+        @summary: check to see if the file is open for reading
+        '''
+        return self._document != None
+    
+    def open(self, inputFile=None):
+        '''
+        @param inputFile: File to open for reading
+        @type inputFile: String
+        @raise IOError: error opening the file or directory
+        @raise Exception: general exception 
+        @summary: opens the Word file
+        '''
+        if inputFile != None:
+            self.setInputFile(inputFile)
+        if self._pool == None:
+            self._pool=automationPool()
+        
+        try:
+            self._failed=False
+            with stageTimer(self._stats, 'wordStart'):
+                self._word=self._pool.acquire(WORD_APPLICATION)
+            with stageTimer(self._stats, 'wordOpen'):
+                # read only, and kept out of the recent files
+                self._document=self._word.Documents.Open(os.path.abspath(self._inputFile), False, True, False)
+            self._lines=None
+            self._lineNumber=0
+        except IOError:
+            _log.exception('No such file or directory: \'%s\'', self._inputFile)
+            self._releaseWord(True)
+            return
+        except Exception:
+            _log.exception('General Exception opening Input File: \'%s\'', self._inputFile)
+            self._releaseWord(True)
+            return
+
+    def _releaseWord(self, failed):
+        '''
+        @param failed: the document could not be opened or read, Word is quit instead of reused
+        @type failed: Boolean
+        @summary: gives Word back to the pool
+        '''
+        if self._word != None:
+            self._pool.release(self._word, failed or self._failed)
+        self._word=None
+        self._document=None
+        self._lines=None
+        self._lineNumber=0
+        
+    def close(self):
+        '''
+        @raise Exception: general exception 
+        @summary: closes the file and gives Word back to the pool
+        '''
+        failed=False
+        try:
+            # close the open word document, without saving anything
+            with stageTimer(self._stats, 'wordClose'):
+                if self._document != None:
+                    self._document.Close(_WORD_DO_NOT_SAVE_CHANGES)
+        except Exception:
+            _log.exception('General Exception closing Input File: \'%s\'', self._inputFile)
+            failed=True
+        self._releaseWord(failed)
+        
+    def readline(self):
+        '''
+        @summary: reads a single line in the Word Document file
+        @return: single line from the word file or None if an exception occurs
+        @rtype: String
+        @raise Exception: generic exception indicting something went wrong 
+        '''
+        
+        try:
+            lines=self._paragraphTexts()
+            line=None
+            if self._lineNumber < len(lines):
+                line=lines[self._lineNumber]
+                self._lineNumber=self._lineNumber+1
+            return line
+        except Exception:
+            _log.exception('General Exception reading Input File: \'%s\'', self._inputFile)
+            self._failed=True
+            return None
+        
+    def readlines(self):
+        '''
+        @summary: reads every remaining line in the file and adds them to a list of rows
+        @return: list of rows, with each row containing a single line in a file,
+                 or None if an exception occurs
+        @rtype: list< list<String> >
+        @raise Exception: generic exception indicting something went wrong 
+        '''
+        
+        try:
+            rows=self._paragraphTexts()[self._lineNumber:]
+            self._lineNumber=self._lineNumber+len(rows)
+            return rows
+        except Exception:
+            _log.exception('General Exception reading Input File: \'%s\'', self._inputFile)
+            self._failed=True
+            return None
+
+    def _paragraphTexts(self):
+        '''
+        @return: the text of every paragraph of the main text, the way str(paragraph) gives it.
+                 The whole text is fetched with a single Content.Text call and split at the
+                 paragraph marks, checked against Word's count of the paragraphs
+        @rtype: list<String>
+        '''
+        if self._lines == None:
+            content=self._document.Content
+            lines=_storyParagraphs(content.Text)
+            if len(lines) != content.Paragraphs.Count:
+                # the text does not split the way Word counts the paragraphs, ask for each one
+                lines=[str(paragraph) for paragraph in content.Paragraphs]
+            self._lines=lines
+        return self._lines
+
+    def _headings(self, lines):
+        '''
+        @param lines: text of every paragraph of the main text
+        @type lines: list<String>
+        @return: (outline level, number Word displays in front of the heading) of every heading
+                 by the index of its paragraph, or None if the headings Word finds could not
+                 be matched with the paragraphs.  The headings are found with one search per
+                 outline level, so the calls depend on the number of headings rather than the
+                 length of the document
+        @rtype: dict<Int,tuple<Int,String>>
+        '''
+        found=list()
+        for level in range(1, _BODY_TEXT_LEVEL):
+            search=self._document.Content
+            find=search.Find
+            find.ClearFormatting()
+            find.Text=''
+            find.Format=True
+            find.Forward=True
+            find.Wrap=_WORD_FIND_STOP
+            find.ParagraphFormat.OutlineLevel=level
+            end=-1
+            while find.Execute() and search.End > end:
+                end=search.End
+                # consecutive headings of the same level are found together
+                for paragraph in search.Paragraphs:
+                    headingRange=paragraph.Range
+                    found.append((headingRange.Start, level, str(paragraph), headingRange.ListFormat.ListString))
+                search.Collapse(_WORD_COLLAPSE_END)
+        found.sort()
+
+        # the headings are in document order, like the paragraphs
+        headings=dict()
+        index=0
+        for start, level, text, number in found:
+            while index < len(lines) and lines[index] != text:
+                index=index+1
+            if index == len(lines):
+                return None
+            headings[index]=(level, number)
+            index=index+1
+        return headings
+
+    def readSections(self):
+        '''
+        @summary: reads every paragraph in the file along with its section number.  The text
+                  is fetched in bulk (see readlines) and the section numbers are worked out
+                  from the headings Word finds.  When reading every part, the text boxes,
+                  footnotes, endnotes, headers and footers are read from the text of the
+                  other stories of the document after the main text
+        @return: list of (section number, paragraph, source), the section number None before
+                 the first heading and for the other stories, or None if an exception occurs
+        @rtype: list<tuple<String,String,String>>
+        '''
+        try:
+            rows=list()
+            numbering=OutlineNumbering()
+            section=None
+            lines=self._paragraphTexts()
+            headings=self._headings(lines)
+            if headings != None:
+                for index, line in enumerate(lines):
+                    heading=headings.get(index)
+                    if heading != None:
+                        section=numbering.heading(heading[0]-1, line, heading[1])
+                    rows.append((section, line, specops.io.BODY_SOURCE))
+            else:
+                # read the outline level of every paragraph instead
+                for paragraph in self._document.Content.Paragraphs:
+                    line=str(paragraph)
+                    level=paragraph.OutlineLevel
+                    if level < _BODY_TEXT_LEVEL:
+                        section=numbering.heading(level-1, line, paragraph.Range.ListFormat.ListString)
+                    rows.append((section, line, specops.io.BODY_SOURCE))
+            self._lineNumber=len(lines)
+            if self._allParts:
+                for story in self._document.StoryRanges:
+                    source=_WORD_STORY_SOURCES.get(story.StoryType)
+                    # stories of the same type (every section's header) are chained together
+                    while source != None and story != None:
+                        for line in _storyParagraphs(story.Text):
+                            rows.append((None, line, source))
+                        story=story.NextStoryRange
+            return rows
+        except Exception:
+            _log.exception('General Exception reading Input File: \'%s\'', self._inputFile)
+            self._failed=True
+            return None
+
+    def toString(self):
+        return 'WordDocumentFileReader(FileName='+self._inputFile+',isOpen='+str(self.isOpen())+')'
+
+class ComplianceMatrixWriter(FileWriter):
+    '''
+    Created on Apr 9, 2012
+    
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: writes a Compliance Matrix (CSV file that can be loaded in Excel) 
+    '''
+    
+    # buffer to hold on all requirements that will be written
+    _requirementList=None
+    # Excel Application
+    _excelObject=None
+    # Excel Workbook that will the requirements will be written 
+    _excelWorkbook=None
+    # Excel workbook sheet that the requirements will be written
+    _sheet=None
+    # all the Cells in the Excel Workbook Sheet
+    _cells=None
+    # pool the Excel Application is taken from and given back to
+    _pool=None
+    # number of rows assigned to the sheet with a single Range call
+    _chunkSize=1000
+    # next row of the sheet to write
+    _lastRow=2
+    
+    def __init__(self, outputFile=None, dispatch=None, settings=None, pool=None):
+        '''
+        @param outputFile: File where data will be written
+        @type outputFile: String
+        @param dispatch: function that creates a COM object from its ProgID, for a pool of the
+                         writer's own.  Defaults to win32com.client.Dispatch
+        @type dispatch: function
+        @param settings: configuration, defaults to the snapshot of the properties file
+        @type settings: Settings
+        @param pool: automation pool Excel is taken from, defaults to the pool of the process
+        @type pool: AutomationPool
+        __init__: constructor
+        '''
+        super().__init__(outputFile, settings)
+        
+        if outputFile==None:
+            self.setOutputFile(self._settings.outputFile)
+        
+        if pool == None:
+            pool=AutomationPool(dispatch, self._settings.automationMaxUses) if dispatch != None else automationPool(self._settings)
+        self._pool=pool
+        self._chunkSize=max(1, self._settings.chunkSize)
+        self._requirementList=list()
+        self._lastRow=2
+        
+    def isOpen(self):
+        '''
+        @return: true if the file is open, false otherwise
+        @rtype: Boolean
+        isOpen: checks to see if a file is currently open
+        '''
+        return self._excelWorkbook != None
+            
+    def open(self, outputFile=None):
+        '''
+        @param outputFile: output file
+        @type outputFile: String
+        @raise IOError: File or directory does not exist or unable to be opened
+        @raise Exception: Some other sort of exception  
+        open: opens the file for writing
+        '''
+        if outputFile != None:
+            if outputFile != self._outputFile: # make sure it is not the same file
+                self.setOutputFile(outputFile)
+
+        # check to see if the file is already opened
+        if self.isOpen():
+            _log.debug('File \'%s\' already opened', self._outputFile)
+            return;
+        
+        try:
+            with stageTimer(self._stats, 'excelStart'):
+                self._excelObject=self._pool.acquire(EXCEL_APPLICATION)
+                self._excelWorkbook=self._excelObject.Workbooks.Add(1) 
+            # nothing is recalculated while the rows are written
+            self._excelObject.Calculation=_EXCEL_CALCULATION_MANUAL
+            self._sheet=self._excelWorkbook.ActiveSheet
+            self._cells=self._excelWorkbook.ActiveSheet.Cells
+            self._lastRow=2
+            self._writeHeader()
+            
+            _log.debug('Opening Output File \'%s\'', self._outputFile)
+        except IOError:
+            _log.exception('No such file or directory: \'%s\'', self._outputFile)
+            self._releaseExcel(True)
+            raise
+        except Exception:
+            _log.exception('General Exception opening Writer output File: \'%s\'', self._outputFile)
+            self._releaseExcel(True)
+            raise
+
+    def _releaseExcel(self, failed):
+        '''
+        @param failed: writing the Compliance Matrix failed, Excel is quit instead of reused
+        @type failed: Boolean
+        _releaseExcel: closes the workbook without saving it, if it is still open, and gives
+                       Excel back to the pool
+        '''
+        if self._excelWorkbook != None:
+            try:
+                self._excelWorkbook.Close(False)
+            except Exception:
+                failed=True
+        if self._excelObject != None:
+            self._pool.release(self._excelObject, failed)
+        self._excelWorkbook=None
+        self._excelObject=None
+        self._sheet=None
+        self._cells=None
+            
+    def _writeHeader(self):    
+        '''
+        @raise Exception: General exception writing the individual cells
+        _writeHeader: writers the header Row to the spreadsheet
+        '''        
+        if self.isOpen() == False:
+            _log.error('Writing Header Row Data FAILED.  File not open')
+            return
+        
+        try:
+            # writer the header row
+            for column, (header, width, wrapText) in enumerate(COMPLIANCE_MATRIX_COLUMNS, 1):
+                self._cells(1,column).Value=header
+                letter=columnLetter(column)
+                self._sheet.Columns(letter+':'+letter).ColumnWidth=width
+        except Exception:
+            _log.exception('General Exception writing Header Row in Writer output File: \'%s\'', self._outputFile)
+            raise
+        
+    def close(self):
+        '''
+        @raise IOError: File or directory does not exist or unable to be opened
+        @raise Exception: Some other sort of exception  
+        open: flushes the buffer and closes the file
+        '''  
+              
+        try:
+            # flush data to disk
+            self.flush()
+            # wrap the text of every written row, one call per column
+            if self._lastRow > 2:
+                for column, (header, width, wrapText) in enumerate(COMPLIANCE_MATRIX_COLUMNS, 1):
+                    if wrapText:
+                        letter=columnLetter(column)
+                        self._sheet.Range(letter+'2:'+letter+str(self._lastRow-1)).WrapText=True
+            # format table
+            #self._sheet.ListObjects.Add(1,'$A'+str(self._lastRow)+':$C'+str(self._lastRow),None,1).Name = "Table1"
+            with stageTimer(self._stats, 'excelSave'):
+                # the workbook opens with the usual calculation mode
+                self._excelObject.Calculation=_EXCEL_CALCULATION_AUTOMATIC
+                # save file
+                self._excelWorkbook.SaveAs(self._outputFile)
+                # close the saved excel spreadsheet
+                self._excelWorkbook.Close(False)
+                self._excelWorkbook=None
+            self._releaseExcel(False)
+            self._recordOutput(self._lastRow-2)
+            
+            _log.debug('Closing Output File \'%s\'', self._outputFile)
+            self._file=0  # use this to check is file is open
+        except IOError:
+            _log.exception('IOError closing Writer output File: \'%s\'', self._outputFile)
+            self._releaseExcel(True)
+            raise
+        except Exception:
+            _log.exception('General Exception closing Writer output File: \'%s\'', self._outputFile)
+            self._releaseExcel(True)
+            raise
+                
+    def write(self, requirement, classification=None, requirementId=None):      
+        ''' 
+        @param requirement: string that will be written to the file
+        @type requirement: String 
+        @param classification: requirement keyword found in the requirement
+        @type classification: Classification
+        @param requirementId: ID of the requirement, None to number the requirements by row
+        @type requirementId: String
+        @raise Exception: General exception causing a failure to write
+        write: writes the data to the buffer list.  The buffer is flushed to the sheet
+               every time it holds a full chunk of rows
+        '''  
+        if self.isOpen() == False:
+            _log.error('Writing Data FAILED.  File not open')
+            return
+        
+        try:
+            # add this to the list to be written
+            self._requirementList.append((requirement, classification, requirementId))
+            if len(self._requirementList) >= self._chunkSize:
+                self.flush()
+        except Exception:
+            _log.exception('General Exception writing Compliance Matrix Writer output File: \'%s\'', self._outputFile)
+            raise
+        
+    def flush(self):    
+        '''
+        @raise IOError: File or directory does not exist or unable to be opened
+        @raise Exception: Some other sort of exception  
+        flush: writes the data to the file.  Rows are assigned a chunk at a time with a
+               single Range.Value call, so the number of COM round trips depends on the 
+               chunk size rather than on the number of requirements
+        '''      
+        if self.isOpen() == False:
+            _log.error('Flushing Data FAILED.  File not open')
+            return
+              
+        try:
+            _log.debug('Flushing Compliance Matrix to Output File: \'%s\'', self._outputFile)
+            
+            for start in range(0, len(self._requirementList), self._chunkSize):
+                firstRow=self._lastRow
+                block=tuple((str(firstRow+offset-1) if requirementId == None else requirementId, requirement, _keywordCell(classification)) 
+                            for offset, (requirement, classification, requirementId) in enumerate(self._requirementList[start:start+self._chunkSize]))
+                self._lastRow=firstRow+len(block)
+                with stageTimer(self._stats, 'excelWrite'):
+                    self._sheet.Range('A'+str(firstRow)+':'+columnLetter(len(block[0]))+str(self._lastRow-1)).Value=block
+                if self._stats != None:
+                    self._stats.count('excelRangeCalls')
+            self._requirementList=list() # clear the buffer      
+        except IOError:
+            _log.exception('IOError flushing Compliance Matrix output File: \'%s\'', self._outputFile)
+            raise
+        except Exception:
+            _log.exception('General Exception flushing Compliance Matrix output File: \'%s\'', self._outputFile)
+            raise
+
+    def update(self, requirements):
+        '''
+        @param requirements: (requirement ID, requirement, classification) of every requirement
+                             of the new revision of the document
+        @type requirements: list<tuple<String,String,Classification>>
+        @return: the differences that were applied
+        @rtype: MatrixUpdate
+        @raise IOError: File or directory does not exist or unable to be opened
+        @raise Exception: Some other sort of exception  
+        update: updates the existing Compliance Matrix in place.  The rows are read with a single
+                call, then only the rows that were added, removed or changed are edited, so the 
+                number of calls depends on the size of the edit rather than the size of the 
+                matrix.  Every column the converter does not write is left alone
+        '''
+        workbook=None
+        failed=True
+        try:
+            self._excelObject=self._pool.acquire(EXCEL_APPLICATION)
+            workbook=self._excelObject.Workbooks.Open(os.path.abspath(self._outputFile))
+            sheet=workbook.Worksheets(1)
+            values=sheet.UsedRange.Value
+            rows=[list(row) for row in values[1:]]
+            requirements=[(requirementId, requirement, _keywordCell(classification)) for requirementId, requirement, classification in requirements]
+            matrixUpdate=MatrixUpdate(list(values[0]), rows, requirements)
+            columns=[matrixUpdate.getColumn(header) for header in CONVERTER_HEADERS]
+            
+            inserted=False
+            for tag, oldStart, oldEnd, newStart, newEnd in matrixUpdate.edits():
+                # data rows start on the second row of the sheet
+                firstRow=oldStart+2
+                lastRow=firstRow+newEnd-newStart-1
+                if tag in ('delete', 'replace'):
+                    sheet.Rows(str(firstRow)+':'+str(oldEnd+1)).Delete()
+                if tag in ('insert', 'replace'):
+                    sheet.Rows(str(firstRow)+':'+str(lastRow)).Insert()
+                    inserted=True
+                if tag != 'delete':
+                    for field, column in enumerate(columns):
+                        if column != None:
+                            letter=columnLetter(column+1)
+                            sheet.Range(letter+str(firstRow)+':'+letter+str(lastRow)).Value=tuple((requirements[index][field],) for index in range(newStart, newEnd))
+            # Excel formats inserted rows like the row above them, the header row for the rows
+            # inserted at the top: wrap the text of every data row again, one call per column
+            # as close does
+            if inserted and len(requirements) != 0:
+                for header, width, wrapText in COMPLIANCE_MATRIX_COLUMNS:
+                    if wrapText and matrixUpdate.getColumn(header) != None:
+                        letter=columnLetter(matrixUpdate.getColumn(header)+1)
+                        sheet.Range(letter+'2:'+letter+str(len(requirements)+1)).WrapText=True
+            
+            workbook.Save()
+            failed=False
+            _log.debug('Updated Output File \'%s\' %s', self._outputFile, matrixUpdate)
+            return matrixUpdate
+        except IOError:
+            _log.exception('IOError updating Compliance Matrix output File: \'%s\'', self._outputFile)
+            raise
+        except Exception:
+            _log.exception('General Exception updating Compliance Matrix output File: \'%s\'', self._outputFile)
+            raise
+        finally:
+            self._excelWorkbook=workbook
+            self._releaseExcel(failed)
+
+    def toString(self):
+        return 'ComplianceMatrixWriter(FileName='+self._outputFile+',isOpen='+str(self.isOpen())+')'
+
+def createReader(inputFile, settings):
+    '''
+    @return: reader of the Word Document through Word, taken from the automation pool of the process
+    @rtype: WordDocumentFileReader
+    '''
+    return WordDocumentFileReader(inputFile, settings.allParts, automationPool(settings))
+
+def createWriter(outputFile, settings):
+    '''
+    @return: writer of the Compliance Matrix Excel Workbook through Excel
+    @rtype: ComplianceMatrixWriter
+    '''
+    return ComplianceMatrixWriter(outputFile, settings=settings)
@@ -0,0 +1,1061 @@
+import specops.io
+import os
+import re
+import math
+import logging
+import zipfile
+# the process pool is imported on first use (concurrent.futures loads its executors lazily)
+import concurrent.futures
+from xml.etree.ElementTree import iterparse, XML
+from specops.io.reader import FileReader
+from specops.io.writer import FileWriter, COMPLIANCE_MATRIX_COLUMNS, columnLetter, _keywordCell
+from specops.update import MatrixUpdate
+from specops.outline import OutlineNumbering
+
+_log=logging.getLogger(__name__)
+
+# WordprocessingML element tags used by the DocxFileReader
+_W='{'+specops.io.WORDPROCESSINGML_NAMESPACE+'}'
+_BODY=_W+'body'
+_PARAGRAPH=_W+'p'
+_TEXT=_W+'t'
+_TAB=_W+'tab'
+_BREAKS=frozenset((_W+'br', _W+'cr'))
+_PARAGRAPH_PROPERTIES=_W+'pPr'
+_PARAGRAPH_STYLE=_W+'pStyle'
+_OUTLINE_LEVEL=_W+'outlineLvl'
+_VAL=_W+'val'
+# styles part of a Word Document, holds the outline level of the heading styles
+_DOCX_STYLES_PART='word/styles.xml'
+# built in heading styles, by style ID ("Heading2") or by name ("heading 2")
+_HEADING_STYLE=re.compile(r'heading ?([1-9])$', re.IGNORECASE)
+# relationships of the document part, they name the note, header and footer parts
+_DOCX_RELATIONSHIPS_PART='word/_rels/document.xml.rels'
+# parts read along with the main text, by the type of their relationship
+_DOCX_PART_SOURCES={specops.io.RELATIONSHIPS_NAMESPACE+'/footnotes': specops.io.FOOTNOTE_SOURCE,
+                    specops.io.RELATIONSHIPS_NAMESPACE+'/endnotes': specops.io.ENDNOTE_SOURCE,
+                    specops.io.RELATIONSHIPS_NAMESPACE+'/header': specops.io.HEADER_SOURCE,
+                    specops.io.RELATIONSHIPS_NAMESPACE+'/footer': specops.io.FOOTER_SOURCE}
+# most workers parsing the parts of a Word Document other than the main text
+_PART_WORKERS=4
+# uncompressed size of the parts from which they are parsed on worker processes.  XML parsing
+# holds the GIL, so threads only keep smaller parts off the main text's way
+_PART_PROCESS_SIZE=4*1024*1024
+_TABLE=_W+'tbl'
+# text box content, and the legacy copy of content kept for older versions of Word (which
+# would read every text box twice)
+_TEXT_BOX=_W+'txbxContent'
+_FALLBACK='{'+specops.io.MARKUP_COMPATIBILITY_NAMESPACE+'}Fallback'
+# footnote and endnote references in the main text, by the part the notes are kept in
+_NOTE_REFERENCES={_W+'footnoteReference': specops.io.FOOTNOTE_SOURCE, _W+'endnoteReference': specops.io.ENDNOTE_SOURCE}
+_NOTES=frozenset((_W+'footnote', _W+'endnote'))
+# notes Word uses for the separator lines above the footnotes and endnotes
+_SEPARATOR_NOTES=frozenset(('separator', 'continuationSeparator', 'continuationNotice'))
+
+# SpreadsheetML element tags and relationship attributes used by the XlsxFileReader
+_S='{'+specops.io.SPREADSHEETML_NAMESPACE+'}'
+_R='{'+specops.io.RELATIONSHIPS_NAMESPACE+'}'
+_PR='{'+specops.io.PACKAGE_RELATIONSHIPS_NAMESPACE+'}'
+
+# characters that are not allowed in XML 1.0 (Word uses some of them as cell and page markers),
+# lone surrogates that can not be encoded in UTF-8 and the noncharacters U+FFFE and U+FFFF
+_ILLEGAL_XML_CHARACTERS=re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+# Office Open XML parts of the Compliance Matrix Workbook
+_XLSX_SHEET_PART='xl/worksheets/sheet1.xml'
+_XLSX_SHEET_START=b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+_XLSX_SHEET_END=b'</sheetData></worksheet>'
+# cell style 1 wraps the text, the same as setting WrapText through Excel
+_XLSX_STYLES=('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/><family val="2"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0" applyAlignment="1"><alignment wrapText="1"/></xf></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>')
+_XLSX_STATIC_PARTS=(
+    ('[Content_Types].xml', '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'),
+    ('_rels/.rels', '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'),
+    ('xl/workbook.xml', '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    ('xl/_rels/workbook.xml.rels', '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'),
+    ('xl/styles.xml', _XLSX_STYLES),
+)
+
+def _escape(text):
+    '''
+    @param text: value of a cell
+    @type text: String
+    @return: the text with &, < and > escaped for XML character data, the same as
+             xml.sax.saxutils.escape, which imports urllib.request and http along with it
+    @rtype: String
+    '''
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+def _paragraphText(paragraph):
+    '''
+    @param paragraph: WordprocessingML paragraph element
+    @type paragraph: Element
+    @return: the text of the paragraph
+    @rtype: String
+    '''
+    fragments=list()
+    for element in paragraph.iter():
+        tag=element.tag
+        if tag == _TEXT:
+            if element.text != None:
+                fragments.append(element.text)
+        elif tag == _TAB:
+            fragments.append('\t')
+        elif tag in _BREAKS:
+            fragments.append('\n')
+    return ''.join(fragments)
+
+def _headingLevels(styles):
+    '''
+    @param styles: styles part of a Word Document
+    @type styles: bytes
+    @return: 0 based outline level of every paragraph style that is a heading, by style ID.
+             Styles based on a heading style are headings of the same level unless they set
+             their own
+    @rtype: dict<String,Int>
+    '''
+    levels=dict()
+    basedOn=dict()
+    for style in XML(styles).iter(_W+'style'):
+        if style.get(_W+'type') != 'paragraph':
+            continue
+        styleId=style.get(_W+'styleId')
+        level=None
+        outlineLevel=style.find(_PARAGRAPH_PROPERTIES+'/'+_OUTLINE_LEVEL)
+        name=style.find(_W+'name')
+        if outlineLevel != None:
+            level=int(outlineLevel.get(_VAL))
+        elif name != None and _HEADING_STYLE.match(name.get(_VAL, '')) != None:
+            level=int(_HEADING_STYLE.match(name.get(_VAL)).group(1))-1
+        parent=style.find(_W+'basedOn')
+        if parent != None:
+            basedOn[styleId]=parent.get(_VAL)
+        if level != None:
+            levels[styleId]=level
+    # inherit the level of the style a style is based on
+    for styleId in basedOn:
+        seen=set()
+        parent=styleId
+        while parent not in levels and parent in basedOn and parent not in seen:
+            seen.add(parent)
+            parent=basedOn[parent]
+        if styleId not in levels and parent in levels:
+            levels[styleId]=levels[parent]
+    # body text has outline level 9
+    return dict((styleId, level) for styleId, level in levels.items() if level < 9)
+
+def _partParagraphs(inputFile, partName):
+    '''
+    @param inputFile: Word Document
+    @type inputFile: String
+    @param partName: header or footer part of the document
+    @type partName: String
+    @return: the text of every paragraph of the part, text boxes included, in part order
+    @rtype: list<String>
+    '''
+    paragraphs=list()
+    # the part is read through a package of its own so parts can be parsed on several workers
+    with zipfile.ZipFile(inputFile, specops.io.READ_ONLY) as package:
+        with package.open(partName) as part:
+            fallbackDepth=0
+            for event, element in iterparse(part, events=('start', 'end')):
+                if element.tag == _FALLBACK:
+                    fallbackDepth=fallbackDepth+(1 if event == 'start' else -1)
+                elif event == 'end' and element.tag == _PARAGRAPH:
+                    if fallbackDepth == 0:
+                        paragraphs.append(_paragraphText(element))
+                    element.clear()
+    return paragraphs
+
+def _noteParagraphs(inputFile, partName):
+    '''
+    @param inputFile: Word Document
+    @type inputFile: String
+    @param partName: footnotes or endnotes part of the document
+    @type partName: String
+    @return: the text of the paragraphs of every note, by note ID
+    @rtype: dict<String,list<String>>
+    '''
+    notes=dict()
+    with zipfile.ZipFile(inputFile, specops.io.READ_ONLY) as package:
+        with package.open(partName) as part:
+            paragraphs=list()
+            fallbackDepth=0
+            for event, element in iterparse(part, events=('start', 'end')):
+                tag=element.tag
+                if tag == _FALLBACK:
+                    fallbackDepth=fallbackDepth+(1 if event == 'start' else -1)
+                elif event == 'start':
+                    continue
+                elif tag == _PARAGRAPH:
+                    if fallbackDepth == 0:
+                        paragraphs.append(_paragraphText(element))
+                    element.clear()
+                elif tag in _NOTES:
+                    if element.get(_W+'type') not in _SEPARATOR_NOTES:
+                        notes[element.get(_W+'id')]=paragraphs
+                    paragraphs=list()
+                    element.clear()
+    return notes
+
+def _cellText(element):
+    '''
+    @param element: SpreadsheetML string item (shared string or inline string)
+    @type element: Element
+    @return: the text of the string, rich text runs joined together, phonetic runs left out
+    @rtype: String
+    '''
+    fragments=list()
+    for child in element:
+        if child.tag == _S+'r':
+            # rich text run
+            child=child.find(_S+'t')
+        elif child.tag != _S+'t':
+            continue
+        if child != None and child.text != None:
+            fragments.append(child.text)
+    return ''.join(fragments)
+
+def _columnIndex(reference):
+    '''
+    @param reference: cell reference, "C5"
+    @type reference: String
+    @return: 0 based column index of the reference, "C5" is 2
+    @rtype: Int
+    '''
+    column=0
+    for character in reference:
+        if not character.isalpha():
+            break
+        column=column*26+(ord(character.upper())-ord('A')+1)
+    return column-1
+
+class DocxFileReader(FileReader):
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Reads the body of a Word Document (*.docx) file straight out of the Office
+              Open XML package.  The document part is stream parsed so that only the
+              paragraph currently being read is held in memory, and Word does not need
+              to be installed.  The section number of every paragraph is worked out from
+              the headings while the document is read (see readSections).
+              
+              Optionally the text boxes, footnotes, endnotes, headers and footers are read
+              too.  The note, header and footer parts are parsed in parallel (on a thread pool,
+              or a process pool when they are large) while the main text is read, and merged
+              into it in document order: headers first, every
+              text box, footnote and endnote right after the paragraph it belongs to, and
+              footers last.
+    '''
+
+    # Word Document package (zip archive)
+    _package=None
+    # read the text boxes, footnotes, endnotes, headers and footers too
+    _allParts=False
+    # workers parsing the note, header and footer parts, None when only the main text is read
+    _executor=None
+    # future paragraphs of the note, header and footer parts, by source
+    _parts=None
+    # generator producing the (section, paragraph, source) of every paragraph of the document
+    _sections=None
+    # generator producing the paragraphs of the document body
+    _paragraphs=None
+    # current line number
+    _lineNumber=0
+    # 0 based outline level of the paragraph styles of the document by style ID, None for the
+    # styles that are not headings
+    _headingLevels=None
+
+    # c'tor
+    def __init__(self, inputFile=None, allParts=False):
+        '''
+        @param inputFile: File where data will be read
+        @type inputFile: String
+        @param allParts: read the text boxes, footnotes, endnotes, headers and footers too.
+                         Otherwise only the paragraphs of Word's Content.Paragraphs (main text
+                         and table cells) are read
+        @type allParts: Boolean
+        __init__: constructor
+        '''
+        super().__init__(inputFile)
+        self._package=None
+        self._allParts=allParts
+        self._executor=None
+        self._parts=None
+        self._sections=None
+        self._paragraphs=None
+        self._lineNumber=0
+        self._headingLevels=None
+
+    def isOpen(self):
+        '''
+        @return: true if file is open, false otherwise
+        @summary: check to see if the file is open for reading
+        '''
+        return self._package != None
+
+    def open(self, inputFile=None):
+        '''
+        @param inputFile: File to open for reading
+        @type inputFile: String
+        @raise IOError: error opening the file or directory
+        @raise Exception: general exception
+        @summary: opens the Word Document package
+        '''
+        if inputFile != None:
+            self.setInputFile(inputFile)
+
+        try:
+            self._package=zipfile.ZipFile(self._inputFile, specops.io.READ_ONLY)
+            # make sure this is really a Word Document before anything is read
+            self._package.getinfo(specops.io.DOCX_DOCUMENT_PART)
+            self._headingLevels=dict()
+            if _DOCX_STYLES_PART in self._package.namelist():
+                self._headingLevels=_headingLevels(self._package.read(_DOCX_STYLES_PART))
+            if self._allParts:
+                self._parseParts()
+            self._sections=self.sections()
+            self._paragraphs=(paragraph for section, paragraph, source in self._sections)
+            self._lineNumber=0
+        except IOError:
+            _log.exception('No such file or directory: \'%s\'', self._inputFile)
+            self._closePackage()
+            return
+        except Exception:
+            _log.exception('General Exception opening Input File: \'%s\'', self._inputFile)
+            self._closePackage()
+            return
+
+    def _parseParts(self):
+        '''
+        @summary: starts parsing the note, header and footer parts of the document on a pool of
+                  workers.  The main text does not wait for them until it needs their paragraphs
+        '''
+        relationships=XML(self._package.read(_DOCX_RELATIONSHIPS_PART)) if _DOCX_RELATIONSHIPS_PART in self._package.namelist() else None
+        partNames=dict((source, list()) for source in _DOCX_PART_SOURCES.values())
+        if relationships != None:
+            for relationship in relationships.iter(_PR+'Relationship'):
+                source=_DOCX_PART_SOURCES.get(relationship.get('Type'))
+                if source == None or relationship.get('TargetMode') == 'External':
+                    continue
+                target=relationship.get('Target')
+                partName=target[1:] if target.startswith('/') else 'word/'+target
+                if partName in self._package.NameToInfo:
+                    partNames[source].append(partName)
+
+        count=sum(len(names) for names in partNames.values())
+        self._parts=dict()
+        if count == 0:
+            return
+        workers=min(count, _PART_WORKERS)
+        size=sum(self._package.getinfo(name).file_size for names in partNames.values() for name in names)
+        if size >= _PART_PROCESS_SIZE and (os.cpu_count() or 1) > 1:
+            self._executor=concurrent.futures.ProcessPoolExecutor(min(workers, os.cpu_count()))
+        else:
+            self._executor=concurrent.futures.ThreadPoolExecutor(workers, 'docx-part')
+        for source, names in partNames.items():
+            # header1.xml, header2.xml, ... header10.xml
+            names.sort(key=lambda name: (len(name), name))
+            parse=_noteParagraphs if source in (specops.io.FOOTNOTE_SOURCE, specops.io.ENDNOTE_SOURCE) else _partParagraphs
+            self._parts[source]=[self._executor.submit(parse, self._inputFile, name) for name in names]
+
+    def _partResults(self, source):
+        '''
+        @param source: HEADER_SOURCE or FOOTER_SOURCE
+        @type source: String
+        @return: the paragraphs of every header or every footer part, waiting for them to be parsed
+        @rtype: generator<String>
+        '''
+        for future in self._parts.get(source, ()):
+            for paragraph in future.result():
+                yield paragraph
+
+    def _noteResults(self, source, noteId):
+        '''
+        @param source: FOOTNOTE_SOURCE or ENDNOTE_SOURCE
+        @type source: String
+        @param noteId: ID of the note
+        @type noteId: String
+        @return: the paragraphs of the note, waiting for the notes part to be parsed
+        @rtype: list<String>
+        '''
+        for future in self._parts.get(source, ()):
+            paragraphs=future.result().get(noteId)
+            if paragraphs != None:
+                return paragraphs
+        return ()
+
+    def _closePackage(self):
+        '''
+        @summary: releases the paragraph generator, the part parsing workers and the zip archive
+        '''
+        if self._paragraphs != None:
+            self._paragraphs.close()
+            self._paragraphs=None
+        if self._sections != None:
+            self._sections.close()
+            self._sections=None
+        if self._executor != None:
+            self._executor.shutdown(True, cancel_futures=True)
+            self._executor=None
+        self._parts=None
+        if self._package != None:
+            self._package.close()
+            self._package=None
+        self._lineNumber=0
+
+    def close(self):
+        '''
+        @raise Exception: general exception
+        @summary: closes the file
+        '''
+        try:
+            self._closePackage()
+        except Exception:
+            _log.exception('General Exception closing Input File: \'%s\'', self._inputFile)
+            return
+
+    def _headingLevel(self, properties):
+        '''
+        @param properties: WordprocessingML paragraph properties element
+        @type properties: Element
+        @return: 0 based outline level of the paragraph, None if it is not a heading
+        @rtype: Int
+        '''
+        outlineLevel=properties.find(_OUTLINE_LEVEL)
+        if outlineLevel != None:
+            level=int(outlineLevel.get(_VAL))
+            return level if level < 9 else None
+        style=properties.find(_PARAGRAPH_STYLE)
+        if style == None:
+            return None
+        styleId=style.get(_VAL)
+        if styleId not in self._headingLevels:
+            # documents without a styles part still name the built in heading styles.  The
+            # answer is kept, None included, so each style is only looked at once
+            match=_HEADING_STYLE.match(styleId)
+            self._headingLevels[styleId]=int(match.group(1))-1 if match != None else None
+        return self._headingLevels[styleId]
+
+    def paragraphs(self):
+        '''
+        @summary: stream parses the document part, yielding the text of every paragraph in
+                  the body (including table cells) in document order.  Text box content is
+                  skipped, the same as Word's Content.Paragraphs collection.  Elements are
+                  cleared as soon as they have been read so memory use stays flat no matter
+                  how large the document is.
+        @return: generator of paragraph strings
+        @rtype: generator<String>
+        '''
+        for section, paragraph, source in self.sections():
+            yield paragraph
+
+    def sections(self):
+        '''
+        @summary: stream parses the document part the same way as paragraphs, keeping track of
+                  the headings (Heading 1 to 9, styles based on them and paragraphs with an
+                  outline level) on the way, so the section numbers cost no extra pass.  When
+                  reading every part, the paragraphs of the other parts are merged in
+        @return: generator of (section number, paragraph string, source).  The section number
+                 is None before the first heading and for headers and footers.  The source is
+                 the part of the document the paragraph comes from (specops.io.*_SOURCE)
+        @rtype: generator<tuple<String,String,String>>
+        '''
+        # greater than zero while inside a text box, or inside content kept for older versions of Word
+        textBoxDepth=0
+        fallbackDepth=0
+        tableDepth=0
+        body=None
+        numbering=OutlineNumbering()
+        section=None
+        allParts=self._allParts
+        # paragraphs of the text boxes and (source, ID) of the notes of the paragraph being read
+        textBoxes=list()
+        notes=list()
+
+        if allParts:
+            for paragraph in self._partResults(specops.io.HEADER_SOURCE):
+                yield None, paragraph, specops.io.HEADER_SOURCE
+
+        with self._package.open(specops.io.DOCX_DOCUMENT_PART) as documentPart:
+            for event, element in iterparse(documentPart, events=('start', 'end')):
+                tag=element.tag
+                if event == 'start':
+                    if tag == _TABLE:
+                        tableDepth=tableDepth+1
+                    elif tag == _TEXT_BOX:
+                        textBoxDepth=textBoxDepth+1
+                    elif tag == _FALLBACK:
+                        fallbackDepth=fallbackDepth+1
+                    elif tag == _BODY:
+                        body=element
+                    continue
+
+                if tag == _PARAGRAPH:
+                    if textBoxDepth == 0 and fallbackDepth == 0:
+                        self._lineNumber=self._lineNumber+1
+                        text=_paragraphText(element)
+                        # only paragraphs with properties can be headings
+                        properties=element.find(_PARAGRAPH_PROPERTIES)
+                        if properties != None:
+                            level=self._headingLevel(properties)
+                            if level != None:
+                                section=numbering.heading(level, text)
+                        yield section, text, specops.io.TABLE_SOURCE if tableDepth != 0 else specops.io.BODY_SOURCE
+                        if len(textBoxes) != 0:
+                            for paragraph in textBoxes:
+                                yield section, paragraph, specops.io.TEXT_BOX_SOURCE
+                            textBoxes=list()
+                        if len(notes) != 0:
+                            for source, noteId in notes:
+                                for paragraph in self._noteResults(source, noteId):
+                                    yield section, paragraph, source
+                            notes=list()
+                        # everything read so far is finished with.  Any table still being
+                        # parsed is only detached from the body, the parser keeps building it
+                        if body != None:
+                            body.clear()
+                    elif allParts and fallbackDepth == 0:
+                        textBoxes.append(_paragraphText(element))
+                    element.clear()
+                elif tag == _TABLE:
+                    tableDepth=tableDepth-1
+                elif tag in _NOTE_REFERENCES:
+                    if allParts:
+                        notes.append((_NOTE_REFERENCES[tag], element.get(_W+'id')))
+                elif tag == _TEXT_BOX or tag == _FALLBACK:
+                    if tag == _TEXT_BOX:
+                        textBoxDepth=textBoxDepth-1
+                    else:
+                        fallbackDepth=fallbackDepth-1
+                    # drop the content so it is not read as part of the anchoring paragraph
+                    element.clear()
+
+        if allParts:
+            for paragraph in self._partResults(specops.io.FOOTER_SOURCE):
+                yield None, paragraph, specops.io.FOOTER_SOURCE
+
+    def readline(self):
+        '''
+        @summary: reads a single paragraph in the Word Document file
+        @return: single paragraph from the word file or None at the end of the document or
+                 if an exception occurs
+        @rtype: String
+        @raise Exception: generic exception indicting something went wrong
+        '''
+        try:
+            return next(self._paragraphs, None)
+        except Exception:
+            _log.exception('General Exception reading Input File: \'%s\'', self._inputFile)
+            return None
+
+    def readlines(self):
+        '''
+        @summary: reads every remaining paragraph in the file.  The paragraphs are produced
+                  lazily so the whole document is never held in memory.
+        @return: generator of paragraphs, empty when the document is not open
+        @rtype: generator<String>
+        @raise Exception: raised while iterating when the document can not be read or parsed
+        '''
+        if self._paragraphs == None:
+            return iter(())
+        return self._paragraphs
+
+    def readSections(self):
+        '''
+        @summary: reads every remaining paragraph in the file along with its section number
+                  and the part of the document it comes from.  Shares its position with
+                  readline and readlines
+        @return: generator of (section number, paragraph, source), empty when the document is
+                 not open
+        @rtype: generator<tuple<String,String,String>>
+        '''
+        if self._sections == None:
+            return iter(())
+        return self._sections
+
+    def __iter__(self):
+        return self.readlines()
+
+    def toString(self):
+        return 'DocxFileReader(FileName='+self._inputFile+',isOpen='+str(self.isOpen())+')'
+
+
+
+class XlsxFileReader(FileReader):
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Reads the rows of the first worksheet of an Excel Workbook (*.xlsx) straight out
+              of the Office Open XML package, for example to update an existing Compliance
+              Matrix.  The worksheet is stream parsed one row at a time.
+    '''
+
+    # Excel Workbook package (zip archive)
+    _package=None
+    # shared strings of the workbook, cells refer to them by index
+    _sharedStrings=None
+    # generator producing the rows of the worksheet
+    _rows=None
+
+    # c'tor
+    def __init__(self, inputFile=None):
+        '''
+        @param inputFile: File where data will be read
+        @type inputFile: String
+        __init__: constructor
+        '''
+        super().__init__(inputFile)
+        self._package=None
+        self._sharedStrings=None
+        self._rows=None
+
+    def isOpen(self):
+        '''
+        @return: true if file is open, false otherwise
+        @summary: check to see if the file is open for reading
+        '''
+        return self._package != None
+
+    def open(self, inputFile=None):
+        '''
+        @param inputFile: File to open for reading
+        @type inputFile: String
+        @raise IOError: error opening the file or directory
+        @raise Exception: general exception
+        @summary: opens the Excel Workbook package
+        '''
+        if inputFile != None:
+            self.setInputFile(inputFile)
+
+        try:
+            self._package=zipfile.ZipFile(self._inputFile, specops.io.READ_ONLY)
+            self._sharedStrings=self._readSharedStrings()
+            self._rows=self.rows(self._firstWorksheet())
+        except IOError:
+            _log.exception('No such file or directory: \'%s\'', self._inputFile)
+            self._closePackage()
+            return
+        except Exception:
+            _log.exception('General Exception opening Input File: \'%s\'', self._inputFile)
+            self._closePackage()
+            return
+
+    def _firstWorksheet(self):
+        '''
+        @return: name of the part holding the first worksheet of the workbook
+        @rtype: String
+        '''
+        workbook=XML(self._package.read('xl/workbook.xml'))
+        sheet=workbook.find(_S+'sheets/'+_S+'sheet')
+        relationshipId=sheet.get(_R+'id')
+        relationships=XML(self._package.read('xl/_rels/workbook.xml.rels'))
+        for relationship in relationships.iter(_PR+'Relationship'):
+            if relationship.get('Id') == relationshipId:
+                target=relationship.get('Target')
+                if target.startswith('/'):
+                    return target[1:]
+                return 'xl/'+target
+        raise IOError('Workbook has no worksheet: '+self._inputFile)
+
+    def _readSharedStrings(self):
+        '''
+        @return: the shared strings of the workbook, empty if it has none
+        @rtype: list<String>
+        '''
+        strings=list()
+        if 'xl/sharedStrings.xml' not in self._package.namelist():
+            return strings
+        with self._package.open('xl/sharedStrings.xml') as part:
+            for event, element in iterparse(part):
+                if element.tag == _S+'si':
+                    strings.append(_cellText(element))
+                    element.clear()
+        return strings
+
+    def _closePackage(self):
+        '''
+        @summary: releases the row generator and the zip archive
+        '''
+        if self._rows != None:
+            self._rows.close()
+            self._rows=None
+        if self._package != None:
+            self._package.close()
+            self._package=None
+        self._sharedStrings=None
+
+    def close(self):
+        '''
+        @raise Exception: general exception
+        @summary: closes the file
+        '''
+        try:
+            self._closePackage()
+        except Exception:
+            _log.exception('General Exception closing Input File: \'%s\'', self._inputFile)
+            return
+
+    def rows(self, worksheet):
+        '''
+        @param worksheet: name of the worksheet part
+        @type worksheet: String
+        @summary: stream parses the worksheet, yielding one row at a time.  Cells are placed by
+                  their column reference, so empty cells Excel left out come back as None
+        @return: generator of rows, each a list of cell values (String, Float or None)
+        @rtype: generator<list<Object>>
+        '''
+        with self._package.open(worksheet) as part:
+            for event, element in iterparse(part):
+                if element.tag != _S+'row':
+                    continue
+                row=list()
+                for cell in element.iter(_S+'c'):
+                    column=_columnIndex(cell.get('r')) if cell.get('r') != None else len(row)
+                    while len(row) < column:
+                        row.append(None)
+                    row.append(self._cellValue(cell))
+                element.clear()
+                yield row
+
+    def _cellValue(self, cell):
+        '''
+        @return: the value of a worksheet cell
+        '''
+        cellType=cell.get('t')
+        if cellType == 'inlineStr':
+            inline=cell.find(_S+'is')
+            return None if inline == None else _cellText(inline)
+        value=cell.find(_S+'v')
+        if value == None or value.text == None:
+            return None
+        if cellType == 's':
+            return self._sharedStrings[int(value.text)]
+        if cellType in ('str', 'e'):
+            return value.text
+        if cellType == 'b':
+            return value.text == '1'
+        return float(value.text)
+
+    def readline(self):
+        '''
+        @summary: reads a single row of the worksheet
+        @return: list of cell values, or None at the end of the worksheet or if an exception occurs
+        @rtype: list<Object>
+        @raise Exception: generic exception indicting something went wrong
+        '''
+        try:
+            return next(self._rows, None)
+        except Exception:
+            _log.exception('General Exception reading Input File: \'%s\'', self._inputFile)
+            return None
+
+    def readlines(self):
+        '''
+        @summary: reads every remaining row of the worksheet.  The rows are produced lazily
+        @return: generator of rows, empty when the workbook is not open
+        @rtype: generator<list<Object>>
+        @raise Exception: raised while iterating when the workbook can not be read or parsed
+        '''
+        if self._rows == None:
+            return iter(())
+        return self._rows
+
+    def __iter__(self):
+        return self.readlines()
+
+    def toString(self):
+        return 'XlsxFileReader(FileName='+self._inputFile+',isOpen='+str(self.isOpen())+')'
+
+class XlsxComplianceMatrixWriter(FileWriter):
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: writes a Compliance Matrix Excel Workbook (*.xlsx) directly as Office Open
+              XML.  Each requirement is written into the worksheet as soon as it arrives,
+              so only the row being written is ever held in memory and Excel does not need
+              to be installed.
+    '''
+
+    # Excel Workbook package (zip archive)
+    _package=None
+    # worksheet part that the requirements are streamed into
+    _sheet=None
+    # next row of the worksheet to write
+    _lastRow=0
+    # headers of the columns written after the Compliance Matrix columns (reviewer columns kept
+    # when an existing matrix is updated)
+    _extraColumns=()
+
+    def __init__(self, outputFile=None, settings=None):
+        '''
+        @param outputFile: File where data will be written
+        @type outputFile: String
+        @param settings: configuration, defaults to the snapshot of the properties file
+        @type settings: Settings
+        __init__: constructor
+        '''
+        self._package=None
+        self._sheet=None
+        self._lastRow=0
+        self._extraColumns=()
+        super().__init__(outputFile, settings)
+
+        if outputFile==None:
+            self.setOutputFile(self._settings.outputFile)
+
+    def setOutputFile(self, outputFile):
+        '''
+        @param outputFile: output file
+        @type outputFile: String
+        setOutputFile: sets the output file where data will be written.  The .xlsx
+                       extension is added when the file has none, the same as Excel's SaveAs
+        '''
+        if outputFile != None and os.path.splitext(outputFile)[1] == '':
+            outputFile=outputFile+'.xlsx'
+        super().setOutputFile(outputFile)
+
+    def isOpen(self):
+        '''
+        @return: true if the file is open, false otherwise
+        @rtype: Boolean
+        isOpen: checks to see if a file is currently open
+        '''
+        return self._package != None
+
+    def open(self, outputFile=None):
+        '''
+        @param outputFile: output file
+        @type outputFile: String
+        @raise IOError: File or directory does not exist or unable to be opened
+        @raise Exception: Some other sort of exception
+        open: creates the workbook package and starts the worksheet
+        '''
+        if outputFile != None:
+            if outputFile != self._outputFile: # make sure it is not the same file
+                self.setOutputFile(outputFile)
+
+        # check to see if the file is already opened
+        if self.isOpen():
+            _log.debug('File \'%s\' already opened', self._outputFile)
+            return;
+
+        try:
+            _log.debug('Opening Output File \'%s\'', self._outputFile)
+            self._package=zipfile.ZipFile(self._outputFile, specops.io.WRITE_ONLY, zipfile.ZIP_DEFLATED)
+            for name, content in _XLSX_STATIC_PARTS:
+                self._package.writestr(name, content)
+            self._sheet=self._package.open(_XLSX_SHEET_PART, specops.io.WRITE_ONLY)
+            self._sheet.write(_XLSX_SHEET_START)
+            self._lastRow=1
+            self._writeHeader()
+        except IOError:
+            _log.exception('No such file or directory: \'%s\'', self._outputFile)
+            self._closePackage()
+            raise
+        except Exception:
+            _log.exception('General Exception opening Writer output File: \'%s\'', self._outputFile)
+            self._closePackage()
+            raise
+
+    def _closePackage(self):
+        '''
+        _closePackage: releases the worksheet stream and the zip archive
+        '''
+        if self._sheet != None:
+            self._sheet.close()
+            self._sheet=None
+        if self._package != None:
+            self._package.close()
+            self._package=None
+
+    def _writeHeader(self):
+        '''
+        @raise Exception: General exception writing the individual cells
+        _writeHeader: writes the column widths and the header row to the worksheet
+        '''
+        columns=list()
+        for column, (header, width, wrapText) in enumerate(COMPLIANCE_MATRIX_COLUMNS, 1):
+            columns.append('<col min="%d" max="%d" width="%s" customWidth="1"/>' % (column, column, width))
+        if len(self._extraColumns) != 0:
+            first=len(COMPLIANCE_MATRIX_COLUMNS)+1
+            columns.append('<col min="%d" max="%d" width="20.0" customWidth="1"/>' % (first, first+len(self._extraColumns)-1))
+        self._sheet.write(('<cols>'+''.join(columns)+'</cols><sheetData>').encode('utf-8'))
+        self._writeRow(self.getHeader(), False)
+
+    def getHeader(self):
+        '''
+        @return: the header row of the worksheet
+        @rtype: list<String>
+        '''
+        return [header for header, width, wrapText in COMPLIANCE_MATRIX_COLUMNS]+list(self._extraColumns)
+
+    def _writeRow(self, values, wrapText=True):
+        '''
+        @param values: cell values of the row, in column order.  None leaves the cell empty,
+                       numbers Excel can not hold (nan, inf) are written as text
+        @type values: list<Object>
+        @param wrapText: apply the wrap text style to the columns that use it
+        @type wrapText: Boolean
+        _writeRow: writes a single row to the worksheet
+        '''
+        row=self._lastRow
+        cells=list()
+        for column, value in enumerate(values, 1):
+            if value == None:
+                continue
+            reference=columnLetter(column)+str(row)
+            style=' s="1"' if wrapText and column <= len(COMPLIANCE_MATRIX_COLUMNS) and COMPLIANCE_MATRIX_COLUMNS[column-1][2] else ''
+            if isinstance(value, bool):
+                cells.append('<c r="%s"%s t="b"><v>%d</v></c>' % (reference, style, value))
+            elif isinstance(value, (int, float)) and math.isfinite(value):
+                cells.append('<c r="%s"%s><v>%s</v></c>' % (reference, style, value))
+            else:
+                text=_escape(_ILLEGAL_XML_CHARACTERS.sub('', str(value)))
+                cells.append('<c r="%s"%s t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>' % (reference, style, text))
+        self._sheet.write(('<row r="%d">%s</row>' % (row, ''.join(cells))).encode('utf-8'))
+        self._lastRow=row+1
+
+    def close(self):
+        '''
+        @raise IOError: File or directory does not exist or unable to be opened
+        @raise Exception: Some other sort of exception
+        close: finishes the worksheet and closes the workbook
+        '''
+        if self.isOpen() == False:
+            _log.debug('File \'%s\' already closed', self._outputFile)
+            return
+
+        try:
+            self.flush()
+            self._sheet.write(_XLSX_SHEET_END)
+
+            _log.debug('Closing Output File \'%s\'', self._outputFile)
+            self._closePackage()
+            self._recordOutput(self._lastRow-2)
+        except IOError:
+            _log.exception('IOError closing Writer output File: \'%s\'', self._outputFile)
+            raise
+        except Exception:
+            _log.exception('General Exception closing Writer output File: \'%s\'', self._outputFile)
+            raise
+
+    def write(self, requirement, classification=None, requirementId=None):
+        '''
+        @param requirement: requirement that will be written to the worksheet
+        @type requirement: String
+        @param classification: requirement keyword found in the requirement
+        @type classification: Classification
+        @param requirementId: ID of the requirement, None to number the requirements by row
+        @type requirementId: String
+        @raise Exception: General exception causing a failure to write
+        write: writes the requirement as the next row of the worksheet
+        '''
+        if self.isOpen() == False:
+            _log.error('Writing Data FAILED.  File not open')
+            return
+
+        try:
+            self._writeRow([self._lastRow-1 if requirementId == None else requirementId, requirement, _keywordCell(classification)])
+        except Exception:
+            _log.exception('General Exception writing Compliance Matrix Writer output File: \'%s\'', self._outputFile)
+            raise
+
+    def flush(self):
+        '''
+        flush: rows are streamed into the workbook as they are written, so there is
+               nothing much to do here
+        '''
+        _log.debug('Flushing Compliance Matrix to Output File: \'%s\'', self._outputFile)
+
+    def update(self, requirements):
+        '''
+        @param requirements: (requirement ID, requirement, classification) of every requirement
+                             of the new revision of the document
+        @type requirements: list<tuple<String,String,Classification>>
+        @return: the differences that were applied
+        @rtype: MatrixUpdate
+        @raise IOError: File or directory does not exist or unable to be opened
+        @raise Exception: Some other sort of exception
+        update: updates the existing Compliance Matrix.  Rows are matched on their requirement
+                ID so the reviewer columns of every requirement that is still there are kept,
+                including columns the reviewers added.  The updated workbook is streamed to a
+                temporary file that then replaces the existing one
+        '''
+        outputFile=self._outputFile
+        temporaryFile=outputFile+'.tmp'
+        try:
+            reader=XlsxFileReader(outputFile)
+            reader.open()
+            if reader.isOpen() == False:
+                raise IOError('Unable to read Compliance Matrix \''+outputFile+'\'')
+            rows=reader.readlines()
+            header=next(rows, list())
+            existingRows=list(rows)
+            reader.close()
+
+            requirements=[(requirementId, requirement, _keywordCell(classification)) for requirementId, requirement, classification in requirements]
+            matrixUpdate=MatrixUpdate(header, existingRows, requirements)
+            known=set(header for header, width, wrapText in COMPLIANCE_MATRIX_COLUMNS)
+            self._extraColumns=tuple(name for name in matrixUpdate.getHeader() if name != '' and name not in known)
+
+            self.open(temporaryFile)
+            for row in matrixUpdate.mergedRows(self.getHeader()):
+                self._writeRow(row)
+            self.close()
+            os.replace(temporaryFile, outputFile)
+
+            _log.debug('Updated Output File \'%s\' %s', outputFile, matrixUpdate)
+            return matrixUpdate
+        except IOError:
+            _log.exception('IOError updating Compliance Matrix output File: \'%s\'', outputFile)
+            raise
+        except Exception:
+            _log.exception('General Exception updating Compliance Matrix output File: \'%s\'', outputFile)
+            raise
+        finally:
+            self._closePackage()
+            if os.path.exists(temporaryFile):
+                os.remove(temporaryFile)
+            self.setOutputFile(outputFile)
+
+    def toString(self):
+        return 'XlsxComplianceMatrixWriter(FileName='+self._outputFile+',isOpen='+str(self.isOpen())+')'
+
+def createReader(inputFile, settings):
+    '''
+    @return: reader of the Word Document (*.docx) package
+    @rtype: DocxFileReader
+    '''
+    return DocxFileReader(inputFile, settings.allParts)
+
+def createWriter(outputFile, settings):
+    '''
+    @return: writer of the Compliance Matrix Excel Workbook (*.xlsx) package
+    @rtype: XlsxComplianceMatrixWriter
+    '''
+    return XlsxComplianceMatrixWriter(outputFile, settings)
@@ -1,27 +1,71 @@
 import specops.io
-import sys
-#import docx
-import win32com.client as win32
+import io
+import os
+import logging
+import csv
+import mmap
+import importlib
+
+_log=logging.getLogger(__name__)
+
+# readers of the backends, imported from the module of their backend the first time they are
+# asked for, so importing this module loads no backend (see specops.io.backends)
+_BACKEND_READERS={'WordDocumentFileReader': 'specops.io.com', 'DocxFileReader': 'specops.io.ooxml',
+                  'XlsxFileReader': 'specops.io.ooxml'}
+
+def __getattr__(name):
+    '''
+    @summary: imports the readers of the backends on first use, for the code importing them
+              from this module
+    '''
+    module=_BACKEND_READERS.get(name)
+    if module == None:
+        raise AttributeError('module '+repr(__name__)+' has no attribute '+repr(name))
+    return getattr(importlib.import_module(module), name)
 
 class FileReader:
     '''    
     @author: Steven Hoffman
     @version: 1.0
-    @summary: reads in a file
+    @summary: reads in a file.  The reader is iterable and produces the lines of the file one
+              at a time, so a file of any size is read in constant memory.  Large files can be
+              memory mapped instead of read through a file buffer.
     '''
     # Filename and path of the file to read in (String)
     _inputFile='NONE'
     # file descriptor
     _file=0
+    # statistics of the conversion, None when they are not collected
+    _stats=None
+    # encoding of the file, None for the platform default (utf-8 when memory mapped)
+    _encoding=None
+    # map the file into memory instead of reading it through a file buffer
+    _memoryMapped=False
+    # memory map of the file when memoryMapped is set
+    _map=None
+    # generator producing the remaining lines of the file
+    _lines=None
+    # newline translation of the file, None translates every line ending to '\n' and '' 
+    # keeps the line endings as they are (see open())
+    _newline=None
 
     #c'tor
-    def __init__(self, inputFile=None):
+    def __init__(self, inputFile=None, encoding=None, memoryMapped=False):
         '''
         @param inputFile: File where data will be read
         @type inputFile: String
+        @param encoding: encoding of the file, None for the platform default (utf-8 when memory mapped)
+        @type encoding: String
+        @param memoryMapped: map the file into memory instead of reading it through a file
+                             buffer, which is faster on large files
+        @type memoryMapped: Boolean
         __init__: constructor
         '''
         self._file=0
+        self._map=None
+        self._lines=None
+        self._encoding=encoding
+        self._memoryMapped=memoryMapped
         self.setInputFile(inputFile)
        
     def setInputFile(self, inputFile):
@@ -32,11 +76,18 @@ class FileReader:
         '''
         # check to make sure a file is not already open
         if self.isOpen():
-            sys.stderr.write('Set new Input File while old input file is open.  Closing current input file'+'\n')
-            self._file.close()
-            self._file=0
+            _log.warning('Set new Input File while old input file is open.  Closing current input file')
+            self.close()
         
         self._inputFile=inputFile
+        
+    def setStats(self, stats):
+        '''
+        @param stats: statistics of the conversion the reader records its stages in, None to 
+                      stop collecting them
+        @type stats: ConversionStats
+        '''
+        self._stats=stats
        
     def isOpen(self):
         '''
@@ -57,16 +108,51 @@ class FileReader:
             self.setInputFile(inputFile)
         
         try:
-            self._file=open(self._inputFile, specops.io.READ_ONLY)
+            if self._memoryMapped:
+                self._file=open(self._inputFile, specops.io.READ_ONLY+specops.io.BINARY)
+                # an empty file can not be mapped
+                if os.fstat(self._file.fileno()).st_size == 0:
+                    self._map=io.BytesIO()
+                else:
+                    self._map=mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._lines=self._mappedLines()
+            else:
+                self._file=open(self._inputFile, specops.io.READ_ONLY, encoding=self._encoding, newline=self._newline)
+                self._lines=iter(self._file)
         except IOError:
-            sys.stderr.write('Exception: '+str(sys.exc_info()[0])+'\n')
-            sys.stderr.write("No such file or directory: '"+self._inputFile+"'\n")
-            self.file=0
+            _log.exception('No such file or directory: \'%s\'', self._inputFile)
+            self._closeFile()
             return
         except Exception:
-            sys.stderr.write('Exception: '+str(sys.exc_info()[0])+'\n')
-            self.file=0
+            _log.exception('General Exception opening Input File: \'%s\'', self._inputFile)
+            self._closeFile()
             return
+
+    def _mappedLines(self):
+        '''
+        @return: the lines of the memory mapped file, decoded and with the same line endings
+                 as when the file is read through a file buffer
+        @rtype: generator<String>
+        '''
+        encoding=self._encoding if self._encoding != None else 'utf-8'
+        translate=self._newline == None
+        for line in iter(self._map.readline, b''):
+            line=line.decode(encoding)
+            if translate and line.endswith('\r\n'):
+                line=line[:-2]+'\n'
+            yield line
+
+    def _closeFile(self):
+        '''
+        @summary: releases the line generator, the memory map and the file
+        '''
+        self._lines=None
+        if self._map != None:
+            self._map.close()
+            self._map=None
+        if self._file != 0:
+            self._file.close()
+            self._file=0
     
     def close(self):
         '''
@@ -74,37 +160,48 @@ class FileReader:
         @summary: closes the file
         '''
         try:
-            self._file.close()
+            self._closeFile()
         except Exception:
-            sys.stderr.write('Exception: '+str(sys.exc_info()[0])+'\n')
+            _log.exception('General Exception closing Input File: \'%s\'', self._inputFile)
             return
         
     def readline(self):
         '''
         @summary: reads a single line in the file
-        @return: a single line in a file, or None if an exception occurs
+        @return: a single line in a file, or None at the end of the file or if an exception occurs
         @rtype: String
         @raise Exception: generic exception indicting something went wrong 
         '''
         try:
-            return self._file.readline()
+            return next(self._lines, None)
         except Exception:
-            sys.stderr.write('Exception: '+str(sys.exc_info()[0])+'\n')
+            _log.exception('General Exception reading Input File: \'%s\'', self._inputFile)
             return None
         
     def readlines(self):
         '''
-        @summary: reads every line in the file
-        @return: list of rows, with each row containing a single line in a file,
-                 or None if an exception occurs
-        @rtype: list<String>
-        @raise Exception: generic exception indicting something went wrong 
+        @summary: reads every remaining line in the file.  The lines are produced lazily so the
+                  whole file is never held in memory.
+        @return: generator of lines, empty when the file is not open
+        @rtype: generator<String>
+        @raise Exception: raised while iterating when the file can not be read or decoded
         '''
-        try:
-            return self._file.readlines()
-        except Exception:
-            sys.stderr.write('Exception: '+str(sys.exc_info()[0])+'\n')
-            return None
+        if self._lines == None:
+            return iter(())
+        return self._lines
+
+    def readSections(self):
+        '''
+        @summary: reads every remaining line in the file along with the number of the section
+                  it is in and the part of the document it comes from.  A plain file has no
+                  sections and is all body
+        @return: generator of (section number, line, source), empty when the file is not open
+        @rtype: generator<tuple<String,String,String>>
+        '''
+        return ((None, line, specops.io.BODY_SOURCE) for line in self.readlines())
+
+    def __iter__(self):
+        return self.readlines()
         
     def __str__(self) :
             return self.toString()
@@ -113,6 +210,9 @@ class FileReader:
         return hash(str(self.__dict__))
 
     def __eq__(self, other) : 
+        # compared to None or to anything else that is not a file reader
+        if not isinstance(other, FileReader):
+            return NotImplemented
         return self.toString()==other.toString()
 
     def toString(self):
@@ -123,19 +223,39 @@ class CsvFileReader(FileReader):
     '''    
     @author: Steven Hoffman
     @version: 1.0
-    @summary: Reads in a CSV file and splits it into fields using a delimiter
+    @summary: Reads in a CSV file and splits it into fields using a delimiter.  Rows are parsed
+              lazily by the csv module, so quoted fields holding the delimiter, quotes or line
+              breaks come back as a single field.
     '''
     # delimiter used to split lines (String)
     _delimiter=','
+    # character escaping the delimiter in unquoted fields, None if the file has none (String)
+    _escapeCharacter=None
+    # generator producing the remaining rows of the file
+    _rows=None
+    # the csv module handles the line endings, including line breaks inside quoted fields
+    _newline=''
 
     # c'tor
-    def __init__(self, inputFile=None):
+    def __init__(self, inputFile=None, delimiter=',', encoding=None, memoryMapped=False, escapeCharacter=None):
         '''
         @param inputFile: File where data will be read
         @type inputFile: String
+        @param delimiter: string used to split each line of the file
+        @type delimiter: String
+        @param encoding: encoding of the file, None for the platform default (utf-8 when memory mapped)
+        @type encoding: String
+        @param memoryMapped: map the file into memory instead of reading it through a file buffer
+        @type memoryMapped: Boolean
+        @param escapeCharacter: character escaping the delimiter in unquoted fields, None if
+                                the file has none
+        @type escapeCharacter: String
         __init__: constructor
         '''
-        super().__init__(inputFile)
+        self._rows=None
+        self._delimiter=delimiter
+        self._escapeCharacter=escapeCharacter
+        super().__init__(inputFile, encoding, memoryMapped)
         
     def setDelimiter(self, delimiter):
         '''
@@ -154,159 +274,56 @@ class CsvFileReader(FileReader):
         '''
         
         return self._delimiter
-    
-    def readline(self):
-        '''
-        @summary: reads a single line in the file, with each line being split based on 
-                  the delimiter
-        @return: list of strings that were split based on the delimiter,
-                 or None if an exception occurs
-        @rtype: list<String>
-        @raise Exception: generic exception indicting something went wrong 
-        '''
-        
-        try:
-            line=super().readLine()        
-            return line.split(self._delimiter)
-        except Exception:
-            sys.stderr.write('Exception: '+str(sys.exc_info()[0])+'\n')
-            return None
-        
-    def readlines(self):
-        '''
-        @summary: reads every line in the file and adds them to a list of rows, with
-                  each row containing a list of strings that were split based on 
-                  the delimiter
-        @return: list of rows, with each row containing a single line in a file.  Each
-                 row containing a list of strings that were split based on the delimiter,
-                 or None if an exception occurs
-        @rtype: list< list<String> >
-        @raise Exception: generic exception indicting something went wrong 
-        '''
-        
-        try:
-            rows=list()
-            for line in super().readlines():
-                rows.append(line.split(self._delimiter))
-        
-            return rows
-        except Exception:
-            sys.stderr.write('Exception: '+str(sys.exc_info()[0])+'\n')
-            return None
-
-    def toString(self):
-        return 'CsvFileReader(FileName='+self._inputFile+',isOpen='+str(self.isOpen())+')'
-        
-        
-class WordDocumentFileReader(FileReader):
-    '''
-    Created on Apr 9, 2012
-    
-    @author: Steven Hoffman
-    @version: 1.0
-    @summary: Reads in a Word Document file and reads the body of the file
-    '''
 
-    # word document to read from
-    _word=None
-    # current line number
-    _lineNumber=0
-    
-    # c'tor
-    def __init__(self, inputFile=None):
-        '''
-        @param inputFile: File where data will be read
-        @type inputFile: String
-        __init__: constructor
-        '''
-        super().__init__(inputFile)
-        self._word=None
-        self._lineNumber=0
-        
-    def isOpen(self):
-        '''
-        @return: true if file is open, false otherwise
-        @summary: check to see if the file is open for reading
-        '''
-        return self._word != None
-    
     def open(self, inputFile=None):
         '''
         @param inputFile: File to open for reading
         @type inputFile: String
-        @raise IOError: error opening the file or directory
-        @raise Exception: general exception 
-        @summary: opens the Word file
+        @summary: opens the file and starts parsing its rows
         '''
-        if inputFile != None:
-            self.setInputFile(inputFile)
-        
-        try:
-            self._word=win32.Dispatch('Word.Application') 
-            self._word.Documents.Open(self._inputFile)
-            # get the total number of paragraphs
-            self._lineNumber=0
-        except IOError:
-            sys.stderr.write('Exception: '+str(sys.exc_info()[0])+'\n')
-            sys.stderr.write("No such file or directory: '"+self._inputFile+"'\n")
-            self.file=0
-            self._word=None
-            self._lineNumber=0
-            return
-        except Exception:
-            sys.stderr.write('Exception: '+str(sys.exc_info()[0])+'\n')
-            self.file=0
-            self._word=None
-            self._lineNumber=0
-            return
-        
-    def close(self):
+        super().open(inputFile)
+        self._rows=None
+        if self.isOpen():
+            self._rows=csv.reader(self._lines, delimiter=self._delimiter, escapechar=self._escapeCharacter)
+
+    def _closeFile(self):
         '''
-        @raise Exception: general exception 
-        @summary: closes the file
+        @summary: releases the row parser and the file
         '''
-        try:
-            # close the open word document
-            self._word.Documents[0].Close()
-        except Exception:
-            sys.stderr.write('Exception: '+str(sys.exc_info()[0])+'\n')
-            return
-        
+        self._rows=None
+        super()._closeFile()
+    
     def readline(self):
         '''
-        @summary: reads a single line in the Word Document file
-        @return: single line from the word file or None if an exception occurs
-        @rtype: String
+        @summary: reads a single row in the file, split into fields based on the delimiter
+        @return: list of strings that were split based on the delimiter, or None at the end of
+                 the file or if an exception occurs
+        @rtype: list<String>
         @raise Exception: generic exception indicting something went wrong 
         '''
         
         try:
-            line=None
-            if self._lineNumber < self._word.Documents[0].Content.Paragraphs.Count:
-                line=str(self._word.Documents[0].Content.Paragraphs[self._lineNumber])
-                self._lineNumber=self._lineNumber+1
-            return line
+            return next(self._rows, None)
         except Exception:
-            sys.stderr.write('Exception: '+str(sys.exc_info()[0])+'\n')
+            _log.exception('General Exception reading Input File: \'%s\'', self._inputFile)
             return None
         
     def readlines(self):
         '''
-        @summary: reads every line in the file and adds them to a list of rows
-        @return: list of rows, with each row containing a single line in a file,
-                 or None if an exception occurs
-        @rtype: list< list<String> >
-        @raise Exception: generic exception indicting something went wrong 
-        '''
-        
-        try:
-            rows=list()
-            for line in self._word.Documents[0].Content.Paragraphs:
-                rows.append( str(line) )
-            return rows
-        except Exception:
-            sys.stderr.write('Exception: '+str(sys.exc_info()[0])+'\n')
-            return None
+        @summary: reads every remaining row in the file, each split into fields based on the
+                  delimiter.  The rows are produced lazily so the whole file is never held in
+                  memory.
+        @return: iterator of rows, each a list of strings that were split based on the
+                 delimiter, empty when the file is not open
+        @rtype: iterator< list<String> >
+        @raise Exception: raised while iterating when the file can not be read or parsed
+        '''
+        if self._rows == None:
+            return iter(())
+        return self._rows
+
+    def __iter__(self):
+        return self.readlines()
 
     def toString(self):
-        return 'WordDocumentFileReader(FileName='+self._inputFile+',isOpen='+str(self.isOpen())+')'
+        return 'CsvFileReader(FileName='+self._inputFile+',delimiter='+repr(self._delimiter)+',isOpen='+str(self.isOpen())+')'
@@ -0,0 +1,220 @@
+import specops.io
+import logging
+import os
+import csv
+from specops.util import Configuration
+from specops.io.reader import CsvFileReader
+from specops.io.writer import FileWriter, COMPLIANCE_MATRIX_COLUMNS, _keywordCell
+from specops.update import MatrixUpdate
+
+_log=logging.getLogger(__name__)
+
+# size of the write buffer of the DelimitedComplianceMatrixWriter
+_DELIMITED_BUFFER_SIZE=1024*1024
+
+class DelimitedComplianceMatrixWriter(FileWriter):
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: writes a Compliance Matrix as delimited text, CSV or TSV.  Rows are streamed to
+              the file as they arrive through a large write buffer, and fields holding the
+              delimiter, a quote or a line break are quoted, so requirements spanning several
+              lines load back as a single field.  Much faster than building a workbook when
+              the matrix is loaded by other tools rather than reviewed in Excel.
+    '''
+
+    # separates the fields of a row
+    _delimiter=','
+    # csv module writer formatting the rows
+    _writer=None
+    # next row of the file to write
+    _lastRow=0
+    # headers of the columns written after the Compliance Matrix columns (reviewer columns kept
+    # when an existing matrix is updated)
+    _extraColumns=()
+
+    def __init__(self, outputFile=None, delimiter=None, settings=None):
+        '''
+        @param outputFile: File where data will be written
+        @type outputFile: String
+        @param delimiter: separates the fields of a row, defaults to the complianceMatrixDelimiter property
+        @type delimiter: String
+        @param settings: configuration, defaults to the snapshot of the properties file
+        @type settings: Settings
+        __init__: constructor
+        '''
+        self._writer=None
+        self._lastRow=0
+        self._extraColumns=()
+        if settings == None:
+            settings=Configuration.INSTANCE.getSettings()
+        self._delimiter=delimiter if delimiter != None else settings.delimiter
+        super().__init__(outputFile, settings)
+
+        if outputFile==None:
+            self.setOutputFile(self._settings.outputFile)
+
+    def setOutputFile(self, outputFile):
+        '''
+        @param outputFile: output file
+        @type outputFile: String
+        setOutputFile: sets the output file where data will be written.  The .csv extension,
+                       or .tsv for any other delimiter, is added when the file has none
+        '''
+        if outputFile != None and os.path.splitext(outputFile)[1] == '':
+            outputFile=outputFile+('.'+specops.io.CSV_FORMAT if self._delimiter == ',' else '.'+specops.io.TSV_FORMAT)
+        super().setOutputFile(outputFile)
+
+    def getDelimiter(self):
+        '''
+        @return: the delimiter separating the fields of a row
+        @rtype: String
+        '''
+        return self._delimiter
+
+    def open(self, outputFile=None):
+        '''
+        @param outputFile: output file
+        @type outputFile: String
+        @raise IOError: File or directory does not exist or unable to be opened
+        @raise Exception: Some other sort of exception
+        open: opens the file for writing and writes the header row
+        '''
+        if outputFile != None:
+            if outputFile != self._outputFile: # make sure it is not the same file
+                self.setOutputFile(outputFile)
+
+        # check to see if the file is already opened
+        if self.isOpen():
+            _log.debug('File \'%s\' already opened', self._outputFile)
+            return;
+
+        try:
+            _log.debug('Opening Output File \'%s\'', self._outputFile)
+            # the csv module does its own line endings
+            self._file=open(self._outputFile, specops.io.WRITE_ONLY, buffering=_DELIMITED_BUFFER_SIZE, encoding='utf-8', newline='')
+            self._writer=csv.writer(self._file, delimiter=self._delimiter, quoting=csv.QUOTE_MINIMAL,
+                                    lineterminator='\r\n' if self._delimiter == ',' else '\n')
+            self._lastRow=1
+            self._writer.writerow(self.getHeader())
+            self._lastRow=2
+        except IOError:
+            _log.exception('No such file or directory: \'%s\'', self._outputFile)
+            raise
+        except Exception:
+            _log.exception('General Exception opening Writer output File: \'%s\'', self._outputFile)
+            raise
+
+    def getHeader(self):
+        '''
+        @return: the header row of the file
+        @rtype: list<String>
+        '''
+        return [header for header, width, wrapText in COMPLIANCE_MATRIX_COLUMNS]+list(self._extraColumns)
+
+    def writeRow(self, values):
+        '''
+        @param values: fields of the row, None for an empty field
+        @type values: list<Object>
+        @raise Exception: General exception causing a failure to write
+        '''
+        self._writer.writerow(values)
+        self._lastRow=self._lastRow+1
+
+    def write(self, requirement, classification=None, requirementId=None):
+        '''
+        @param requirement: requirement that will be written to the file
+        @type requirement: String
+        @param classification: requirement keyword found in the requirement
+        @type classification: Classification
+        @param requirementId: ID of the requirement, None to number the requirements by row
+        @type requirementId: String
+        @raise Exception: General exception causing a failure to write
+        write: writes the requirement as a row, the reviewer columns left empty
+        '''
+        if self.isOpen() == False:
+            _log.error('Writing Data FAILED.  File not open')
+            return
+
+        try:
+            self._writer.writerow((self._lastRow-1 if requirementId == None else requirementId, requirement, _keywordCell(classification), None, None))
+            self._lastRow=self._lastRow+1
+        except Exception:
+            _log.exception('General Exception writing Compliance Matrix Writer output File: \'%s\'', self._outputFile)
+            raise
+
+    def close(self):
+        '''
+        @raise IOError: File or directory does not exist or unable to be opened
+        @raise Exception: Some other sort of exception
+        close: flushes the write buffer and closes the file
+        '''
+        wasOpen=self.isOpen()
+        super().close()
+        self._writer=None
+        if wasOpen:
+            self._recordOutput(self._lastRow-2)
+
+    def update(self, requirements):
+        '''
+        @param requirements: (requirement ID, requirement, classification) of every requirement
+                             of the new revision of the document
+        @type requirements: list<tuple<String,String,Classification>>
+        @return: the differences that were applied
+        @rtype: MatrixUpdate
+        @raise IOError: File or directory does not exist or unable to be opened
+        @raise Exception: Some other sort of exception
+        update: updates the existing Compliance Matrix the way XlsxComplianceMatrixWriter.update
+                does, keeping the reviewer columns of the requirements that are still there
+        '''
+        outputFile=self._outputFile
+        temporaryFile=outputFile+'.tmp'
+        try:
+            reader=CsvFileReader(outputFile, self._delimiter, 'utf-8')
+            reader.open()
+            if reader.isOpen() == False:
+                raise IOError('Unable to read Compliance Matrix \''+outputFile+'\'')
+            rows=reader.readlines()
+            header=next(rows, list())
+            existingRows=list(rows)
+            reader.close()
+
+            requirements=[(requirementId, requirement, _keywordCell(classification)) for requirementId, requirement, classification in requirements]
+            matrixUpdate=MatrixUpdate(header, existingRows, requirements)
+            known=set(header for header, width, wrapText in COMPLIANCE_MATRIX_COLUMNS)
+            self._extraColumns=tuple(name for name in matrixUpdate.getHeader() if name != '' and name not in known)
+
+            self.open(temporaryFile)
+            for row in matrixUpdate.mergedRows(self.getHeader()):
+                self.writeRow(row)
+            self.close()
+            os.replace(temporaryFile, outputFile)
+
+            _log.debug('Updated Output File \'%s\' %s', outputFile, matrixUpdate)
+            return matrixUpdate
+        except IOError:
+            _log.exception('IOError updating Compliance Matrix output File: \'%s\'', outputFile)
+            raise
+        except Exception:
+            _log.exception('General Exception updating Compliance Matrix output File: \'%s\'', outputFile)
+            raise
+        finally:
+            if self.isOpen():
+                self._file.close()
+                self._file=0
+            if os.path.exists(temporaryFile):
+                os.remove(temporaryFile)
+            self.setOutputFile(outputFile)
+
+    def toString(self):
+        return 'DelimitedComplianceMatrixWriter(FileName='+self._outputFile+',delimiter='+repr(self._delimiter)+',isOpen='+str(self.isOpen())+')'
+
+def createWriter(outputFile, settings):
+    '''
+    @return: writer of the Compliance Matrix as comma separated values for the csv format, or
+             separated by complianceMatrixDelimiter for the tsv format
+    @rtype: DelimitedComplianceMatrixWriter
+    '''
+    if settings.outputFormat == specops.io.CSV_FORMAT:
+        return DelimitedComplianceMatrixWriter(outputFile, ',', settings)
+    return DelimitedComplianceMatrixWriter(outputFile, settings=settings)
@@ -1,7 +1,58 @@
 import specops.io
-import sys
+import logging
+import os
+import importlib
 from specops.util import Configuration
-import win32com.client as win32
+
+_log=logging.getLogger(__name__)
+
+# columns of the compliance matrix: (header, column width, wrap the text of the requirement rows)
+COMPLIANCE_MATRIX_COLUMNS=(
+    ('Requirement ID', 20.0, False),
+    ('Requirement', 50.0, True),
+    ('Requirement Keyword', 25.0, False),
+    ('Meets Requirement (Yes / No / Partial)', 35.0, False),
+    ('Comment', 50.0, False),
+)
+
+# writers of the backends, imported from the module of their backend the first time they are
+# asked for, so importing this module loads no backend (see specops.io.backends)
+_BACKEND_WRITERS={'ComplianceMatrixWriter': 'specops.io.com', 'XlsxComplianceMatrixWriter': 'specops.io.ooxml',
+                  'DelimitedComplianceMatrixWriter': 'specops.io.text'}
+
+def __getattr__(name):
+    '''
+    @summary: imports the writers of the backends on first use, for the code importing them
+              from this module
+    '''
+    module=_BACKEND_WRITERS.get(name)
+    if module == None:
+        raise AttributeError('module '+repr(__name__)+' has no attribute '+repr(name))
+    return getattr(importlib.import_module(module), name)
+
+def _keywordCell(classification):
+    '''
+    @param classification: requirement keyword found in the requirement, or None
+    @type classification: Classification
+    @return: the value of the Requirement Keyword cell, None to leave it empty
+    @rtype: String
+    '''
+    if classification == None:
+        return None
+    return classification.toString()
+
+def columnLetter(column):
+    '''
+    @param column: 1 based column number
+    @type column: Int
+    @return: the spreadsheet column letter(s), 1='A', 27='AA'
+    @rtype: String
+    '''
+    letters=''
+    while column > 0:
+        column, remainder=divmod(column-1, 26)
+        letters=chr(ord('A')+remainder)+letters
+    return letters
 
 class FileWriter(object):
     '''    
@@ -13,14 +64,21 @@ class FileWriter(object):
     _outputFile=None
     # file descriptor 
     _file=0
+    # configuration snapshot (Settings)
+    _settings=None
+    # statistics of the conversion, None when they are not collected
+    _stats=None
             
-    def __init__(self, outputFile=None):
+    def __init__(self, outputFile=None, settings=None):
         '''
         @param outputFile: File where data will be written
         @type outputFile: String
+        @param settings: configuration, defaults to the snapshot of the properties file
+        @type settings: Settings
         __init__: constructor
         '''
         self._file=0
+        self._settings=settings if settings != None else Configuration.INSTANCE.getSettings()
         self.setOutputFile(outputFile)
 
     def setOutputFile(self, outputFile):
@@ -34,6 +92,25 @@ class FileWriter(object):
             
         self._outputFile=outputFile
         
+    def setStats(self, stats):
+        '''
+        @param stats: statistics of the conversion the writer records its stages, rows and 
+                      bytes in, None to stop collecting them
+        @type stats: ConversionStats
+        '''
+        self._stats=stats
+        
+    def _recordOutput(self, rows):
+        '''
+        @param rows: number of data rows written
+        @type rows: Int
+        _recordOutput: records the rows written and the size of the output file in the statistics
+        '''
+        if self._stats != None:
+            self._stats.set('rowsWritten', rows)
+            if os.path.isfile(self._outputFile):
+                self._stats.set('bytesWritten', os.path.getsize(self._outputFile))
+
     def isOpen(self):
         '''
         @return: true if the file is open, false otherwise
@@ -56,21 +133,17 @@ class FileWriter(object):
 
         # check to see if the file is already opened
         if self.isOpen():
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('File \''+self._outputFile+'\' already opened\n')
+            _log.debug('File \'%s\' already opened', self._outputFile)
             return;
         
         try:
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Opening Output File \''+self._outputFile+'\'\n')
+            _log.debug('Opening Output File \'%s\'', self._outputFile)
             self._file=open(self._outputFile, specops.io.WRITE_ONLY)
         except IOError:
-            print ('IOError: ', sys.exc_info()[0])    
-            sys.stderr.write('No such file or directory: \'' + self._outputFile + '\'\n')
+            _log.exception('No such file or directory: \'%s\'', self._outputFile)
             raise
         except Exception:
-            print ('Exception: ', sys.exc_info()[0])    
-            sys.stderr.write('General Exception opening Writer output File: \'' + self._outputFile + '\'\n')
+            _log.exception('General Exception opening Writer output File: \'%s\'', self._outputFile)
             raise
 
     def close(self):
@@ -80,25 +153,21 @@ class FileWriter(object):
         open: flushes the buffer and closes the file
         '''  
         if self.isOpen() == False:
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('File \''+self._outputFile+'\' already closed\n')
+            _log.debug('File \'%s\' already closed', self._outputFile)
             return
               
         try:
             # flush data to disk
             self.flush()
             
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Closing Output File \''+self._outputFile+'\'\n')
+            _log.debug('Closing Output File \'%s\'', self._outputFile)
             self._file.close()
             self._file=0  # use this to check is file is open
         except IOError:
-            print ('IOError: ', sys.exc_info()[0])    
-            sys.stderr.write('IOError closing Writer output File: \'' + self._outputFile + '\'\n')
+            _log.exception('IOError closing Writer output File: \'%s\'', self._outputFile)
             raise
         except Exception:
-            print ('Exception: ', sys.exc_info()[0])    
-            sys.stderr.write('General Exception closing Writer output File: \'' + self._outputFile + '\'\n')
+            _log.exception('General Exception closing Writer output File: \'%s\'', self._outputFile)
             raise
 
     def write(self, theString):
@@ -109,23 +178,38 @@ class FileWriter(object):
         write: writes the data to the buffer
         '''
         if self.isOpen() == False:
-            sys.stderr.write('Writing Data FAILED.  File not open')
+            _log.error('Writing Data FAILED.  File not open')
             return
             
         try:
             # write the string to the file immediately
             self._file.write(theString)
         except Exception:
-            print ('Exception: ', sys.exc_info()[0])    
-            sys.stderr.write('General Exception writing Writer ouptut File: \'' + self._outputFile + '\'\n')
+            _log.exception('General Exception writing Writer ouptut File: \'%s\'', self._outputFile)
+            raise
+
+    def writelines(self, strings):
+        ''' 
+        @param strings: strings that will be written to the file, one after the other
+        @type strings: iterable<String>
+        @raise Exception: General exception causing a failure to write
+        writelines: writes a batch of strings to the file
+        '''
+        if self.isOpen() == False:
+            _log.error('Writing Data FAILED.  File not open')
+            return
+            
+        try:
+            self._file.writelines(strings)
+        except Exception:
+            _log.exception('General Exception writing Writer ouptut File: \'%s\'', self._outputFile)
             raise
         
     def flush(self):
         '''
         flush: since all data is immediately written to the file, there is nothing much to do here
         '''
-        if Configuration.INSTANCE.getBoolean('DEBUG', False):
-            sys.stderr.write('Flushing Data to Output File: \'' + self._outputFile + '\'\n')
+        _log.debug('Flushing Data to Output File: \'%s\'', self._outputFile)
             
     def __str__(self) :
             return self.toString()
@@ -134,32 +218,65 @@ class FileWriter(object):
         return hash(str(self.__dict__))
 
     def __eq__(self, other) : 
+        # compared to None or to anything else that is not a file writer
+        if not isinstance(other, FileWriter):
+            return NotImplemented
         return self.toString()==other.toString()
 
     def toString(self):
         return 'FileWriter(FileName='+self._outputFile+',isOpen='+str(self.isOpen())+')'
 
+def _encodedSize(theString):
+    '''
+    @return: number of bytes the string takes in UTF-8, without encoding it when it is ASCII
+    @rtype: Int
+    '''
+    if theString.isascii():
+        return len(theString)
+    return len(theString.encode('utf-8'))
+
 class BufferedFileWriter(FileWriter):
     '''    
     @author: Steven Hoffman
     @version: 1.0
-    @summary: writes to a file using a buffer to improve performance
+    @summary: writes to a file using a buffer to improve performance.  Written strings are
+              kept in a list of chunks, joined only when the buffer is flushed, so the cost of
+              a write does not grow with the amount already buffered.  The file is written in
+              UTF-8 and the buffer is counted in the bytes its strings take there: it is flushed
+              as soon as it holds bufferSize bytes, so no more than that is ever held in memory
+              however large the file gets.  The strings are written as they are, '\n' is not
+              turned into the line separator of the platform.
     '''
     # Filename and path to write the XML (String)
     _outputFile=None
     # file descriptor 
     _file=0
-    # buffer string (String)
-    _buffer=''
+    # strings written since the last flush (list<String>)
+    _buffer=None
+    # number of bytes the strings of the buffer take in UTF-8
+    _bufferedBytes=0
+    # number of bytes the buffer holds before it is flushed (high-water mark)
+    _bufferSize=4*1024*1024
+    # number of bytes flushed to the file since it was opened
+    _bytesWritten=0
             
-    def __init__(self, outputFile=None):
+    def __init__(self, outputFile=None, settings=None, bufferSize=None):
         '''
         @param outputFile: File where data will be written
         @type outputFile: String
+        @param settings: configuration, defaults to the snapshot of the properties file
+        @type settings: Settings
+        @param bufferSize: number of bytes buffered before they are flushed to the file,
+                           defaults to the fileWriterBufferSize property
+        @type bufferSize: Int
         __init__: constructor
         '''
         self._file=0
-        self._buffer=''
+        self._buffer=list()
+        self._bufferedBytes=0
+        self._bytesWritten=0
+        self._settings=settings if settings != None else Configuration.INSTANCE.getSettings()
+        self._bufferSize=max(1, bufferSize if bufferSize != None else self._settings.bufferSize)
         self.setOutputFile(outputFile)
 
     def setOutputFile(self, outputFile):
@@ -187,21 +304,18 @@ class BufferedFileWriter(FileWriter):
 
         # check to see if the file is already opened
         if self.isOpen():
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('File \''+self._outputFile+'\' already opened\n')
+            _log.debug('File \'%s\' already opened', self._outputFile)
             return;
         
         try:
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Opening Output File \''+self._outputFile+'\'\n')
-            self._file=open(self._outputFile, specops.io.WRITE_ONLY)
+            _log.debug('Opening Output File \'%s\'', self._outputFile)
+            self._file=open(self._outputFile, specops.io.WRITE_ONLY+specops.io.BINARY)
+            self._bytesWritten=0
         except IOError:
-            print ('IOError: ', sys.exc_info()[0])    
-            sys.stderr.write('No such file or directory: \'' + self._outputFile + '\'\n')
+            _log.exception('No such file or directory: \'%s\'', self._outputFile)
             raise
         except Exception:
-            print ('Exception: ', sys.exc_info()[0])    
-            sys.stderr.write('General Exception opening Writer output File: \'' + self._outputFile + '\'\n')
+            _log.exception('General Exception opening Writer output File: \'%s\'', self._outputFile)
             raise
 
     def close(self):
@@ -211,25 +325,21 @@ class BufferedFileWriter(FileWriter):
         open: flushes the buffer and closes the file
         '''  
         if self.isOpen() == False:
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('File \''+self._outputFile+'\' already closed\n')
+            _log.debug('File \'%s\' already closed', self._outputFile)
             return
               
         try:
             # flush data to disk
             self.flush()
             
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Closing Output File \''+self._outputFile+'\'\n')
+            _log.debug('Closing Output File \'%s\'', self._outputFile)
             self._file.close()
             self._file=0  # use this to check is file is open
         except IOError:
-            print ('IOError: ', sys.exc_info()[0])    
-            sys.stderr.write('IOError closing Writer output File: \'' + self._outputFile + '\'\n')
+            _log.exception('IOError closing Writer output File: \'%s\'', self._outputFile)
             raise
         except Exception:
-            print ('Exception: ', sys.exc_info()[0])    
-            sys.stderr.write('General Exception closing Writer output File: \'' + self._outputFile + '\'\n')
+            _log.exception('General Exception closing Writer output File: \'%s\'', self._outputFile)
             raise
 
     def write(self, theString):
@@ -237,225 +347,84 @@ class BufferedFileWriter(FileWriter):
         @param theString: string that will be written to the file
         @type theString: String 
         @raise Exception: General exception causing a failure to write
-        write: writes the data to the buffer
+        write: writes the data to the buffer, flushing it once it is full
         '''         
         if self.isOpen() == False:
-            sys.stderr.write('Writing Data FAILED.  File not open')
+            _log.error('Writing Data FAILED.  File not open')
             return
            
         try:
-            self._buffer=self._buffer+theString
+            self._buffer.append(theString)
+            self._bufferedBytes=self._bufferedBytes+_encodedSize(theString)
+            if self._bufferedBytes >= self._bufferSize:
+                self.flush()
         except Exception:
-            print ('Exception: ', sys.exc_info()[0])    
-            sys.stderr.write('General Exception writing Writer ouptut File: \'' + self._outputFile + '\'\n')
+            _log.exception('General Exception writing Writer ouptut File: \'%s\'', self._outputFile)
             raise
-        
-    def flush(self):
-        '''
-        @raise IOError: File or directory does not exist or unable to be opened
-        @raise Exception: Some other sort of exception  
-        flush: writes the data to the file
-        '''
+
+    def writelines(self, strings):
+        ''' 
+        @param strings: strings that will be written to the file, one after the other
+        @type strings: iterable<String>
+        @raise Exception: General exception causing a failure to write
+        writelines: writes a batch of strings to the buffer, flushing it once it is full
+        '''         
+        if self.isOpen() == False:
+            _log.error('Writing Data FAILED.  File not open')
+            return
+           
         try:
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Flushing Data to Output File: \'' + self._outputFile + '\'\n')
-            
-            if self.isOpen():
-                self._file.write(self._buffer)
-                self._buffer='' # clear the buffer
-            else:
-                sys.stderr.write('Flushing Data FAILED.  File not open')
-            
-        except IOError:
-            print ('IOError: ', sys.exc_info()[0])    
-            sys.stderr.write('IOError flushing Writer output File: \'' + self._outputFile + '\'\n')
-            raise
+            buffer=self._buffer
+            bufferSize=self._bufferSize
+            for theString in strings:
+                buffer.append(theString)
+                self._bufferedBytes=self._bufferedBytes+_encodedSize(theString)
+                if self._bufferedBytes >= bufferSize:
+                    self.flush()
+                    buffer=self._buffer
         except Exception:
-            print ('Exception: ', sys.exc_info()[0])    
-            sys.stderr.write('General Exception flushing Writer output File: \'' + self._outputFile + '\'\n')
+            _log.exception('General Exception writing Writer ouptut File: \'%s\'', self._outputFile)
             raise
 
-    def toString(self):
-        return 'BufferedFileWriter(FileName='+self._outputFile+',isOpen='+str(self.isOpen())+')'
-        
-class ComplianceMatrixWriter(FileWriter):
-    '''
-    Created on Apr 9, 2012
-    
-    @author: Steven Hoffman
-    @version: 1.0
-    @summary: writes a Compliance Matrix (CSV file that can be loaded in Excel) 
-    '''
-    
-    # buffer to hold on all requirements that will be written
-    _requirementList=None
-    # Excel Application
-    _excelObject=None
-    # Excel Workbook that will the requirements will be written 
-    _excelWorkbook=None
-    # Excel workbook sheet that the requirements will be written
-    _sheet=None
-    # all the Cells in the Excel Workbook Sheet
-    _cells=None
-    
-    def __init__(self, outputFile=None):
+    def getBytesWritten(self):
         '''
-        @param outputFile: File where data will be written
-        @type outputFile: String
-        __init__: constructor
-        '''
-        super().__init__(outputFile)
-        
-        if outputFile==None:
-            self.setOutputFile(Configuration.INSTANCE.getString('complianceMatrixOutputFile','./complianceMatrix'))
-        
-        self._requirementList=list()
-        
-    def isOpen(self):
+        @return: number of bytes flushed to the file since it was opened
+        @rtype: Int
         '''
-        @return: true if the file is open, false otherwise
-        @rtype: Boolean
-        isOpen: checks to see if a file is currently open
-        '''
-        return self._excelWorkbook != None
-            
-    def open(self, outputFile=None):
-        '''
-        @param outputFile: output file
-        @type outputFile: String
-        @raise IOError: File or directory does not exist or unable to be opened
-        @raise Exception: Some other sort of exception  
-        open: opens the file for writing
-        '''
-        if outputFile != None:
-            if outputFile != self._outputFile: # make sure it is not the same file
-                self.setOutputFile(outputFile)
+        return self._bytesWritten
 
-        # check to see if the file is already opened
-        if self.isOpen():
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('File \''+self._outputFile+'\' already opened\n')
-            return;
-        
-        try:
-            self._excelObject=win32.Dispatch('Excel.Application')
-            self._excelWorkbook=self._excelObject.Workbooks.Add(1) 
-            self._sheet=self._excelWorkbook.ActiveSheet
-            self._cells=self._excelWorkbook.ActiveSheet.Cells
-            self._writeHeader()
-            
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Opening Output File \''+self._outputFile+'\'\n')
-        except IOError:
-            print ('IOError: ', sys.exc_info()[0])    
-            sys.stderr.write('No such file or directory: \'' + self._outputFile + '\'\n')
-            raise
-        except Exception:
-            print ('Exception: ', sys.exc_info()[0])    
-            sys.stderr.write('General Exception opening Writer output File: \'' + self._outputFile + '\'\n')
-            raise
-            
-    def _writeHeader(self):    
+    def getBufferedBytes(self):
         '''
-        @raise Exception: General exception writing the individual cells
-        _writeHeader: writers the header Row to the spreadsheet
-        '''        
-        if self.isOpen() == False:
-            sys.stderr.write('Writing Header Row Data FAILED.  File not open')
-            return
-        
-        try:
-            # writer the header row
-            self._cells(1,1).Value='Requirement ID'
-            self._sheet.Columns("A:A").ColumnWidth=20.0
-            self._cells(1,2).Value='Requirement'
-            self._sheet.Columns("B:B").ColumnWidth=50.0
-            self._cells(1,3).Value='Meets Requirement (Yes / No / Partial)'
-            self._sheet.Columns("C:C").ColumnWidth=35.0
-            self._cells(1,4).Value='Comment'
-            self._sheet.Columns("D:D").ColumnWidth=50.0
-        except Exception:
-            print ('Exception: ', sys.exc_info()[0])
-            sys.stderr.write('General Exception writing Header Row in Writer output File: \'' + self._outputFile + '\'\n')
-            raise
-        
-    def close(self):
+        @return: number of bytes waiting in the buffer
+        @rtype: Int
         '''
-        @raise IOError: File or directory does not exist or unable to be opened
-        @raise Exception: Some other sort of exception  
-        open: flushes the buffer and closes the file
-        '''  
-              
-        try:
-            # flush data to disk
-            self.flush()
-            # format table
-            #self._sheet.ListObjects.Add(1,'$A'+str(self._lastRow)+':$C'+str(self._lastRow),None,1).Name = "Table1"
-            # save file
-            self._excelWorkbook.SaveAs(self._outputFile)
-            # close the saved excel spreadsheet
-            self._excelObject.Workbooks.Close()
-            
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Closing Output File \''+self._outputFile+'\'\n')
-            self._file=0  # use this to check is file is open
-        except IOError:
-            print ('IOError: ', sys.exc_info()[0])    
-            sys.stderr.write('IOError closing Writer output File: \'' + self._outputFile + '\'\n')
-            raise
-        except Exception:
-            print ('Exception: ', sys.exc_info()[0])    
-            sys.stderr.write('General Exception closing Writer output File: \'' + self._outputFile + '\'\n')
-            raise
-                
-    def write(self, requirement):      
-        ''' 
-        @param requirement: string that will be written to the file
-        @type requirement: String 
-        @raise Exception: General exception causing a failure to write
-        write: writes the data to the buffer list
-        '''  
-        if self.isOpen() == False:
-            sys.stderr.write('Writing Data FAILED.  File not open')
-            return
-        
-        try:
-            # add this to the list to be written
-            self._requirementList.append(requirement)
-        except Exception:
-            print ('Exception: ', sys.exc_info()[0])    
-            sys.stderr.write('General Exception writing Compliance Matrix Writer output File: \'' + self._outputFile + '\'\n')
-            raise
+        return self._bufferedBytes
         
-    def flush(self):    
+    def flush(self):
         '''
         @raise IOError: File or directory does not exist or unable to be opened
         @raise Exception: Some other sort of exception  
         flush: writes the data to the file
-        '''      
-        if self.isOpen() == False:
-            sys.stderr.write('Flushing Data FAILED.  File not open')
-            return
-              
+        '''
         try:
-            if Configuration.INSTANCE.getBoolean('DEBUG', False):
-                sys.stderr.write('Flushing Compliance Matrix to Output File: \'' + self._outputFile + '\'\n')
+            _log.debug('Flushing Data to Output File: \'%s\'', self._outputFile)
+            
+            if self.isOpen():
+                if self._bufferedBytes != 0:
+                    data=''.join(self._buffer).encode('utf-8')
+                    self._file.write(data)
+                    self._bytesWritten=self._bytesWritten+len(data)
+                    self._buffer=list() # clear the buffer
+                    self._bufferedBytes=0
+            else:
+                _log.error('Flushing Data FAILED.  File not open')
             
-            lastRow=2
-            for requirement in self._requirementList:
-                self._cells(lastRow,1).Value=str(lastRow-1)
-                self._cells(lastRow,2).Value=requirement   
-                self._cells(lastRow,2).WrapText=True
-                lastRow=lastRow+1              
-            self._requirementList=list() # clear the buffer      
         except IOError:
-            print ('IOError: ', sys.exc_info()[0])    
-            sys.stderr.write('IOError flushing Compliance Matrix output File: \'' + self._outputFile + '\'\n')
+            _log.exception('IOError flushing Writer output File: \'%s\'', self._outputFile)
             raise
         except Exception:
-            print ('Exception: ', sys.exc_info()[0])    
-            sys.stderr.write('General Exception flushing Compliance Matrix output File: \'' + self._outputFile + '\'\n')
+            _log.exception('General Exception flushing Writer output File: \'%s\'', self._outputFile)
             raise
 
     def toString(self):
-        return 'ComplianceMatrixWriter(FileName='+self._outputFile+',isOpen='+str(self.isOpen())+')'
\ No newline at end of file
+        return 'BufferedFileWriter(FileName='+self._outputFile+',isOpen='+str(self.isOpen())+',bufferSize='+str(self._bufferSize)+')'
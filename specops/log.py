@@ -0,0 +1,189 @@
+import os
+import sys
+import copy
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+
+# logger every module logs under (logging.getLogger(__name__) of the specops modules)
+LOGGER_NAME='specops'
+
+# level of every value of the debugLevel property
+LEVELS=(logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR, logging.CRITICAL)
+
+# formats of the log records (logFormat property)
+TEXT_FORMAT='text'
+JSON_FORMAT='json'
+
+# layout of the text records written to the log file, and to stderr when there is none
+_FILE_LAYOUT='%(asctime)s %(process)d %(levelname)-8s %(name)s: %(message)s'
+_STREAM_LAYOUT='%(levelname)s %(name)s: %(message)s'
+
+# attributes every LogRecord has, the others were passed as extra= and go into the JSON records
+_RECORD_ATTRIBUTES=frozenset(logging.LogRecord('', 0, '', 0, '', (), None).__dict__)|frozenset(('message', 'asctime'))
+
+# logging of the process: the handler queueing the records, the listener writing them and the
+# configuration they were set up with
+_handler=None
+_listener=None
+_configuration=None
+_lock=threading.Lock()
+# process the listener is stopped at the exit of
+_exitProcess=None
+
+def levelOf(settings):
+    '''
+    @param settings: configuration of the conversion
+    @type settings: Settings
+    @return: level of the records logged: debugLevel (0=DEBUG to 4=CRITICAL), at least WARNING
+             when DEBUG is off
+    @rtype: Int
+    '''
+    level=LEVELS[min(max(settings.debugLevel, 0), len(LEVELS)-1)]
+    if settings.debug == False:
+        level=max(level, logging.WARNING)
+    return level
+
+class JsonFormatter(logging.Formatter):
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Formats every record as one JSON object per line, for log collectors: time,
+              level, logger, process, thread and message, the traceback when there is one, and
+              every extra= field of the call (job=..., document=...)
+    '''
+
+    def format(self, record):
+        '''
+        @param record: record to format
+        @type record: LogRecord
+        @return: the record as a single line of JSON
+        @rtype: String
+        '''
+        entry={'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created))+('.%03d' % record.msecs),
+               'level': record.levelname, 'logger': record.name, 'process': record.process,
+               'thread': record.threadName, 'message': record.getMessage()}
+        for name, value in record.__dict__.items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name]=value
+        if record.exc_info and not record.exc_text:
+            record.exc_text=self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception']=record.exc_text
+        return json.dumps(entry, default=str)
+
+class _QueueHandler(logging.Handler):
+    '''
+    @summary: Queues the records for the listener thread.  The message is formatted here, only
+              for the records that passed the level, and the traceback rendered, so the record
+              no longer refers to objects the caller may change; the layout (text or JSON) and
+              the write are left to the listener
+    '''
+
+    def __init__(self, recordQueue):
+        logging.Handler.__init__(self)
+        self.queue=recordQueue
+
+    def emit(self, record):
+        try:
+            record=copy.copy(record)
+            record.msg=record.getMessage()
+            record.args=None
+            if record.exc_info:
+                record.exc_text=logging.Formatter().formatException(record.exc_info)
+                record.exc_info=None
+            self.queue.put_nowait(record)
+        except Exception:
+            self.handleError(record)
+
+def _createHandlers(level, logFile, logFormat):
+    '''
+    @return: the handlers the listener writes the records with: the log file, or stderr when
+             there is none.  With a log file the errors still go to stderr too, so a failed
+             conversion is seen on the console
+    @rtype: list<Handler>
+    '''
+    if logFile:
+        directory=os.path.dirname(os.path.abspath(logFile))
+        os.makedirs(directory, exist_ok=True)
+        # the file is created by the first record, a quiet conversion leaves no empty log behind
+        handlers=[logging.FileHandler(logFile, 'a', encoding='utf-8', delay=True)]
+        handlers[0].setFormatter(JsonFormatter() if logFormat == JSON_FORMAT else logging.Formatter(_FILE_LAYOUT))
+        handlers[0].setLevel(level)
+        if level < logging.ERROR:
+            console=logging.StreamHandler(sys.stderr)
+            console.setFormatter(logging.Formatter(_STREAM_LAYOUT))
+            console.setLevel(logging.ERROR)
+            handlers.append(console)
+        return handlers
+    handler=logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if logFormat == JSON_FORMAT else logging.Formatter(_STREAM_LAYOUT))
+    handler.setLevel(level)
+    return [handler]
+
+def configureLogging(settings):
+    '''
+    @param settings: configuration whose DEBUG, debugLevel, logFile and logFormat set up the
+                     logging of the process
+    @type settings: Settings
+    @return: the logger of the converter
+    @rtype: Logger
+    @summary: sets up the logging of the process.  The records below the level are dropped
+              before their message is formatted, the others are queued and written by a
+              listener thread, so a slow disk or console never stalls a conversion.  Calling
+              it again with the same configuration does nothing, so every conversion calls it:
+              worker processes, started by fork or spawn, set up their own listener on their
+              first conversion.  The records still queued are written when the process exits
+    '''
+    global _handler, _listener, _configuration, _exitProcess
+    import logging.handlers
+    configuration=(os.getpid(), levelOf(settings), settings.logFile, settings.logFormat)
+    logger=logging.getLogger(LOGGER_NAME)
+    with _lock:
+        if configuration == _configuration:
+            return logger
+        if _configuration != None and _configuration[0] == os.getpid():
+            # reconfigured in this process, write what the old listener still has
+            _stopListener()
+        elif _handler != None:
+            # forked: the listener thread of the parent does not exist in this process
+            logger.removeHandler(_handler)
+            _handler=None
+            _listener=None
+
+        recordQueue=queue.SimpleQueue()
+        _handler=_QueueHandler(recordQueue)
+        _listener=logging.handlers.QueueListener(recordQueue, *_createHandlers(configuration[1], settings.logFile, settings.logFormat),
+                                                 respect_handler_level=True)
+        _listener.start()
+        logger.addHandler(_handler)
+        logger.setLevel(configuration[1])
+        # the converter writes its own records, an application embedding it keeps its root logger
+        logger.propagate=False
+        if _exitProcess != os.getpid():
+            _exitProcess=os.getpid()
+            atexit.register(_stopListener)
+            if 'multiprocessing.util' in sys.modules:
+                # worker processes of a batch or of the server leave without running atexit
+                sys.modules['multiprocessing.util'].Finalize(None, _stopListener, exitpriority=0)
+        _configuration=configuration
+    return logger
+
+def _stopListener():
+    '''
+    @summary: writes the records still queued, closes the handlers of the listener and
+              detaches the queue handler.  Records logged afterwards use the fallback handler
+              of logging (warnings and errors to stderr) until logging is configured again
+    '''
+    global _handler, _listener, _configuration
+    if _listener != None and _configuration != None and _configuration[0] == os.getpid():
+        logging.getLogger(LOGGER_NAME).removeHandler(_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _handler=None
+        _listener=None
+        _configuration=None
@@ -0,0 +1,85 @@
+import re
+
+# number of heading levels of a Word Document (Heading 1 to Heading 9)
+OUTLINE_LEVELS=9
+# section number Word's list numbering displays in front of a heading, "3.2.1", "3.2.1." or "4"
+_LIST_NUMBER=re.compile(r'\s*(\d+(?:\.\d+)*)\.?(?:\s|$)')
+# section number typed at the start of a heading: numbers joined by dots, "3.2.1 Power", or a
+# number ended by a period and followed by the title, "4. Interfaces".  A title that starts
+# with a number ("2 Hz Sampling", "100 Series") has no section number
+_TYPED_NUMBER=re.compile(r'\s*(\d+(?:\.\d+)+)\.?(?:\s|$)|\s*(\d+)\.\s+\S')
+
+class OutlineNumbering:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Keeps track of the section number of a document while its paragraphs are read
+              in order.  Every heading moves the numbering on the way Word numbers an outline
+              (a Heading 2 after "3.1" is "3.2", a Heading 1 after it is "4"), unless the
+              heading carries its own number, typed in its text or produced by Word's list
+              numbering, with as many parts as the level of the heading, which is then taken
+              as is.  Levels skipped by the document are numbered 0 ("2.0.1").
+    '''
+
+    # number of the current heading at each level
+    _counters=None
+    # section number of the paragraphs read since the last heading, None before the first heading
+    _section=None
+
+    def __init__(self):
+        '''
+        __init__: constructor
+        '''
+        self._counters=[0]*OUTLINE_LEVELS
+        self._section=None
+
+    def heading(self, level, text, number=None):
+        '''
+        @param level: 0 based outline level of the heading, 0 for Heading 1
+        @type level: Int
+        @param text: text of the heading
+        @type text: String
+        @param number: number Word displays in front of the heading ("3.2.1" or "3.2.1."), None
+                       or '' when the heading is not list numbered
+        @type number: String
+        @return: the section number of the heading and of the paragraphs that follow it
+        @rtype: String
+        '''
+        level=min(max(level, 0), OUTLINE_LEVELS-1)
+        if number:
+            match=_LIST_NUMBER.match(number)
+        else:
+            match=_TYPED_NUMBER.match(text)
+        # a number that does not have a part per level is not the number of this heading
+        if match != None and match.group(match.lastindex).count('.') == level:
+            parts=[int(part) for part in match.group(match.lastindex).split('.')]
+            self._counters[:len(parts)]=parts
+            self._counters[len(parts):]=[0]*(OUTLINE_LEVELS-len(parts))
+            self._section=match.group(match.lastindex)
+            return self._section
+        self._counters[level]=self._counters[level]+1
+        for deeper in range(level+1, OUTLINE_LEVELS):
+            self._counters[deeper]=0
+        self._section='.'.join(str(counter) for counter in self._counters[:level+1])
+        return self._section
+
+    def getSection(self):
+        '''
+        @return: section number of the paragraphs read since the last heading, None before the
+                 first heading
+        @rtype: String
+        '''
+        return self._section
+
+    def reset(self):
+        '''
+        @summary: starts the numbering over, ready for the next document
+        '''
+        self._counters=[0]*OUTLINE_LEVELS
+        self._section=None
+
+    def __str__(self):
+        return self.toString()
+
+    def toString(self):
+        return 'OutlineNumbering(section='+str(self._section)+')'
@@ -0,0 +1,487 @@
+import sys
+import logging
+import queue
+import threading
+import collections
+# the process pool is imported on first use (concurrent.futures loads its executors lazily)
+import concurrent.futures
+from specops.cache import paragraphKey
+from specops.requirement import Requirement
+
+_log=logging.getLogger(__name__)
+
+# marks the end of the items sent through a pipeline queue
+_END=object()
+# seconds a blocked stage waits before checking whether the pipeline was stopped
+_POLL_INTERVAL=0.1
+# characters of paragraphs sent to an extraction process at a time.  Chunks are cut on
+# characters rather than paragraphs so a chunk costs about the same to tokenize whatever the
+# length of the paragraphs, and the cost of sending it is shared by enough work
+_CHUNK_CHARACTERS=256*1024
+# most paragraphs of a chunk, for documents of very short paragraphs
+_CHUNK_PARAGRAPHS=8192
+# chunks waiting or being extracted per process, keeps the processes busy without reading
+# the whole document ahead
+_CHUNKS_PER_PROCESS=4
+
+# segmenter and classifier of an extraction process, set once per process by _initializeProcess
+_processSegmenter=None
+_processClassifier=None
+
+def _initializeProcess(segmenter, classifier):
+    '''
+    @summary: keeps the segmenter and classifier in the extraction process, so they are sent
+              to each process once instead of with every chunk
+    '''
+    global _processSegmenter, _processClassifier
+    _processSegmenter=segmenter
+    _processClassifier=classifier
+
+def _extractChunk(paragraphs):
+    '''
+    @param paragraphs: paragraphs of a chunk
+    @type paragraphs: list<String>
+    @return: the requirement spans of every paragraph (see RequirementExtractor.requirementSpans)
+             and the number of sentences of the chunk
+    @rtype: tuple<list<list<list>>,Int>
+    '''
+    segmenter=_processSegmenter
+    classifier=_processClassifier
+    results=list()
+    sentences=0
+    for line in paragraphs:
+        spans=list()
+        for start, end in segmenter.spans(line):
+            sentences=sentences+1
+            classification=classifier.classify(line, start, end)
+            if classification != None:
+                spans.append([start, end, classification.keyword])
+        results.append(spans)
+    return results, sentences
+
+class _Stopped(Exception):
+    '''
+    @summary: raised in a stage when another stage failed and the pipeline is stopping
+    '''
+
+class Pipeline:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Runs generator stages concurrently, each on its own thread, connected by bounded
+              queues.  Items are passed between threads in batches so the cost of the queues
+              is shared by many items, and a stage that gets ahead of the next one blocks once
+              its queue is full, so no more than queueSize batches are ever waiting between
+              two stages however large the input is.  The first item reaches the sink as soon
+              as it has been through every stage, long before the source is exhausted.  The
+              first exception raised by any stage stops the whole pipeline and is raised again
+              by run.
+    '''
+
+    # (name, function) of every stage.  function(items) returns the items of the next stage
+    _stages=None
+    # maximum number of batches waiting in each queue
+    _queueSize=8
+    # number of items sent through the queues at a time
+    _batchSize=256
+    # false to run every stage on the calling thread (COM objects must stay on their thread)
+    _threaded=True
+    # set when a stage failed, tells the other stages to stop
+    _stop=None
+    # first exception raised by a stage
+    _error=None
+
+    def __init__(self, queueSize=8, batchSize=256, threaded=True):
+        '''
+        @param queueSize: maximum number of batches waiting between two stages
+        @type queueSize: Int
+        @param batchSize: number of items sent between two stages at a time
+        @type batchSize: Int
+        @param threaded: run each stage on its own thread.  When false the stages are chained
+                         on the calling thread, producing the same items in the same order
+        @type threaded: Boolean
+        __init__: constructor
+        '''
+        self._stages=list()
+        self._queueSize=max(1, queueSize)
+        self._batchSize=max(1, batchSize)
+        self._threaded=threaded
+        self._stop=None
+        self._error=None
+
+    def addStage(self, name, function):
+        '''
+        @param name: name of the stage, used to name its thread
+        @type name: String
+        @param function: function taking the items of the previous stage and returning (or
+                         yielding) the items of the next one
+        @type function: function
+        @return: the pipeline, so stages can be chained
+        @rtype: Pipeline
+        '''
+        self._stages.append((name, function))
+        return self
+
+    def run(self, source, sink):
+        '''
+        @param source: items fed to the first stage, a streaming reader for example.  It is
+                       iterated on a thread of its own
+        @type source: iterable
+        @param sink: function consuming the items of the last stage, called on the calling thread
+        @type sink: function
+        @return: what the sink returned
+        @rtype: Object
+        @raise Exception: the first exception raised by the source, a stage or the sink
+        '''
+        if self._threaded == False:
+            items=source
+            for name, function in self._stages:
+                items=function(items)
+            return sink(items)
+
+        self._stop=threading.Event()
+        self._error=None
+        threads=list()
+        channel=queue.Queue(self._queueSize)
+        threads.append(threading.Thread(target=self._send, args=(source, channel), name='pipeline-source', daemon=True))
+        for name, function in self._stages:
+            output=queue.Queue(self._queueSize)
+            threads.append(threading.Thread(target=self._stage, args=(function, channel, output), name='pipeline-'+name, daemon=True))
+            channel=output
+        for thread in threads:
+            thread.start()
+
+        try:
+            result=sink(self._receive(channel))
+        except _Stopped:
+            result=None
+        except BaseException:
+            self._fail(sys.exc_info()[1])
+            result=None
+        finally:
+            # the sink may have stopped early, release the stages still producing
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        if self._error != None:
+            raise self._error
+        return result
+
+    def _fail(self, error):
+        '''
+        @summary: records the first failure and stops every stage
+        '''
+        if self._error == None:
+            self._error=error
+        self._stop.set()
+
+    def _stage(self, function, channel, output):
+        '''
+        @summary: body of the thread of a stage
+        '''
+        self._send(function(self._receive(channel)), output)
+
+    def _send(self, items, output):
+        '''
+        @summary: sends the items to the next stage in batches, followed by the end marker
+        '''
+        try:
+            batch=list()
+            for item in items:
+                batch.append(item)
+                if len(batch) >= self._batchSize:
+                    self._put(output, batch)
+                    batch=list()
+            if len(batch) != 0:
+                self._put(output, batch)
+            self._put(output, _END)
+        except _Stopped:
+            return
+        except BaseException:
+            self._fail(sys.exc_info()[1])
+
+    def _put(self, output, batch):
+        '''
+        @summary: puts a batch in the queue, waiting while it is full unless the pipeline stops
+        '''
+        while True:
+            if self._stop.is_set():
+                raise _Stopped()
+            try:
+                output.put(batch, True, _POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def _receive(self, channel):
+        '''
+        @return: the items of the previous stage, one at a time
+        @rtype: generator
+        '''
+        while True:
+            try:
+                batch=channel.get(True, _POLL_INTERVAL)
+            except queue.Empty:
+                if self._stop.is_set():
+                    raise _Stopped()
+                continue
+            if batch is _END:
+                return
+            for item in batch:
+                yield item
+
+    def __str__(self):
+        return self.toString()
+
+    def toString(self):
+        return ('Pipeline(stages='+str([name for name, function in self._stages])+',queueSize='+str(self._queueSize)+
+                ',batchSize='+str(self._batchSize)+',threaded='+str(self._threaded)+')')
+
+class RequirementExtractor:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Pipeline stage turning the paragraphs of a document into its requirement
+              sentences: every paragraph is split into sentences and the sentences holding a
+              requirement keyword are passed on as Requirement records, tagged with the
+              section and source of their paragraph.  Paragraphs whose
+              requirements are already known from the last conversion are not tokenized again.
+    '''
+
+    # splits paragraphs into sentences
+    _segmenter=None
+    # finds the requirement keywords in sentences
+    _classifier=None
+    # log every paragraph and requirement, checked once per document instead of once per paragraph
+    _debug=False
+    # statistics of the conversion, None when they are not collected
+    _stats=None
+
+    def __init__(self, segmenter, classifier, debug=False, stats=None):
+        '''
+        @param segmenter: splits paragraphs into sentences
+        @type segmenter: SentenceSegmenter
+        @param classifier: finds the requirement keywords in sentences
+        @type classifier: RequirementClassifier
+        @param debug: log every paragraph and requirement at the DEBUG level
+        @type debug: Boolean
+        @param stats: statistics the tokenize and classify stages and the sentence and
+                      requirement counts are recorded in, None to not collect them
+        @type stats: ConversionStats
+        __init__: constructor
+        '''
+        self._segmenter=segmenter
+        self._classifier=classifier
+        self._debug=debug
+        self._stats=stats
+
+    def requirementSpans(self, line):
+        '''
+        @param line: paragraph to search for requirements
+        @type line: String
+        @return: [start, end, keyword] of every requirement sentence in the paragraph
+        @rtype: list<list>
+        '''
+        spans=list()
+        # split the line into sentences using '.' as a separator
+        for start, end in self._segmenter.spans(line):
+            # check if this sentence contains a requirement keyword (SHALL, MUST, ...)
+            classification=self._classifier.classify(line, start, end)
+            if classification != None:
+                spans.append([start, end, classification.keyword])
+        return spans
+
+    def _countedRequirementSpans(self, line):
+        '''
+        @summary: requirementSpans timing the tokenize and classify stages apart and counting
+                  the sentences and requirements found
+        '''
+        stats=self._stats
+        with stats.timer('tokenize'):
+            sentences=list(self._segmenter.spans(line))
+        with stats.timer('classify'):
+            spans=list()
+            for start, end in sentences:
+                classification=self._classifier.classify(line, start, end)
+                if classification != None:
+                    spans.append([start, end, classification.keyword])
+        stats.count('sentences', len(sentences))
+        stats.count('requirements', len(spans))
+        return spans
+
+    def extract(self, lines, previousParagraphs=None, currentParagraphs=None):
+        '''
+        @param lines: (section number, paragraph, source) of every paragraph of the document
+                      (see FileReader.readSections)
+        @type lines: iterable<tuple<String,String,String>>
+        @param previousParagraphs: requirement spans of the paragraphs of the last conversion
+                                   keyed by paragraphKey, None when not caching
+        @type previousParagraphs: dict
+        @param currentParagraphs: filled with the requirement spans of every paragraph keyed by
+                                  paragraphKey, None when not caching
+        @type currentParagraphs: dict
+        @return: every requirement of the document, in document order
+        @rtype: generator<Requirement>
+        '''
+        debug=self._debug
+        stats=self._stats
+        # the counting variant is chosen once, so the loop is the same whether statistics
+        # are collected or not
+        requirementSpans=self.requirementSpans if stats == None else self._countedRequirementSpans
+        for paragraphIndex, (section, line, source) in enumerate(lines):
+            if debug:
+                _log.debug('line: %s', line)
+
+            if currentParagraphs != None:
+                # only paragraphs that changed since the last conversion are tokenized
+                key=paragraphKey(line)
+                spans=previousParagraphs.get(key)
+                if spans == None:
+                    spans=requirementSpans(line)
+                elif stats != None:
+                    stats.count('paragraphsCached')
+                    stats.count('requirements', len(spans))
+                currentParagraphs[key]=spans
+            else:
+                spans=requirementSpans(line)
+
+            for start, end, keyword in spans:
+                # It is a requirement
+                if debug:
+                    _log.debug('found a %s statement', keyword.upper())
+                yield Requirement(line, paragraphIndex, start, end, keyword, section, source)
+
+    def toString(self):
+        return 'RequirementExtractor(segmenter='+self._segmenter.toString()+',classifier='+self._classifier.toString()+')'
+
+class ParallelRequirementExtractor(RequirementExtractor):
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: RequirementExtractor tokenizing and classifying the paragraphs on a pool of
+              processes, for documents too large for one core.  The paragraphs are sent in
+              chunks of about the same number of characters, so the chunks are as large for
+              documents of short paragraphs as for those of long ones, and the results are
+              taken back in the order the chunks were sent.  The requirements come out in
+              document order, exactly as the serial extractor produces them, so the IDs and
+              rows of the Compliance Matrix do not depend on the number of processes.  Only
+              the paragraphs that are not cached are sent to the processes, and only a few
+              chunks per process are in flight, so the document is never read far ahead.
+    '''
+
+    # number of extraction processes
+    _processes=1
+    # characters of paragraphs sent to a process at a time
+    _chunkCharacters=_CHUNK_CHARACTERS
+
+    def __init__(self, segmenter, classifier, processes, debug=False, stats=None, chunkCharacters=_CHUNK_CHARACTERS):
+        '''
+        @param segmenter: splits paragraphs into sentences
+        @type segmenter: SentenceSegmenter
+        @param classifier: finds the requirement keywords in sentences
+        @type classifier: RequirementClassifier
+        @param processes: number of extraction processes
+        @type processes: Int
+        @param debug: log every paragraph and requirement at the DEBUG level
+        @type debug: Boolean
+        @param stats: statistics the sentence and requirement counts are recorded in, None to
+                      not collect them.  The tokenize and classify stages run in the processes
+                      and are timed together as the extract stage
+        @type stats: ConversionStats
+        @param chunkCharacters: characters of paragraphs sent to a process at a time
+        @type chunkCharacters: Int
+        __init__: constructor
+        '''
+        super().__init__(segmenter, classifier, debug, stats)
+        self._processes=max(1, processes)
+        self._chunkCharacters=max(1, chunkCharacters)
+
+    def _chunks(self, lines, previousParagraphs, currentParagraphs):
+        '''
+        @return: chunks of (section, paragraph, source, key, spans) of the paragraphs, along with
+                 the paragraphs of the chunk that are not cached, whose spans are None
+        @rtype: generator<tuple<list<list>,list<String>>>
+        '''
+        chunk=list()
+        paragraphs=list()
+        characters=0
+        for section, line, source in lines:
+            key=None
+            spans=None
+            if currentParagraphs != None:
+                key=paragraphKey(line)
+                spans=previousParagraphs.get(key)
+            if spans == None:
+                paragraphs.append(line)
+                characters=characters+len(line)
+            chunk.append([section, line, source, key, spans])
+            if characters >= self._chunkCharacters or len(chunk) >= _CHUNK_PARAGRAPHS:
+                yield chunk, paragraphs
+                chunk=list()
+                paragraphs=list()
+                characters=0
+        if len(chunk) != 0:
+            yield chunk, paragraphs
+
+    def extract(self, lines, previousParagraphs=None, currentParagraphs=None):
+        '''
+        @param lines: (section number, paragraph, source) of every paragraph of the document
+                      (see FileReader.readSections)
+        @type lines: iterable<tuple<String,String,String>>
+        @param previousParagraphs: requirement spans of the paragraphs of the last conversion
+                                   keyed by paragraphKey, None when not caching
+        @type previousParagraphs: dict
+        @param currentParagraphs: filled with the requirement spans of every paragraph keyed by
+                                  paragraphKey, None when not caching
+        @type currentParagraphs: dict
+        @return: every requirement of the document, in document order
+        @rtype: generator<Requirement>
+        '''
+        debug=self._debug
+        stats=self._stats
+        paragraphIndex=0
+        pending=collections.deque()
+        executor=concurrent.futures.ProcessPoolExecutor(self._processes, initializer=_initializeProcess, initargs=(self._segmenter, self._classifier))
+        try:
+            chunks=self._chunks(lines, previousParagraphs, currentParagraphs)
+            while True:
+                # keep every process busy before waiting for the oldest chunk
+                while len(pending) < self._processes*_CHUNKS_PER_PROCESS:
+                    item=next(chunks, None)
+                    if item == None:
+                        break
+                    chunk, paragraphs=item
+                    pending.append((chunk, executor.submit(_extractChunk, paragraphs) if len(paragraphs) != 0 else None))
+                if len(pending) == 0:
+                    break
+
+                chunk, future=pending.popleft()
+                results, sentences=future.result() if future != None else ((), 0)
+                results=iter(results)
+                if stats != None:
+                    stats.count('sentences', sentences)
+                for section, line, source, key, spans in chunk:
+                    if debug:
+                        _log.debug('line: %s', line)
+                    if spans == None:
+                        spans=next(results)
+                    elif stats != None:
+                        stats.count('paragraphsCached')
+                    if currentParagraphs != None:
+                        currentParagraphs[key]=spans
+                    if stats != None:
+                        stats.count('requirements', len(spans))
+
+                    for start, end, keyword in spans:
+                        if debug:
+                            _log.debug('found a %s statement', keyword.upper())
+                        yield Requirement(line, paragraphIndex, start, end, keyword, section, source)
+                    paragraphIndex=paragraphIndex+1
+        finally:
+            # the pipeline may stop early, drop the chunks that were not extracted yet
+            executor.shutdown(True, cancel_futures=True)
+
+    def toString(self):
+        return ('ParallelRequirementExtractor(processes='+str(self._processes)+',chunkCharacters='+str(self._chunkCharacters)+
+                ',segmenter='+self._segmenter.toString()+',classifier='+self._classifier.toString()+')')
@@ -0,0 +1,163 @@
+import hashlib
+
+# separates the section number from the requirement key in a requirement ID
+SECTION_SEPARATOR='-'
+# separates the occurrence number of a repeated requirement from its key
+OCCURRENCE_SEPARATOR='.'
+# bytes of the hash of the normalized requirement in its key (16 hex digits).  Keys of 4 bytes
+# collided about once in 20 matrices of 20000 rows, and which of the two sentences got the
+# occurrence number then depended on their order in the document
+KEY_DIGEST_SIZE=8
+
+def normalizeRequirement(requirement):
+    '''
+    @param requirement: requirement sentence
+    @type requirement: String
+    @return: the requirement in lower case with every run of whitespace replaced by one space,
+             so reformatting a sentence does not change its ID
+    @rtype: String
+    '''
+    return ' '.join(requirement.lower().split())
+
+def requirementKey(requirementId):
+    '''
+    @param requirementId: requirement ID as written in the Compliance Matrix
+    @type requirementId: String
+    @return: the part of the ID derived from the requirement itself, without any section number
+             in front of it.  Rows of two revisions of a matrix are matched on this key
+    @rtype: String
+    '''
+    return str(requirementId).rpartition(SECTION_SEPARATOR)[2]
+
+class Requirement:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: A requirement sentence found in a document, recorded as its paragraph and the
+              offsets of the sentence in it instead of a copy of the sentence.  Requirements
+              of the same paragraph share the paragraph, and the text is only cut out of it
+              when a writer asks for it.  The paragraph index, section number and source are
+              kept so every requirement can be traced back to where it was found.
+    '''
+    __slots__=('paragraph', 'paragraphIndex', 'start', 'end', 'keyword', 'section', 'source', 'requirementId')
+
+    def __init__(self, paragraph, paragraphIndex, start, end, keyword, section=None, source=None, requirementId=None):
+        '''
+        @param paragraph: paragraph the requirement was found in
+        @type paragraph: String
+        @param paragraphIndex: 0 based index of the paragraph in the document, None when the
+                               requirement did not come from reading the document (the cache)
+        @type paragraphIndex: Int
+        @param start: offset of the first character of the requirement in the paragraph
+        @type start: Int
+        @param end: offset after the last character of the requirement in the paragraph
+        @type end: Int
+        @param keyword: requirement keyword found in the requirement
+        @type keyword: String
+        @param section: number of the section of the document the requirement is in ("3.2.1"),
+                        None if it is not under a heading
+        @type section: String
+        @param source: part of the document the paragraph comes from (specops.io.*_SOURCE),
+                       None when not known
+        @type source: String
+        @param requirementId: ID of the requirement, None until it is given one
+        @type requirementId: String
+        __init__: constructor
+        '''
+        self.paragraph=paragraph
+        self.paragraphIndex=paragraphIndex
+        self.start=start
+        self.end=end
+        self.keyword=keyword
+        self.section=section
+        self.source=source
+        self.requirementId=requirementId
+
+    @classmethod
+    def fromText(cls, text, keyword, section=None, source=None):
+        '''
+        @param text: requirement sentence
+        @type text: String
+        @param keyword: requirement keyword found in the requirement
+        @type keyword: String
+        @param section: number of the section of the document the requirement is in
+        @type section: String
+        @param source: part of the document the requirement comes from
+        @type source: String
+        @return: a requirement that is its own paragraph, for requirements that were not just
+                 read from a document
+        @rtype: Requirement
+        '''
+        return cls(text, None, 0, len(text), keyword, section, source)
+
+    def getText(self):
+        '''
+        @return: the requirement sentence
+        @rtype: String
+        '''
+        return self.paragraph[self.start:self.end]
+
+    def __str__(self):
+        return self.toString()
+
+    def toString(self):
+        return ('Requirement(id='+str(self.requirementId)+',section='+str(self.section)+',source='+str(self.source)+',paragraph='+str(self.paragraphIndex)+
+                ',start='+str(self.start)+',end='+str(self.end)+',keyword='+str(self.keyword)+')')
+
+class RequirementIdentifier:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Gives every requirement of a document an ID derived from its normalized text
+              instead of its row number, so inserting or deleting a sentence does not renumber
+              the requirements after it.  A sentence that appears more than once is told
+              apart by the number of times it has been seen so far ("3f2a9c1d07b4e652.2").
+              The number of the section the requirement is in can be put in front of the ID
+              ("3.2.1-3f2a9c1d07b4e652"); rows are still matched on the part after it, so moving a
+              requirement to another section does not lose its review.
+    '''
+
+    # number of times each requirement key has been handed out
+    _occurrences=None
+    # bytes of the hash of the requirement in the key
+    _digestSize=KEY_DIGEST_SIZE
+
+    def __init__(self, digestSize=KEY_DIGEST_SIZE):
+        '''
+        @param digestSize: bytes of the hash of the requirement in the key, 4 for the keys of
+                           the matrices written by older versions
+        @type digestSize: Int
+        __init__: constructor
+        '''
+        self._occurrences=dict()
+        self._digestSize=digestSize
+
+    def nextId(self, requirement, section=None):
+        '''
+        @param requirement: the next requirement sentence of the document
+        @type requirement: String
+        @param section: number of the section the requirement is in, None to leave it out of the ID
+        @type section: String
+        @return: the ID of the requirement
+        @rtype: String
+        '''
+        key=hashlib.blake2b(normalizeRequirement(requirement).encode('utf-8'), digest_size=self._digestSize).hexdigest()
+        occurrence=self._occurrences.get(key, 0)+1
+        self._occurrences[key]=occurrence
+        if occurrence != 1:
+            key=key+OCCURRENCE_SEPARATOR+str(occurrence)
+        if section:
+            return section+SECTION_SEPARATOR+key
+        return key
+
+    def reset(self):
+        '''
+        @summary: forgets every requirement seen so far, ready for the next document
+        '''
+        self._occurrences=dict()
+
+    def __str__(self):
+        return self.toString()
+
+    def toString(self):
+        return 'RequirementIdentifier(requirements='+str(len(self._occurrences))+')'
@@ -0,0 +1,91 @@
+import re
+
+# abbreviations that end in a period without ending the sentence
+DEFAULT_ABBREVIATIONS=('etc.', 'i.e.', 'e.g.')
+
+# whitespace at the beginning of a paragraph
+_LEADING_WHITESPACE=re.compile(r'\s*')
+
+class SentenceSegmenter:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Splits a paragraph into sentences.  The abbreviations and terminators are
+              compiled into a single regular expression once, and each paragraph is
+              scanned in one pass that produces (start, end) offsets into the paragraph
+              instead of copies of it.  A period between two digits ("3.5 seconds",
+              "section 3.2.1") never ends a sentence.
+    '''
+
+    # abbreviations that do not end a sentence (list<String>)
+    _abbreviations=None
+    # characters that end a sentence (String)
+    _terminators='.'
+    # compiled pattern matching the end of a sentence
+    _pattern=None
+
+    def __init__(self, abbreviations=DEFAULT_ABBREVIATIONS, terminators='.'):
+        '''
+        @param abbreviations: abbreviations that end in a terminator without ending the sentence.
+                              Matched case insensitively at the start of a word
+        @type abbreviations: list<String>
+        @param terminators: characters that end a sentence
+        @type terminators: String
+        __init__: constructor
+        '''
+        self._abbreviations=[abbreviation.strip() for abbreviation in abbreviations if abbreviation.strip() != '']
+        self._terminators=terminators
+
+        # a terminator does not end the sentence when it is a decimal point or one of the
+        # periods of an abbreviation.  Every guard is a lookaround anchored on the terminator
+        # just matched, so the scan only stops at terminator characters
+        guards=list()
+        if '.' in terminators:
+            guards.append(r'(?<=\d\.)\d')
+        for abbreviation in self._abbreviations:
+            for index, character in enumerate(abbreviation):
+                if character in terminators:
+                    guard='(?<=\\b'+re.escape(abbreviation[:index+1])+')'
+                    if index+1 < len(abbreviation):
+                        guard=guard+re.escape(abbreviation[index+1:])
+                    guards.append('(?i:'+guard+')')
+        terminator='['+re.escape(terminators)+']'
+        if len(guards) != 0:
+            terminator=terminator+'(?!'+'|'.join(guards)+')'
+        # a run of terminators ends a single sentence, the whitespace after it is skipped
+        self._pattern=re.compile('('+terminator+'['+re.escape(terminators)+r']*)\s*')
+
+    def spans(self, paragraph):
+        '''
+        @param paragraph: paragraph to split into sentences
+        @type paragraph: String
+        @return: (start, end) offsets of each sentence in the paragraph, with the leading
+                 and trailing whitespace of the sentence excluded
+        @rtype: generator<tuple<Int,Int>>
+        '''
+        start=_LEADING_WHITESPACE.match(paragraph).end()
+        for match in self._pattern.finditer(paragraph, start):
+            yield (start, match.end(1))
+            start=match.end()
+
+        # whatever is left after the last terminator is a sentence too
+        end=len(paragraph)
+        while end > start and paragraph[end-1].isspace():
+            end=end-1
+        if end > start:
+            yield (start, end)
+
+    def split(self, paragraph):
+        '''
+        @param paragraph: paragraph to split into sentences
+        @type paragraph: String
+        @return: the sentences of the paragraph
+        @rtype: list<String>
+        '''
+        return [paragraph[start:end] for start, end in self.spans(paragraph)]
+
+    def __str__(self):
+        return self.toString()
+
+    def toString(self):
+        return 'SentenceSegmenter(abbreviations='+str(self._abbreviations)+',terminators='+self._terminators+')'
@@ -0,0 +1,736 @@
+import os
+import sys
+import logging
+import json
+import time
+import shutil
+import signal
+import asyncio
+import secrets
+import multiprocessing
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+import specops.io
+from specops.automation import automationPool, WORD_APPLICATION, EXCEL_APPLICATION
+
+_log=logging.getLogger(__name__)
+
+# states of a job
+QUEUED='queued'
+RUNNING='running'
+DONE='done'
+FAILED='failed'
+TIMEOUT='timeout'
+FINISHED_STATES=frozenset((DONE, FAILED, TIMEOUT))
+
+# content types of the Compliance Matrix by format
+_CONTENT_TYPES={specops.io.XLSX_FORMAT: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                specops.io.CSV_FORMAT: 'text/csv; charset=utf-8',
+                specops.io.TSV_FORMAT: 'text/tab-separated-values; charset=utf-8'}
+_REASONS={200: 'OK', 202: 'Accepted', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found', 405: 'Method Not Allowed',
+          409: 'Conflict', 411: 'Length Required', 413: 'Payload Too Large', 500: 'Internal Server Error',
+          503: 'Service Unavailable'}
+# largest request line and headers of a request
+_HEADER_LIMIT=64*1024
+# seconds a worker is given to stop before it is terminated
+_STOP_TIMEOUT=5.0
+# workers are spawned, not forked: a worker replaced while the server runs would otherwise
+# inherit the sockets of the clients connected, which then never see their response end
+_CONTEXT=multiprocessing.get_context('spawn')
+
+def _isDocumentName(name):
+    '''
+    @param name: file name an uploaded document is saved under (?name=)
+    @type name: String
+    @return: true if the name is a plain file name: no directory, not . or .., no NUL
+    @rtype: Boolean
+    '''
+    return (name not in ('', '.', '..') and '/' not in name and '\\' not in name and '\x00' not in name and
+            os.path.basename(name) == name)
+
+def _isUnder(path, root):
+    '''
+    @param path: real path of a document
+    @type path: String
+    @param root: real path of a directory
+    @type root: String
+    @return: true if the document is in the directory or one of its subdirectories
+    @rtype: Boolean
+    '''
+    try:
+        return os.path.commonpath((path, root)) == root
+    except ValueError:
+        # not on the same drive
+        return False
+
+def _signalGroup(pid, signalNumber):
+    '''
+    @param pid: process ID of a worker
+    @type pid: Int
+    @param signalNumber: signal to send
+    @type signalNumber: Int
+    @return: true if the signal was sent to the process group the worker leads, false where
+             there are no process groups (Windows) or the worker does not lead one yet
+    @rtype: Boolean
+    '''
+    if hasattr(os, 'killpg') == False:
+        return False
+    try:
+        if os.getpgid(pid) != pid:
+            return False
+        os.killpg(pid, signalNumber)
+        return True
+    except OSError:
+        return False
+
+def _serveConversions(connection, convert, backend, useCache, settings):
+    '''
+    @summary: body of a worker process.  Imports and starts everything a conversion needs once
+              (Word and Excel included with the com backend), then converts the documents sent
+              through the connection until it receives None.  Each conversion is answered with
+              its statistics (see ConversionStats.toDict), or an 'error' entry when it raised.
+              The worker leads a process group of its own, so the processes its conversions
+              start are stopped with it
+    '''
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    if backend == specops.io.COM_BACKEND:
+        try:
+            pool=automationPool(settings)
+            for progId in (WORD_APPLICATION, EXCEL_APPLICATION):
+                pool.release(pool.acquire(progId))
+        except Exception:
+            _log.error('Could not start Word/Excel: %s', sys.exc_info()[1])
+    while True:
+        try:
+            inputFile=connection.recv()
+        except EOFError:
+            return
+        if inputFile == None:
+            return
+        try:
+            result=convert(inputFile, backend, useCache, False, settings, True)
+        except Exception:
+            result={'success': False, 'error': str(sys.exc_info()[1])}
+        connection.send(result)
+
+class ConversionTimeout(Exception):
+    '''
+    @summary: raised when a conversion takes longer than the timeout of the server
+    '''
+
+class ConversionWorker:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Worker process converting one document at a time for the server.  The process is
+              started once and kept warm, so the imports, the properties and Word/Excel are
+              paid for once instead of for every document.  A conversion that outlasts its
+              timeout has its process terminated, along with the processes the conversion
+              started, and replaced by a fresh one.
+    '''
+
+    # function converting a single document (see convertDocument in CreateComplianceMatrix)
+    _convert=None
+    # backend of the conversions
+    _backend=None
+    # reuse the requirements extracted from unchanged documents and paragraphs
+    _useCache=True
+    # configuration of the conversions
+    _settings=None
+    # worker process and the server's end of its connection
+    _process=None
+    _connection=None
+
+    def __init__(self, convert, backend, useCache, settings):
+        '''
+        @param convert: module level function converting a single document
+        @type convert: function
+        @param backend: backend of the conversions
+        @type backend: String
+        @param useCache: reuse the requirements extracted from unchanged documents and paragraphs
+        @type useCache: Boolean
+        @param settings: configuration of the conversions
+        @type settings: Settings
+        __init__: constructor
+        '''
+        self._convert=convert
+        self._backend=backend
+        self._useCache=useCache
+        self._settings=settings
+        self._process=None
+        self._connection=None
+
+    def start(self):
+        '''
+        @summary: starts the worker process
+        '''
+        self._connection, workerConnection=_CONTEXT.Pipe()
+        # not a daemon: a conversion may start processes of its own (extractProcesses, the parts
+        # of a large document), stop and _kill shut the worker down instead
+        self._process=_CONTEXT.Process(target=_serveConversions, name='specops-worker',
+                                              args=(workerConnection, self._convert, self._backend, self._useCache, self._settings))
+        self._process.start()
+        workerConnection.close()
+
+    def convert(self, inputFile, timeout=None):
+        '''
+        @param inputFile: Word Document to convert, the Compliance Matrix is written next to it
+        @type inputFile: String
+        @param timeout: seconds the conversion may take, None for no limit
+        @type timeout: Float
+        @return: statistics of the conversion (see ConversionStats.toDict)
+        @rtype: dict
+        @raise ConversionTimeout: the conversion took too long, the worker was replaced
+        @raise Exception: the worker process died, it was replaced
+        '''
+        if self._process == None or self._process.is_alive() == False:
+            self.stop()
+            self.start()
+        try:
+            self._connection.send(inputFile)
+            if self._connection.poll(timeout) == False:
+                raise ConversionTimeout('conversion of '+os.path.basename(inputFile)+' took more than '+str(timeout)+' seconds')
+            return self._connection.recv()
+        except Exception:
+            # the process is stuck or gone, start the next conversion on a fresh one
+            self._kill()
+            raise
+
+    def _kill(self):
+        '''
+        @summary: terminates the worker process straight away, and the processes its conversion
+                  started (extractProcesses, the parts of a large document) through the process
+                  group of the worker.  Whatever is left of them after _STOP_TIMEOUT is killed
+        '''
+        if self._process != None:
+            pid=self._process.pid
+            grouped=pid != None and _signalGroup(pid, signal.SIGTERM)
+            if grouped == False:
+                self._process.terminate()
+            self._process.join(_STOP_TIMEOUT)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join()
+            if grouped:
+                # the worker is gone, its children are still in its group
+                try:
+                    os.killpg(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+            self._process=None
+        if self._connection != None:
+            self._connection.close()
+            self._connection=None
+
+    def stop(self):
+        '''
+        @summary: asks the worker process to finish, terminating it if it does not
+        '''
+        if self._process != None and self._process.is_alive():
+            try:
+                self._connection.send(None)
+                self._process.join(_STOP_TIMEOUT)
+            except Exception:
+                pass
+        self._kill()
+
+    def toString(self):
+        return 'ConversionWorker(backend='+str(self._backend)+',alive='+str(self._process != None and self._process.is_alive())+')'
+
+class ConversionJob:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: A document queued for conversion by the server, and its progress
+    '''
+
+    # ID of the job, also the name of its directory
+    jobId=None
+    # Word Document converted, and the Compliance Matrix written once the job is done
+    inputFile=None
+    outputFile=None
+    # QUEUED, RUNNING, DONE, FAILED or TIMEOUT
+    state=QUEUED
+    # description of the failure
+    error=None
+    # statistics of the conversion (see ConversionStats.toDict)
+    stats=None
+    # time the job was submitted, started and finished
+    submitted=None
+    started=None
+    finished=None
+    # the document was uploaded, its directory is removed with the job
+    uploaded=False
+    # set and replaced every time the state changes, for the clients following the job
+    _changed=None
+
+    def __init__(self, jobId, inputFile, uploaded):
+        '''
+        @param jobId: ID of the job
+        @type jobId: String
+        @param inputFile: Word Document to convert
+        @type inputFile: String
+        @param uploaded: the document was uploaded to the server
+        @type uploaded: Boolean
+        __init__: constructor
+        '''
+        self.jobId=jobId
+        self.inputFile=inputFile
+        self.uploaded=uploaded
+        self.state=QUEUED
+        self.submitted=time.time()
+        self._changed=asyncio.Event()
+
+    def setState(self, state, error=None):
+        '''
+        @param state: new state of the job
+        @type state: String
+        @param error: description of the failure
+        @type error: String
+        '''
+        self.state=state
+        self.error=error
+        if state == RUNNING:
+            self.started=time.time()
+        elif state in FINISHED_STATES:
+            self.finished=time.time()
+        changed=self._changed
+        self._changed=asyncio.Event()
+        changed.set()
+
+    async def waitForChange(self):
+        '''
+        @summary: waits until the state of the job changes
+        '''
+        await self._changed.wait()
+
+    def isFinished(self):
+        '''
+        @return: true once the job is done, failed or timed out
+        @rtype: Boolean
+        '''
+        return self.state in FINISHED_STATES
+
+    def toDict(self):
+        '''
+        @return: the job as plain values, for the JSON responses
+        @rtype: dict
+        '''
+        return {'id': self.jobId, 'state': self.state, 'document': os.path.basename(self.inputFile),
+                'error': self.error, 'submitted': self.submitted, 'started': self.started,
+                'finished': self.finished, 'stats': self.stats}
+
+    def toString(self):
+        return 'ConversionJob(id='+self.jobId+',state='+self.state+')'
+
+class ConversionServer:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Resident conversion service on asyncio, serving a small HTTP/1.1 JSON API over
+              TCP or a Unix socket:
+
+                POST /jobs                   queue a document: the .docx as the body (the
+                                             file name in ?name=), or {"path": "..."} as JSON
+                                             for a document under one of the serverRoots
+                GET  /jobs                   every job and its state
+                GET  /jobs/<id>              state and statistics of a job
+                GET  /jobs/<id>/events       the state of the job, one JSON line every time it
+                                             changes, until the job is finished
+                GET  /jobs/<id>/matrix       the Compliance Matrix of a finished job
+                DELETE /jobs/<id>            forget a finished job and its files
+
+              Jobs are queued to a fixed number of warm worker processes (serverJobs), each
+              converting one document at a time within serverTimeout seconds.  At most
+              serverQueueSize jobs wait, further submissions are refused with 503.  Only the
+              serverKeepJobs most recent finished jobs are kept.  Documents are only
+              converted by path when they are in one of the serverRoots directories, after
+              their symbolic links are resolved; without serverRoots only uploads are accepted.
+    '''
+
+    # function converting a single document (see convertDocument in CreateComplianceMatrix)
+    _convert=None
+    # backend and cache use of the conversions
+    _backend=None
+    _useCache=True
+    # configuration of the conversions and of the server
+    _settings=None
+    # directory the uploaded documents are saved in, one directory per job
+    _directory=None
+    # real paths of the directories documents can be converted by path from
+    _roots=None
+    # warm worker processes
+    _workers=None
+    # threads waiting on the worker processes
+    _threads=None
+    # jobs by ID, in the order they were submitted
+    _jobs=None
+    # jobs waiting for a worker
+    _queue=None
+    # tasks handing the queued jobs to the workers
+    _dispatchers=None
+    _server=None
+
+    def __init__(self, convert, backend=None, useCache=True, settings=None):
+        '''
+        @param convert: module level function converting a single document: convert(inputFile,
+                        backend, useCache, update, settings, collectStats) returning the
+                        statistics of the conversion (see convertDocument in CreateComplianceMatrix)
+        @type convert: function
+        @param backend: backend of the conversions
+        @type backend: String
+        @param useCache: reuse the requirements extracted from unchanged documents and paragraphs
+        @type useCache: Boolean
+        @param settings: configuration of the conversions and of the server, defaults to the
+                         snapshot of the properties file
+        @type settings: Settings
+        __init__: constructor
+        '''
+        if settings == None:
+            from specops.util import Configuration
+            settings=Configuration.INSTANCE.getSettings()
+        self._convert=convert
+        self._backend=backend
+        self._useCache=useCache
+        self._settings=settings
+        self._directory=os.path.abspath(settings.serverDirectory)
+        self._roots=tuple(os.path.realpath(root) for root in settings.serverRoots)
+        self._workers=list()
+        self._jobs=dict()
+        self._dispatchers=list()
+
+    async def start(self, host=None, port=None, socketPath=None):
+        '''
+        @param host: address to listen on, defaults to serverHost
+        @type host: String
+        @param port: port to listen on, defaults to serverPort
+        @type port: Int
+        @param socketPath: Unix socket to listen on instead of a TCP port
+        @type socketPath: String
+        @summary: starts the worker processes and starts listening
+        '''
+        os.makedirs(self._directory, exist_ok=True)
+        jobs=max(1, self._settings.serverJobs)
+        self._queue=asyncio.Queue(max(1, self._settings.serverQueueSize))
+        self._threads=ThreadPoolExecutor(jobs, 'specops-server')
+        for index in range(jobs):
+            worker=ConversionWorker(self._convert, self._backend, self._useCache, self._settings)
+            worker.start()
+            self._workers.append(worker)
+            self._dispatchers.append(asyncio.create_task(self._dispatch(worker)))
+        if socketPath != None:
+            self._server=await asyncio.start_unix_server(self._handle, socketPath, limit=_HEADER_LIMIT)
+        else:
+            self._server=await asyncio.start_server(self._handle, host if host != None else self._settings.serverHost,
+                                                    port if port != None else self._settings.serverPort, limit=_HEADER_LIMIT)
+
+    def getAddresses(self):
+        '''
+        @return: the addresses the server listens on
+        @rtype: list
+        '''
+        return [listener.getsockname() for listener in self._server.sockets]
+
+    async def serveForever(self):
+        '''
+        @summary: serves requests until the task is cancelled
+        '''
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        '''
+        @summary: stops listening, stops the worker processes and fails the jobs still queued
+        '''
+        if self._server != None:
+            self._server.close()
+            await self._server.wait_closed()
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        self._dispatchers=list()
+        for job in self._jobs.values():
+            if job.isFinished() == False:
+                job.setState(FAILED, 'server stopped')
+        loop=asyncio.get_running_loop()
+        for worker in self._workers:
+            await loop.run_in_executor(None, worker.stop)
+        self._workers=list()
+        if self._threads != None:
+            self._threads.shutdown(False, cancel_futures=True)
+
+    async def _dispatch(self, worker):
+        '''
+        @summary: hands the queued jobs to a worker, one at a time
+        '''
+        loop=asyncio.get_running_loop()
+        timeout=self._settings.serverTimeout if self._settings.serverTimeout > 0 else None
+        while True:
+            job=await self._queue.get()
+            if job.isFinished():
+                continue
+            job.setState(RUNNING)
+            try:
+                stats=await loop.run_in_executor(self._threads, worker.convert, job.inputFile, timeout)
+                job.stats=stats
+                if stats.get('success'):
+                    job.outputFile=stats.get('outputFile')
+                    job.setState(DONE)
+                else:
+                    job.setState(FAILED, stats.get('error', 'conversion failed'))
+            except ConversionTimeout:
+                job.setState(TIMEOUT, str(sys.exc_info()[1]))
+            except Exception:
+                job.setState(FAILED, str(sys.exc_info()[1]))
+            # the job, its state and its document are fields of their own in the JSON records
+            _log.log(logging.INFO if job.state == DONE else logging.WARNING, 'Job %s %s %s', job.jobId, job.state,
+                     os.path.basename(job.inputFile), extra={'job': job.jobId, 'state': job.state, 'document': job.inputFile})
+            self._forgetOldJobs()
+
+    def submit(self, inputFile, uploaded=False, jobId=None):
+        '''
+        @param inputFile: Word Document to convert, the Compliance Matrix is written next to it
+        @type inputFile: String
+        @param uploaded: the document was uploaded to the server
+        @type uploaded: Boolean
+        @param jobId: ID of the job, a new one by default
+        @type jobId: String
+        @return: the queued job
+        @rtype: ConversionJob
+        @raise asyncio.QueueFull: serverQueueSize jobs are already waiting
+        '''
+        job=ConversionJob(jobId if jobId != None else secrets.token_hex(8), inputFile, uploaded)
+        self._queue.put_nowait(job)
+        self._jobs[job.jobId]=job
+        return job
+
+    def getJob(self, jobId):
+        '''
+        @return: the job, None if there is no such job
+        @rtype: ConversionJob
+        '''
+        return self._jobs.get(jobId)
+
+    def removeJob(self, jobId):
+        '''
+        @param jobId: ID of a finished job
+        @type jobId: String
+        @summary: forgets the job and removes its uploaded document and Compliance Matrix
+        '''
+        job=self._jobs.pop(jobId, None)
+        if job != None and job.uploaded:
+            shutil.rmtree(os.path.dirname(job.inputFile), ignore_errors=True)
+
+    def _forgetOldJobs(self):
+        '''
+        @summary: removes the oldest finished jobs beyond serverKeepJobs
+        '''
+        finished=[job.jobId for job in self._jobs.values() if job.isFinished()]
+        for jobId in finished[:max(0, len(finished)-self._settings.serverKeepJobs)]:
+            self.removeJob(jobId)
+
+    async def _handle(self, reader, writer):
+        '''
+        @summary: serves a single request of a connection
+        '''
+        try:
+            try:
+                method, path, query, headers=await self._readRequest(reader)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                await self._respond(writer, 400, {'error': 'malformed request'})
+                return
+            await self._route(method, path, query, headers, reader, writer)
+        except ConnectionError:
+            pass
+        except Exception:
+            _log.debug('Request failed: %s', sys.exc_info()[1])
+            try:
+                await self._respond(writer, 500, {'error': str(sys.exc_info()[1])})
+            except Exception:
+                pass
+        finally:
+            writer.close()
+
+    async def _readRequest(self, reader):
+        '''
+        @return: method, path, query parameters and headers (lower case names) of the request
+        @rtype: tuple<String,String,dict,dict>
+        '''
+        head=await reader.readuntil(b'\r\n\r\n')
+        lines=head.decode('latin-1').split('\r\n')
+        method, target, version=lines[0].split(' ')
+        headers=dict()
+        for line in lines[1:]:
+            if line:
+                name, separator, value=line.partition(':')
+                headers[name.strip().lower()]=value.strip()
+        url=urllib.parse.urlsplit(target)
+        query=dict(urllib.parse.parse_qsl(url.query))
+        return method.upper(), urllib.parse.unquote(url.path).rstrip('/'), query, headers
+
+    async def _route(self, method, path, query, headers, reader, writer):
+        '''
+        @summary: answers the request
+        '''
+        parts=[part for part in path.split('/') if part]
+        if len(parts) == 0 or parts[0] != 'jobs' or len(parts) > 3:
+            await self._respond(writer, 404, {'error': 'no such resource'})
+            return
+        if len(parts) == 1:
+            if method == 'POST':
+                await self._submitRequest(query, headers, reader, writer)
+            elif method == 'GET':
+                await self._respond(writer, 200, {'jobs': [job.toDict() for job in self._jobs.values()]})
+            else:
+                await self._respond(writer, 405, {'error': 'use GET or POST'})
+            return
+
+        job=self.getJob(parts[1])
+        if job == None:
+            await self._respond(writer, 404, {'error': 'no such job'})
+        elif len(parts) == 2 and method == 'GET':
+            await self._respond(writer, 200, job.toDict())
+        elif len(parts) == 2 and method == 'DELETE':
+            if job.isFinished() == False:
+                await self._respond(writer, 409, {'error': 'job is not finished'})
+            else:
+                self.removeJob(job.jobId)
+                await self._respond(writer, 200, {'id': job.jobId, 'removed': True})
+        elif len(parts) == 3 and parts[2] == 'events' and method == 'GET':
+            await self._streamEvents(job, writer)
+        elif len(parts) == 3 and parts[2] == 'matrix' and method == 'GET':
+            await self._sendMatrix(job, writer)
+        else:
+            await self._respond(writer, 404, {'error': 'no such resource'})
+
+    async def _submitRequest(self, query, headers, reader, writer):
+        '''
+        @summary: queues the uploaded document, or the document at the path of the JSON body
+        '''
+        if 'content-length' not in headers:
+            await self._respond(writer, 411, {'error': 'Content-Length required'})
+            return
+        try:
+            length=int(headers['content-length'])
+        except ValueError:
+            length=-1
+        if length < 0:
+            await self._respond(writer, 400, {'error': 'invalid Content-Length'})
+            return
+        if length > self._settings.serverMaxUpload:
+            await self._respond(writer, 413, {'error': 'document larger than '+str(self._settings.serverMaxUpload)+' bytes'})
+            return
+        body=await reader.readexactly(length)
+
+        # the request is checked before anything is written or queued
+        inputFile=None
+        name=None
+        if headers.get('content-type', '').split(';')[0].strip() == 'application/json':
+            try:
+                payload=json.loads(body.decode('utf-8'))
+            except (ValueError, UnicodeDecodeError):
+                await self._respond(writer, 400, {'error': 'the body is not JSON'})
+                return
+            if isinstance(payload, dict) == False:
+                await self._respond(writer, 400, {'error': 'expected a JSON object with the path of the document'})
+                return
+            inputFile=payload.get('path')
+            if isinstance(inputFile, str) == False or inputFile == '' or '\x00' in inputFile:
+                await self._respond(writer, 400, {'error': 'no such document: '+str(inputFile)})
+                return
+            # checked before the document is looked for, so nothing is told about other files
+            inputFile=os.path.realpath(inputFile)
+            if any(_isUnder(inputFile, root) for root in self._roots) == False:
+                await self._respond(writer, 403, {'error': 'documents are only converted by path under serverRoots'})
+                return
+            if os.path.isfile(inputFile) == False:
+                await self._respond(writer, 400, {'error': 'no such document: '+payload['path']})
+                return
+        else:
+            name=query.get('name') or 'document.docx'
+            if _isDocumentName(name) == False:
+                await self._respond(writer, 400, {'error': 'invalid document name: '+name})
+                return
+        if self._queue.full():
+            await self._respond(writer, 503, {'error': 'too many jobs queued'})
+            return
+
+        jobId=secrets.token_hex(8)
+        if inputFile != None:
+            job=self.submit(inputFile, False, jobId)
+        else:
+            directory=os.path.join(self._directory, jobId)
+            os.makedirs(directory)
+            inputFile=os.path.join(directory, name)
+            with open(inputFile, 'wb') as document:
+                document.write(body)
+            job=self.submit(inputFile, True, jobId)
+        await self._respond(writer, 202, job.toDict())
+
+    async def _streamEvents(self, job, writer):
+        '''
+        @summary: writes the state of the job as a JSON line every time it changes, until the
+                  job is finished
+        '''
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n')
+        while True:
+            writer.write(json.dumps(job.toDict()).encode('utf-8')+b'\n')
+            await writer.drain()
+            if job.isFinished():
+                return
+            await job.waitForChange()
+
+    async def _sendMatrix(self, job, writer):
+        '''
+        @summary: sends the Compliance Matrix of a finished job
+        '''
+        if job.state != DONE:
+            await self._respond(writer, 409, {'error': 'job is '+job.state, 'state': job.state})
+            return
+        with open(job.outputFile, 'rb') as matrix:
+            data=matrix.read()
+        extension=os.path.splitext(job.outputFile)[1].lstrip('.').lower()
+        await self._respond(writer, 200, data, _CONTENT_TYPES.get(extension, 'application/octet-stream'),
+                            {'Content-Disposition': 'attachment; filename="'+os.path.basename(job.outputFile)+'"'})
+
+    async def _respond(self, writer, status, body, contentType='application/json', headers=None):
+        '''
+        @param status: HTTP status code
+        @type status: Int
+        @param body: JSON value, or the bytes of the body
+        @type body: Object
+        @summary: writes a complete response and closes the connection
+        '''
+        if isinstance(body, bytes) == False:
+            body=json.dumps(body).encode('utf-8')
+        head='HTTP/1.1 %d %s\r\nContent-Type: %s\r\nContent-Length: %d\r\nConnection: close\r\n' % (status, _REASONS.get(status, ''), contentType, len(body))
+        for name, value in (headers or dict()).items():
+            head=head+name+': '+value+'\r\n'
+        writer.write(head.encode('latin-1')+b'\r\n'+body)
+        await writer.drain()
+
+    def toString(self):
+        return ('ConversionServer(workers='+str(len(self._workers))+',jobs='+str(len(self._jobs))+
+                ',queued='+str(self._queue.qsize() if self._queue != None else 0)+')')
+
+def runServer(convert, backend=None, useCache=True, settings=None, host=None, port=None, socketPath=None):
+    '''
+    @param convert: module level function converting a single document (see ConversionServer)
+    @type convert: function
+    @param socketPath: Unix socket to listen on instead of host and port
+    @type socketPath: String
+    @summary: runs the conversion server until it is interrupted
+    '''
+    async def serve():
+        server=ConversionServer(convert, backend, useCache, settings)
+        await server.start(host, port, socketPath)
+        for address in server.getAddresses():
+            print('Serving Compliance Matrix conversions on '+str(address))
+        try:
+            await server.serveForever()
+        finally:
+            await server.stop()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
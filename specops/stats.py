@@ -0,0 +1,251 @@
+import logging
+import json
+import time
+import contextlib
+
+_log=logging.getLogger(__name__)
+
+# functions called with the statistics of every finished conversion (see addStatsHook)
+_HOOKS=list()
+
+# timer of the stages of a component that is not collecting statistics
+NO_TIMER=contextlib.nullcontext()
+
+def stageTimer(stats, stage):
+    '''
+    @param stats: statistics of the conversion, None when they are not collected
+    @type stats: ConversionStats
+    @param stage: name of the stage
+    @type stage: String
+    @return: context manager adding the wall time of its block to the stage, or one doing
+             nothing when statistics are not collected
+    @rtype: context manager
+    '''
+    if stats == None:
+        return NO_TIMER
+    return stats.timer(stage)
+
+def addStatsHook(hook):
+    '''
+    @param hook: function called with the dictionary of a ConversionStats (see
+                 ConversionStats.toDict) whenever a conversion that collects statistics ends.
+                 Lets a job runner gather the numbers without parsing --stats output
+    @type hook: function
+    '''
+    if hook not in _HOOKS:
+        _HOOKS.append(hook)
+
+def removeStatsHook(hook):
+    '''
+    @param hook: function previously added with addStatsHook
+    @type hook: function
+    '''
+    if hook in _HOOKS:
+        _HOOKS.remove(hook)
+
+class ConversionStats:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Wall time per stage and counters (paragraphs read, sentences, requirements,
+              rows and bytes written, ...) of a single conversion.  Statistics are only
+              collected when a ConversionStats is handed to the components; without one
+              they run their plain code paths, so switching statistics off costs nothing.
+    '''
+
+    # Word Document converted
+    inputFile=None
+    # Compliance Matrix written
+    outputFile=None
+    # true if the conversion succeeded
+    success=None
+    # accumulated seconds of each stage, in the order the stages were first timed
+    _timers=None
+    # value of each counter
+    _counters=None
+    # time the statistics were created
+    _start=0.0
+
+    def __init__(self, inputFile=None, outputFile=None):
+        '''
+        @param inputFile: Word Document converted
+        @type inputFile: String
+        @param outputFile: Compliance Matrix written
+        @type outputFile: String
+        __init__: constructor
+        '''
+        self.inputFile=inputFile
+        self.outputFile=outputFile
+        self.success=None
+        self._timers=dict()
+        self._counters=dict()
+        self._start=time.perf_counter()
+
+    def add(self, stage, seconds):
+        '''
+        @param stage: name of the stage
+        @type stage: String
+        @param seconds: wall time spent in the stage
+        @type seconds: Float
+        '''
+        self._timers[stage]=self._timers.get(stage, 0.0)+seconds
+
+    def count(self, counter, value=1):
+        '''
+        @param counter: name of the counter
+        @type counter: String
+        @param value: amount added to the counter
+        @type value: Int
+        '''
+        self._counters[counter]=self._counters.get(counter, 0)+value
+
+    def set(self, counter, value):
+        '''
+        @param counter: name of the counter
+        @type counter: String
+        @param value: new value of the counter
+        @type value: Int
+        '''
+        self._counters[counter]=value
+
+    def timer(self, stage):
+        '''
+        @param stage: name of the stage
+        @type stage: String
+        @return: context manager adding the wall time of its block to the stage
+        @rtype: StageTimer
+        '''
+        return StageTimer(self, stage)
+
+    def timed(self, stage, function):
+        '''
+        @param stage: name of the stage
+        @type stage: String
+        @param function: function whose calls are timed
+        @type function: function
+        @return: function calling the given one and adding the time of every call to the stage
+        @rtype: function
+        '''
+        clock=time.perf_counter
+        timers=self._timers
+        timers.setdefault(stage, 0.0)
+        def call(*arguments):
+            start=clock()
+            try:
+                return function(*arguments)
+            finally:
+                timers[stage]=timers[stage]+clock()-start
+        return call
+
+    def iterate(self, stage, iterable, counter=None):
+        '''
+        @param stage: name of the stage
+        @type stage: String
+        @param iterable: items to iterate over, a streaming reader for example
+        @type iterable: iterable
+        @param counter: name of the counter of the items, None to not count them
+        @type counter: String
+        @return: the items, the time spent producing each one added to the stage
+        @rtype: generator
+        '''
+        clock=time.perf_counter
+        timers=self._timers
+        timers.setdefault(stage, 0.0)
+        iterator=iter(iterable)
+        items=0
+        try:
+            while True:
+                start=clock()
+                try:
+                    item=next(iterator)
+                except StopIteration:
+                    timers[stage]=timers[stage]+clock()-start
+                    return
+                timers[stage]=timers[stage]+clock()-start
+                items=items+1
+                yield item
+        finally:
+            if counter != None:
+                self.count(counter, items)
+
+    def getTimer(self, stage):
+        '''
+        @return: seconds spent in the stage, 0 if it was never timed
+        @rtype: Float
+        '''
+        return self._timers.get(stage, 0.0)
+
+    def getCounter(self, counter):
+        '''
+        @return: value of the counter, 0 if it was never counted
+        @rtype: Int
+        '''
+        return self._counters.get(counter, 0)
+
+    def finish(self, success):
+        '''
+        @param success: true if the conversion succeeded
+        @type success: Boolean
+        @summary: records the total wall time and hands the statistics to every stats hook
+        '''
+        self.success=success
+        self._timers['total']=time.perf_counter()-self._start
+        statistics=self.toDict()
+        for hook in list(_HOOKS):
+            try:
+                hook(statistics)
+            except Exception:
+                _log.exception('Exception in stats hook %r', hook)
+
+    def toDict(self):
+        '''
+        @return: the statistics as plain values: inputFile, outputFile, success, seconds per
+                 stage and counters
+        @rtype: dict
+        '''
+        return {'inputFile': self.inputFile,
+                'outputFile': self.outputFile,
+                'success': self.success,
+                'seconds': dict(self._timers),
+                'counters': dict(self._counters)}
+
+    def toJson(self):
+        '''
+        @return: the statistics as JSON
+        @rtype: String
+        '''
+        return json.dumps(self.toDict(), indent=2)
+
+    def __str__(self):
+        return self.toString()
+
+    def toString(self):
+        return 'ConversionStats(inputFile='+str(self.inputFile)+',seconds='+str(self._timers)+',counters='+str(self._counters)+')'
+
+class StageTimer:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Context manager adding the wall time of its block to a stage of a ConversionStats
+    '''
+    __slots__=('_stats', '_stage', '_start')
+
+    def __init__(self, stats, stage):
+        '''
+        @param stats: statistics the time is added to
+        @type stats: ConversionStats
+        @param stage: name of the stage
+        @type stage: String
+        __init__: constructor
+        '''
+        self._stats=stats
+        self._stage=stage
+        self._start=0.0
+
+    def __enter__(self):
+        self._start=time.perf_counter()
+        return self
+
+    def __exit__(self, exceptionType, exception, traceback):
+        self._stats.add(self._stage, time.perf_counter()-self._start)
+        return False
@@ -0,0 +1,262 @@
+import re
+from difflib import SequenceMatcher
+from specops.requirement import RequirementIdentifier, requirementKey, normalizeRequirement
+
+# headers of the columns written by the converter.  Every other column belongs to the reviewers
+ID_HEADER='Requirement ID'
+REQUIREMENT_HEADER='Requirement'
+KEYWORD_HEADER='Requirement Keyword'
+CONVERTER_HEADERS=(ID_HEADER, REQUIREMENT_HEADER, KEYWORD_HEADER)
+
+# requirement keys of the matrices written when the hash of a key had 4 bytes
+_LEGACY_DIGEST_SIZE=4
+_LEGACY_KEY=re.compile('[0-9a-f]{8}(\\.[0-9]+)?')
+# requirement IDs of the matrices written when the requirements were numbered by row
+_ROW_NUMBER=re.compile('[0-9]+')
+
+# similarity (difflib ratio of the normalized sentences) from which a removed requirement and
+# an added one are taken for the same requirement, edited
+_EDIT_SIMILARITY=0.6
+# added requirements searched ahead for the edit of every removed one
+_EDIT_WINDOW=8
+
+def _unpaired(oldStart, oldEnd, newStart, newEnd):
+    '''
+    @return: the opcode of a run of rows removed and added that are not edits of each other,
+             none when the run is empty
+    '''
+    if oldStart == oldEnd and newStart == newEnd:
+        return []
+    if newStart == newEnd:
+        return [('delete', oldStart, oldEnd, newStart, newEnd)]
+    if oldStart == oldEnd:
+        return [('insert', oldStart, oldEnd, newStart, newEnd)]
+    return [('replace', oldStart, oldEnd, newStart, newEnd)]
+
+def _cell(value):
+    '''
+    @return: the value of a cell as compared between revisions, empty cells being ''
+    '''
+    if value == None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # Excel hands back numeric IDs (matrices numbered by row) as floats
+        return str(int(value))
+    return str(value)
+
+class MatrixUpdate:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Difference between the rows of an existing Compliance Matrix and the requirements
+              of a new revision of its document.  Rows are matched on their requirement key (see
+              specops.requirement.requirementKey), so the reviewer columns ("Meets Requirement",
+              "Comment", ...) of the requirements that are still there are kept, and only the
+              rows that were added, removed or changed need to be rewritten.  A requirement
+              whose sentence was edited gets a new key: it is paired with the removed
+              requirement it is most like, keeps its review and is counted as changed.
+    '''
+
+    # header of the existing matrix
+    _header=None
+    # column index of each header of the existing matrix
+    _columns=None
+    # data rows of the existing matrix (list<list<Object>>)
+    _rows=None
+    # (requirement ID, requirement, keyword cell) of the new revision
+    _requirements=None
+    # difflib opcodes turning the existing rows into the new requirements
+    _opcodes=None
+
+    def __init__(self, header, rows, requirements):
+        '''
+        @param header: header row of the existing matrix
+        @type header: list<String>
+        @param rows: data rows of the existing matrix
+        @type rows: list<list<Object>>
+        @param requirements: (requirement ID, requirement, keyword cell) of the new revision
+        @type requirements: list<tuple<String,String,String>>
+        __init__: constructor
+        '''
+        self._header=[_cell(name) for name in header]
+        self._columns=dict()
+        for index, name in enumerate(self._header):
+            self._columns.setdefault(name, index)
+        if ID_HEADER not in self._columns:
+            raise ValueError('Not a Compliance Matrix, there is no \''+ID_HEADER+'\' column')
+        self._rows=rows
+        self._requirements=requirements
+
+        idColumn=self._columns[ID_HEADER]
+        oldKeys=[requirementKey(_cell(row[idColumn]) if idColumn < len(row) else '') for row in rows]
+        newKeys=[requirementKey(requirementId) for requirementId, requirement, keyword in requirements]
+        # a matrix written when the requirements were numbered by row has no key to match them
+        # on: the keys its requirements would have now are worked out from their text instead
+        legacyKeys=[key for key in oldKeys if key != '']
+        if len(legacyKeys) != 0 and all(_ROW_NUMBER.fullmatch(key) for key in legacyKeys):
+            if REQUIREMENT_HEADER not in self._columns:
+                raise ValueError('The Compliance Matrix numbers its requirements by row and has no \''+REQUIREMENT_HEADER+
+                                 '\' column to match them on')
+            identifier=RequirementIdentifier()
+            oldKeys=[identifier.nextId(self._oldCell(row, REQUIREMENT_HEADER)) for row in range(len(rows))]
+        # a matrix written before the keys were widened has 8 hex digit keys: the requirements
+        # are matched on the keys they had then, so its reviews are kept and its IDs rewritten
+        elif len(legacyKeys) != 0 and all(_LEGACY_KEY.fullmatch(key) for key in legacyKeys):
+            identifier=RequirementIdentifier(_LEGACY_DIGEST_SIZE)
+            newKeys=[identifier.nextId(requirement) for requirementId, requirement, keyword in requirements]
+        self._opcodes=list()
+        for tag, oldStart, oldEnd, newStart, newEnd in SequenceMatcher(None, oldKeys, newKeys, autojunk=False).get_opcodes():
+            opcodes=[(tag, oldStart, oldEnd, newStart, newEnd)]
+            if tag == 'replace' and REQUIREMENT_HEADER in self._columns:
+                opcodes=self._pairEdited(oldStart, oldEnd, newStart, newEnd)
+            for opcode in opcodes:
+                previous=self._opcodes[-1] if len(self._opcodes) != 0 else None
+                if previous != None and previous[0] == 'equal' and opcode[0] == 'equal':
+                    self._opcodes[-1]=('equal', previous[1], opcode[2], previous[3], opcode[4])
+                else:
+                    self._opcodes.append(opcode)
+
+    def _pairEdited(self, oldStart, oldEnd, newStart, newEnd):
+        '''
+        @return: the opcodes of a run of rows replaced by others, where every removed requirement
+                 is matched ('equal') with the first added requirement of the next few that is
+                 similar enough to be the same requirement edited.  The pairs keep the order of
+                 the rows, the rows left over are 'delete'd, 'insert'ed or 'replace'd
+        @rtype: list<tuple<String,Int,Int,Int,Int>>
+        '''
+        opcodes=list()
+        pendingOld=oldStart
+        pendingNew=newStart
+        for row in range(oldStart, oldEnd):
+            old=normalizeRequirement(self._oldCell(row, REQUIREMENT_HEADER))
+            for requirement in range(pendingNew, min(newEnd, pendingNew+_EDIT_WINDOW)):
+                matcher=SequenceMatcher(None, old, normalizeRequirement(_cell(self._requirements[requirement][1])), autojunk=False)
+                if matcher.real_quick_ratio() >= _EDIT_SIMILARITY and matcher.quick_ratio() >= _EDIT_SIMILARITY and \
+                   matcher.ratio() >= _EDIT_SIMILARITY:
+                    opcodes.extend(_unpaired(pendingOld, row, pendingNew, requirement))
+                    opcodes.append(('equal', row, row+1, requirement, requirement+1))
+                    pendingOld=row+1
+                    pendingNew=requirement+1
+                    break
+        opcodes.extend(_unpaired(pendingOld, oldEnd, pendingNew, newEnd))
+        return opcodes
+
+    def getColumn(self, header):
+        '''
+        @param header: header of a column of the existing matrix
+        @type header: String
+        @return: 0 based index of the column, or None if the matrix does not have it
+        @rtype: Int
+        '''
+        return self._columns.get(header)
+
+    def getHeader(self):
+        '''
+        @return: header row of the existing matrix
+        @rtype: list<String>
+        '''
+        return list(self._header)
+
+    def _oldCell(self, row, header):
+        '''
+        @return: the value of a column of an existing row, '' if the matrix does not have the column
+        '''
+        column=self._columns.get(header)
+        if column == None or column >= len(self._rows[row]):
+            return ''
+        return _cell(self._rows[row][column])
+
+    def _oldValue(self, row, header):
+        '''
+        @return: the value of a column of an existing row as it was read (number, date, ...),
+                 None if the cell is empty or the matrix does not have the column
+        '''
+        column=self._columns.get(header)
+        if column == None or column >= len(self._rows[row]) or self._rows[row][column] == '':
+            return None
+        return self._rows[row][column]
+
+    def _isChanged(self, row, requirement):
+        '''
+        @return: true if the converter columns of an existing row differ from the new requirement
+        '''
+        for header, value in zip(CONVERTER_HEADERS, self._requirements[requirement]):
+            if header in self._columns and self._oldCell(row, header) != _cell(value):
+                return True
+        return False
+
+    def edits(self):
+        '''
+        @summary: the edits that turn the existing rows into the new revision, last row first so
+                  applying an edit does not move the rows of the edits still to come
+        @return: (tag, oldStart, oldEnd, newStart, newEnd) for every run of rows that was
+                 'delete'd, 'insert'ed, 'replace'd or 'change'd (matched, but the requirement,
+                 its ID or its keyword differ).  Indices are 0 based data row indices
+        @rtype: list<tuple<String,Int,Int,Int,Int>>
+        '''
+        edits=list()
+        for tag, oldStart, oldEnd, newStart, newEnd in self._opcodes:
+            if tag != 'equal':
+                edits.append((tag, oldStart, oldEnd, newStart, newEnd))
+                continue
+            # runs of matched rows whose converter columns changed
+            runStart=None
+            for offset in range(oldEnd-oldStart+1):
+                changed=offset < oldEnd-oldStart and self._isChanged(oldStart+offset, newStart+offset)
+                if changed and runStart == None:
+                    runStart=offset
+                elif not changed and runStart != None:
+                    edits.append(('change', oldStart+runStart, oldStart+offset, newStart+runStart, newStart+offset))
+                    runStart=None
+        edits.reverse()
+        return edits
+
+    def mergedRows(self, header):
+        '''
+        @param header: header row of the updated matrix
+        @type header: list<String>
+        @return: every data row of the updated matrix.  The converter columns come from the new
+                 revision, every other column from the matching existing row, with the values
+                 as they were read
+        @rtype: generator<list<Object>>
+        '''
+        for tag, oldStart, oldEnd, newStart, newEnd in self._opcodes:
+            if tag == 'delete':
+                continue
+            for offset in range(newEnd-newStart):
+                values=dict(zip(CONVERTER_HEADERS, self._requirements[newStart+offset]))
+                row=list()
+                for name in header:
+                    if name in values:
+                        row.append(values[name])
+                    elif tag == 'equal':
+                        row.append(self._oldValue(oldStart+offset, name))
+                    else:
+                        row.append(None)
+                yield row
+
+    def getCounts(self):
+        '''
+        @return: number of rows (added, removed, changed, unchanged)
+        @rtype: tuple<Int,Int,Int,Int>
+        '''
+        added=0
+        removed=0
+        changed=0
+        matched=0
+        for tag, oldStart, oldEnd, newStart, newEnd in self._opcodes:
+            if tag == 'equal':
+                matched=matched+oldEnd-oldStart
+            else:
+                removed=removed+oldEnd-oldStart
+                added=added+newEnd-newStart
+        for tag, oldStart, oldEnd, newStart, newEnd in self.edits():
+            if tag == 'change':
+                changed=changed+oldEnd-oldStart
+        return added, removed, changed, matched-changed
+
+    def __str__(self):
+        return self.toString()
+
+    def toString(self):
+        return 'MatrixUpdate(added=%d,removed=%d,changed=%d,unchanged=%d)' % self.getCounts()
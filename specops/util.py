@@ -1,5 +1,149 @@
+import os
 import sys
-from specops.io.reader import CsvFileReader
+import logging
+from specops.io.reader import FileReader
+from specops.log import configureLogging
+from specops.segmenter import DEFAULT_ABBREVIATIONS
+from specops.classifier import DEFAULT_KEYWORDS
+
+# environment variables overriding properties: SPECOPS_<property key>, SPECOPS_cacheFile=...
+ENVIRONMENT_PREFIX='SPECOPS_'
+# first character of the comment lines of a properties file
+_COMMENTS=('#', '!')
+
+_log=logging.getLogger(__name__)
+
+def _toBoolean(value):
+    '''
+    @param value: property value, "True" or "False" in any case
+    @type value: String
+    @return: the boolean value of the property
+    @rtype: Boolean
+    @raise ValueError: the value is not a boolean
+    '''
+    if isinstance(value, bool):
+        return value
+    value=str(value).strip().lower()
+    if value == 'true':
+        return True
+    if value == 'false':
+        return False
+    raise ValueError('not a boolean: \''+value+'\'')
+
+def _toList(value):
+    '''
+    @param value: comma separated property value
+    @type value: String
+    @return: the non empty entries of the value
+    @rtype: tuple<String>
+    '''
+    if isinstance(value, (tuple, list)):
+        return tuple(value)
+    return tuple(entry.strip() for entry in str(value).split(',') if entry.strip() != '')
+
+def _toText(value):
+    '''
+    @param value: property value that may contain escape sequences (complianceMatrixDelimiter=\\t)
+    @type value: String
+    @return: the value with its escape sequences replaced
+    @rtype: String
+    '''
+    return str(value).encode('latin-1', 'backslashreplace').decode('unicode_escape')
+
+# attribute of the Settings, property key, conversion and default value of every setting
+SETTINGS=(
+    ('debug', 'DEBUG', _toBoolean, False),
+    ('debugLevel', 'debugLevel', int, 0),
+    ('logFile', 'logFile', str, None),
+    ('logFormat', 'logFormat', str, 'text'),
+    ('backend', 'backend', str, None),
+    ('outputFile', 'complianceMatrixOutputFile', str, './complianceMatrix'),
+    ('delimiter', 'complianceMatrixDelimiter', _toText, '\t'),
+    ('outputFormat', 'complianceMatrixFormat', str, 'xlsx'),
+    ('sectionIds', 'requirementIdSections', _toBoolean, True),
+    ('allParts', 'readAllDocumentParts', _toBoolean, True),
+    ('sentenceAbbreviations', 'sentenceAbbreviations', _toList, DEFAULT_ABBREVIATIONS),
+    ('requirementKeywords', 'requirementKeywords', str, ','.join(keyword+':'+strength for keyword, strength in DEFAULT_KEYWORDS)),
+    ('chunkSize', 'complianceMatrixChunkSize', int, 1000),
+    ('bufferSize', 'fileWriterBufferSize', int, 4*1024*1024),
+    ('cacheEnabled', 'cacheEnabled', _toBoolean, True),
+    ('cacheFile', 'cacheFile', str, './cache/complianceMatrix.cache'),
+    ('cacheMaxSize', 'cacheMaxSize', int, 256*1024*1024),
+    ('pipelineThreads', 'pipelineThreads', _toBoolean, True),
+    ('pipelineQueueSize', 'pipelineQueueSize', int, 8),
+    ('pipelineBatchSize', 'pipelineBatchSize', int, 256),
+    ('extractProcesses', 'extractProcesses', int, 1),
+    ('automationMaxUses', 'automationMaxUses', int, 50),
+    ('serverHost', 'serverHost', str, '127.0.0.1'),
+    ('serverPort', 'serverPort', int, 8470),
+    ('serverJobs', 'serverJobs', int, 2),
+    ('serverTimeout', 'serverTimeout', float, 600.0),
+    ('serverQueueSize', 'serverQueueSize', int, 100),
+    ('serverKeepJobs', 'serverKeepJobs', int, 1000),
+    ('serverMaxUpload', 'serverMaxUpload', int, 256*1024*1024),
+    ('serverDirectory', 'serverDirectory', str, './server'),
+    ('serverRoots', 'serverRoots', _toList, ()),
+    ('watchInterval', 'watchInterval', float, 1.0),
+    ('watchDebounce', 'watchDebounce', float, 2.0),
+)
+
+class Settings:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Immutable snapshot of the configuration.  Every property is parsed and converted
+              to its type once, when the snapshot is taken, so components that are handed a
+              Settings read plain attributes (settings.debug, settings.chunkSize) in their hot
+              paths instead of looking the property up on every call.  Settings can be
+              pickled, so the worker processes of a batch see the same configuration,
+              overrides included, as the process that started them.
+    '''
+    __slots__=tuple(attribute for attribute, key, convert, default in SETTINGS)+('_properties',)
+
+    def __init__(self, properties=None):
+        '''
+        @param properties: raw property values keyed by property key.  Missing properties get
+                           their default value
+        @type properties: dict
+        @raise ValueError: a property value could not be converted to its type
+        __init__: constructor
+        '''
+        properties=dict(properties) if properties != None else dict()
+        object.__setattr__(self, '_properties', properties)
+        for attribute, key, convert, default in SETTINGS:
+            value=default
+            if key in properties:
+                try:
+                    value=convert(properties[key])
+                except ValueError:
+                    raise ValueError('Invalid value for property \''+key+'\': '+str(sys.exc_info()[1]))
+            object.__setattr__(self, attribute, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Settings are read only, \''+name+'\' can not be set')
+
+    def __delattr__(self, name):
+        raise AttributeError('Settings are read only, \''+name+'\' can not be deleted')
+
+    def __reduce__(self):
+        return (Settings, (self._properties,))
+
+    def get(self, key, defaultValue=None):
+        '''
+        @param key: property key
+        @type key: String
+        @param defaultValue: value to return if the property is not set
+        @type defaultValue: Object
+        @return: the raw value of any property, including the ones without a typed attribute
+        @rtype: String
+        '''
+        return self._properties.get(key, defaultValue)
+
+    def __str__(self):
+        return self.toString()
+
+    def toString(self):
+        return 'Settings('+','.join(attribute+'='+repr(getattr(self, attribute)) for attribute, key, convert, default in SETTINGS)+')'
 
 class ConfigSingleton:
     '''    
@@ -15,6 +159,10 @@ class ConfigSingleton:
     _propertyMap=None
     # indicates if the property file was already read or not
     _readFile=False
+    # properties set on the command line, they override the file and the environment
+    _overrides=None
+    # snapshot of the properties, taken on first use
+    _settings=None
     
     def __init__(self, propertiesFile=None):
         '''
@@ -23,6 +171,8 @@ class ConfigSingleton:
         '''
         self._propertyMap=dict()
         self._readFile=False
+        self._overrides=dict()
+        self._settings=None
         
         if propertiesFile is not None:
             self._propertiesFile=propertiesFile
@@ -36,6 +186,19 @@ class ConfigSingleton:
         if propertiesFile is not None:
             self._propertiesFile=propertiesFile
             self._readFile=False
+            self._settings=None
+    
+    def setProperty(self, key, value):
+        '''
+        @param key: property key
+        @type key: String
+        @param value: property value, as it would be written in the properties file
+        @type value: String
+        setProperty: overrides a property of the properties file and the environment (--set key=value)
+        '''
+        self._overrides[key]=value
+        self._propertyMap[key]=value
+        self._settings=None
         
     def readConfig(self):
         '''
@@ -43,27 +206,35 @@ class ConfigSingleton:
         readConfig: read in the config properties file
         '''
         self._readFile=True
+        self._settings=None
         
         try:
-            csvFileReader=CsvFileReader(self._propertiesFile)
-            csvFileReader.setDelimiter('=')
-            csvFileReader.open()
+            fileReader=FileReader(self._propertiesFile)
+            fileReader.open()
             
-            sys.stderr.write("Reading in Properties File\n")
+            properties=dict()
+            for line in fileReader.readlines():
+                line=line.strip()
+                if line == '' or line[0] in _COMMENTS:
+                    continue
+                # only the first '=' separates the key, the value may contain more of them
+                key, separator, value=line.partition('=')
+                if separator != '':
+                    properties[key.strip()]=value.strip()
+            fileReader.close()
             
-            # get all the columns in the row
-            for columns in csvFileReader.readlines():  
-                if len(columns) > 1:
-                    key=columns[0].strip()
-                    value=columns[1].strip()
-                    
-                    sys.stderr.write(key+"="+value+'\n')
-                    self._propertyMap[key]=value
+            # SPECOPS_<key> environment variables override the file, the key is not case sensitive
+            keys=dict((key.lower(), key) for attribute, key, convert, default in SETTINGS)
+            keys.update((key.lower(), key) for key in properties)
+            for name, value in os.environ.items():
+                if name.upper().startswith(ENVIRONMENT_PREFIX):
+                    key=name[len(ENVIRONMENT_PREFIX):]
+                    properties[keys.get(key.lower(), key)]=value
             
-            csvFileReader.close()
+            properties.update(self._overrides)
+            self._propertyMap=properties
         except Exception:
-            print ('Exception: ', sys.exc_info()[0])    
-            sys.stderr.write('General Exception opening config File: \'' + self._propertiesFile + '\'\n')
+            _log.exception('General Exception opening config File: \'%s\'', self._propertiesFile)
             raise            
             
     def _getProperty(self, key, defaultValue):
@@ -106,7 +277,7 @@ class ConfigSingleton:
         @rtype: Boolean
         getBoolean: get boolean value out of HashMap corresponding to the key
         '''
-        return {'true': True, 'false': False}.get(self._getProperty(key, str(defaultValue)).lower())
+        return {'true': True, 'false': False}.get(str(self._getProperty(key, defaultValue)).lower())
         
     def getInt(self, key, defaultValue):
         '''
@@ -132,6 +303,23 @@ class ConfigSingleton:
         '''
         return float(self._getProperty(key, defaultValue))
                 
+    def getSettings(self):
+        '''
+        @return: immutable, typed snapshot of the properties, taken once and shared until a
+                 property or the properties file changes
+        @rtype: Settings
+        getSettings: get the Settings handed to the components at construction
+        '''
+        if self._readFile == False:
+            self.readConfig()
+        if self._settings == None:
+            self._settings=Settings(self._propertyMap)
+            # the logging follows the properties, so the converter, its tools and embedding
+            # applications all honor debugLevel and logFile
+            configureLogging(self._settings)
+            _log.debug('Read Properties File \'%s\': %s', self._propertiesFile, self._propertyMap)
+        return self._settings
+                
     def __str__(self):
         return self.toString()
     
@@ -0,0 +1,219 @@
+import os
+import sys
+import time
+from specops.batch import DOCUMENT_EXTENSIONS, convertOne, printSummary
+
+class DocumentWatcher:
+    '''
+    @author: Steven Hoffman
+    @version: 1.0
+    @summary: Watches directories for new and modified Word Documents and converts each one
+              once it has stopped changing.  A poll lists the directories and compares the
+              modification time and size of every document with the previous poll, nothing
+              is read or hashed, so thousands of documents are watched for a few stat calls
+              each.  A document is converted once its modification time and size have been
+              the same for the debounce time, so the burst of writes of a save (or of a copy
+              into the folder) gives a single conversion.  The conversions run in this
+              process, one after the other, reusing the configuration, the Word/Excel
+              instances of the automation pool and the Requirement Cache, which only
+              tokenizes the paragraphs that changed.
+    '''
+
+    # function converting a single document: convert(inputFile, *arguments) (see BatchConverter)
+    _convert=None
+    # extra arguments passed to the convert function
+    _arguments=None
+    # directories watched
+    _directories=None
+    # extensions of the documents watched
+    _extensions=DOCUMENT_EXTENSIONS
+    # extension of the Compliance Matrix written next to each document
+    _outputExtension='.xlsx'
+    # seconds between two polls, and seconds a document must stay unchanged before it is converted
+    _interval=1.0
+    _debounce=2.0
+    # (modification time, size) of every document at the last poll
+    _documents=None
+    # documents changed since their last conversion: [(modification time, size), time the
+    # signature was first seen]
+    _pending=None
+    # conversions run, and failed, since the watcher was created
+    _converted=0
+    _failed=0
+
+    def __init__(self, convert, arguments=(), directories=(), outputFormat='xlsx', interval=1.0, debounce=2.0,
+                 extensions=DOCUMENT_EXTENSIONS):
+        '''
+        @param convert: function converting a single document and returning false on failure,
+                        or the statistics of the conversion with a 'success' entry
+        @type convert: function
+        @param arguments: extra arguments passed to the convert function after the document
+        @type arguments: tuple
+        @param directories: directories whose Word Documents are converted (not their sub directories)
+        @type directories: list<String>
+        @param outputFormat: format of the Compliance Matrix, which is written next to the document
+        @type outputFormat: String
+        @param interval: seconds between two polls of the directories
+        @type interval: Float
+        @param debounce: seconds a document must stay unchanged before it is converted
+        @type debounce: Float
+        @param extensions: extensions of the documents watched
+        @type extensions: tuple<String>
+        __init__: constructor
+        '''
+        self._convert=convert
+        self._arguments=tuple(arguments)
+        self._directories=list(directories)
+        self._outputExtension='.'+outputFormat
+        self._interval=max(0.01, interval)
+        self._debounce=max(0.0, debounce)
+        self._extensions=tuple(extensions)
+        self._documents=dict()
+        self._pending=dict()
+
+    def _scan(self):
+        '''
+        @return: (modification time, size) of every document in the directories
+        @rtype: dict
+        '''
+        documents=dict()
+        for directory in self._directories:
+            try:
+                entries=os.scandir(directory)
+            except OSError:
+                # the directory is gone or not reachable (network share), try again at the next poll
+                continue
+            with entries:
+                for entry in entries:
+                    name=entry.name
+                    # filter on the name first, so only the documents are stat'ed
+                    if name.lower().endswith(self._extensions) == False or name.startswith('~$'):
+                        continue
+                    try:
+                        if entry.is_file():
+                            status=entry.stat()
+                            documents[entry.path]=(status.st_mtime_ns, status.st_size)
+                    except OSError:
+                        # removed between the listing and the stat
+                        continue
+        return documents
+
+    def _isConverted(self, document, signature):
+        '''
+        @return: true if the Compliance Matrix of the document is newer than the document
+        @rtype: Boolean
+        '''
+        outputFile=os.path.splitext(document)[0]+self._outputExtension
+        try:
+            return os.stat(outputFile).st_mtime_ns >= signature[0]
+        except OSError:
+            return False
+
+    def start(self):
+        '''
+        @summary: takes the first listing of the directories.  The documents without a
+                  Compliance Matrix, or with one older than the document, are converted by the
+                  first poll, the others only once they change
+        '''
+        self._documents=self._scan()
+        self._pending=dict()
+        now=time.monotonic()
+        for document, signature in self._documents.items():
+            if self._isConverted(document, signature) == False:
+                # changed while nobody was watching, no need to wait for it to settle
+                self._pending[document]=[signature, now-self._debounce]
+
+    def poll(self, now=None):
+        '''
+        @param now: time of the poll (time.monotonic), defaults to now
+        @type now: Float
+        @return: the documents new or modified since the previous poll, and the documents that
+                 stopped changing and are due for conversion
+        @rtype: tuple<list<String>,list<String>>
+        '''
+        if now == None:
+            now=time.monotonic()
+        documents=self._scan()
+        changed=list()
+        for document, signature in documents.items():
+            if self._documents.get(document) != signature:
+                changed.append(document)
+                # (re)start the debounce time of the document
+                self._pending[document]=[signature, now]
+        for document in list(self._pending):
+            if document not in documents:
+                del self._pending[document]
+        self._documents=documents
+
+        due=sorted(document for document, (signature, since) in self._pending.items() if now-since >= self._debounce)
+        return changed, due
+
+    def convertDue(self, documents):
+        '''
+        @param documents: documents due for conversion (see poll)
+        @type documents: list<String>
+        @return: the result of every conversion
+        @rtype: list<BatchResult>
+        '''
+        results=list()
+        for document in documents:
+            # a document saved again during its conversion differs from the listing of the
+            # last poll, so the next poll picks it up again
+            del self._pending[document]
+            result=convertOne(self._convert, document, self._arguments)
+            self._converted=self._converted+1
+            if result.success == False:
+                self._failed=self._failed+1
+            results.append(result)
+        return results
+
+    def run(self, polls=None, stream=sys.stdout):
+        '''
+        @param polls: number of polls before returning, None to watch until interrupted
+        @type polls: Int
+        @param stream: where the result of every conversion is written, as it arrives
+        @type stream: file
+        @return: the result of every conversion when the polls are bounded.  Watching until
+                 interrupted keeps no result, only the counts (see getCounts), so a watcher
+                 running for months does not grow
+        @rtype: list<BatchResult>
+        '''
+        self.start()
+        results=list() if polls != None else None
+        count=0
+        while polls == None or count < polls:
+            started=time.monotonic()
+            changed, due=self.poll(started)
+            if len(due) != 0:
+                converted=self.convertDue(due)
+                printSummary(converted, stream)
+                stream.write('%d documents converted since the start, %d failed\n' % self.getCounts())
+                stream.flush()
+                if results != None:
+                    results.extend(converted)
+            count=count+1
+            if polls == None or count < polls:
+                time.sleep(max(0.0, self._interval-(time.monotonic()-started)))
+        return results
+
+    def getCounts(self):
+        '''
+        @return: the number of conversions run and the number that failed since the watcher
+                 was created
+        @rtype: tuple<Int,Int>
+        '''
+        return self._converted, self._failed
+
+    def getPending(self):
+        '''
+        @return: the documents changed and waiting to stop changing
+        @rtype: list<String>
+        '''
+        return sorted(self._pending)
+
+    def __str__(self):
+        return self.toString()
+
+    def toString(self):
+        return ('DocumentWatcher(directories='+str(self._directories)+',documents='+str(len(self._documents))+
+                ',pending='+str(len(self._pending))+',converted='+str(self._converted)+',failed='+str(self._failed)+')')